@@ -1,10 +1,38 @@
-import requests
 import concurrent.futures as cf
 import csv
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Dict, List, Set
+import requests
+import api.hh as hh
 
 
-base_URI = "https://api.hh.ru/"
-header = {'User-Agent': 'URFU_my_app'}
+# Один клиент на процесс: ограничитель частоты общий для всех потоков, которые качают страницы
+client = hh.Client()
+# Подробности вакансий запрашиваются по одной, поэтому для них отдельный клиент с большей частотой и пулом
+DETAIL_WORKERS = 32
+detail_client = hh.Client(rate=30, capacity=DETAIL_WORKERS, pool_size=DETAIL_WORKERS)
+DETAIL_FIELDS = ['name', 'id', 'description', 'key_skills', 'experience_id', 'premium', 'employer_name',
+                 'salary_from', 'salary_to', 'salary_gross', 'salary_currency', 'area_name', 'published_at']
+# Максимальный размер страницы и максимальное число вакансий, которое api отдает постранично по одному запросу
+PER_PAGE = 100
+MAX_FOUND = 2000
+# Окно подбирается с запасом, чтобы колебания found между запросами не выводили его за MAX_FOUND
+TARGET_FOUND = MAX_FOUND * 0.9
+MAX_GROWTH = 8
+MIN_WINDOW = timedelta(seconds=1)
+DAYS_PARALLEL = 4
+# Сколько раз запрашивать первую страницу окна, если api ответил ошибкой, и пауза между попытками в секундах
+WINDOW_RETRIES = 3
+WINDOW_RETRY_DELAY = 5
+# Как часто сохранять отмеченные страницы в секундах. Смена окна и дня сохраняется сразу
+CHECKPOINT_INTERVAL = 5
 
 
 def transform_vac(vac):
@@ -19,6 +47,7 @@ def transform_vac(vac):
     area_name = vac['area']['name'] if vac['area'] is not None else None
 
     return {
+        'id': vac['id'],
         'name': vac['name'],
         'salary_from': salary_from,
         'salary_to': salary_to,
@@ -28,116 +57,464 @@ def transform_vac(vac):
     }
 
 
-def get_vacs_in_day(month: str or int, day: str or int):
+def transform_vac_full(vac):
     """
-    Возвращает выгрузку вакансий за день
-    :param day: День в двухзначном формате
-    :param month: Месяц в двухзначном формате
-    :return: Список вакансий
+    Оставляет у подробной вакансии поля, которые читает main.py
+    :param vac: Ответ api на запрос vacancies/{id}
+    :return: Строка для csv с полным набором столбцов
     """
-    day = str(day)
-    month = str(month)
-    if len(day) == 1:
-        day = '0' + day
-    if len(month) == 1:
-        month = '0' + month
+    salary = vac['salary'] if vac['salary'] is not None else {}
+    return {
+        'name': vac['name'],
+        'id': vac['id'],
+        'description': vac['description'],
+        'key_skills': '\n'.join(skill['name'] for skill in vac['key_skills']),
+        'experience_id': vac['experience']['id'] if vac['experience'] is not None else None,
+        'premium': str(vac['premium']),
+        'employer_name': vac['employer']['name'] if vac['employer'] is not None else None,
+        'salary_from': salary.get('from'),
+        'salary_to': salary.get('to'),
+        'salary_gross': str(salary['gross']) if salary.get('gross') is not None else None,
+        'salary_currency': salary.get('currency'),
+        'area_name': vac['area']['name'] if vac['area'] is not None else None,
+        'published_at': vac['published_at']
+    }
 
-    res = []
-    date = '2022-'+ month + '-' + day
-    i, j = 0, 2
-    while (j < 25):
-        data = get_vacs_from_hours(date, i, j)
-        if data is not None:
-            res += data
-        i = i + 2
-        j = j + 2
 
+def format_date(date: datetime) -> str:
+    """
+    Приводит дату к формату, который принимает api hh
+    :param date: Дата
+    :return: Строка вида YYYY-MM-DDTHH:MM:SS+0000
+    """
+    return date.strftime('%Y-%m-%dT%H:%M:%S+0000')
 
 
+class CsvSink:
+    """Пишет вакансии в csv по мере загрузки страниц, чтобы не держать весь день в памяти.
+
+    Attributes:
+        path (str): Путь к csv
+    """
+    # main.py считает первый столбец названием, а csv_split.py берет год из последнего, поэтому id не с краю
+    fields = ['name', 'id', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at']
 
-    # res = requests.get(base_URI + "vacancies",
-    #                    params={'date_from': '2022-'+ month + '-' + day + 'T00:00:00+0000',
-    #                            'date_to': '2022-'+ month + '-' + day + 'T23:59:59+0000',
-    #                            'specialization': 1},
-    #                    headers=header)
+    def __init__(self, path: str, resume: bool):
+        """
+        :param path: Путь к csv
+        :param resume: Дописывать в существующий файл, а не создавать новый
+        """
+        self.path = path
+        self.__lock = threading.Lock()
+        append = resume and os.path.exists(path)
+        self.__file = open(path, 'a' if append else 'w', encoding='utf-8', newline='')
+        self.__writer = csv.DictWriter(self.__file, fieldnames=self.fields)
+        if not append:
+            self.__writer.writeheader()
 
-    return res
+    def write(self, vacs: List[Dict]) -> None:
+        """Дописывает вакансии и сбрасывает буфер на диск"""
+        with self.__lock:
+            self.__writer.writerows(vacs)
+            self.__file.flush()
 
+    def close(self) -> None:
+        self.__file.close()
 
-def get_vacs_from_hours(date: str, hour_from: str, hour_to: str):
+
+class SqliteSink:
+    """Пишет вакансии сразу в таблицу VACANCY, переводя з\\п в рубли по курсам из таблицы VALUTE, как в 3.5.2.
+    Вакансии без з\\п или с валютой без курса на месяц публикации пропускаются.
+
+    Attributes:
+        path (str): Путь к бд
     """
-    Делаем запрос по вакансиям по одному часовому диапазону
-    :param date: Год, месяц и день
-    :param hour_from:
-    :param hour_to:
-    :return: Список вакансий
+
+    def __init__(self, path: str, resume: bool):
+        """
+        :param path: Путь к бд
+        :param resume: Не используется, записи в VACANCY всегда дописываются
+        """
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__con = sqlite3.connect(path, check_same_thread=False)
+        self.__con.execute('CREATE TABLE IF NOT EXISTS VACANCY ("index" INTEGER, name TEXT, salary REAL, '
+                           'area_name TEXT, date TEXT)')
+        self.__valutes = {}
+
+    def write(self, vacs: List[Dict]) -> None:
+        """Переводит з\\п в рубли и дописывает вакансии в VACANCY одной транзакцией"""
+        with self.__lock:
+            rows = []
+            for vac in vacs:
+                date = vac['published_at'][:7]
+                salary = self.__to_rub(vac['salary_from'], vac['salary_to'], vac['salary_currency'], date)
+                if salary is not None and vac['name'] is not None and vac['area_name'] is not None:
+                    rows.append((vac['name'], salary, vac['area_name'], date))
+            with self.__con:
+                self.__con.executemany('INSERT INTO VACANCY (name, salary, area_name, date) VALUES (?, ?, ?, ?)',
+                                       rows)
+
+    def close(self) -> None:
+        self.__con.close()
+
+    def __to_rub(self, salary_from, salary_to, currency: str, date: str) -> int or None:
+        bounds = [s for s in (salary_from, salary_to) if s is not None]
+        if len(bounds) == 0 or currency is None:
+            return None
+        salary = sum(bounds) / len(bounds)
+        if currency == 'RUR':
+            return round(salary)
+        if date not in self.__valutes:
+            cur = self.__con.execute('SELECT * FROM VALUTE WHERE date = ?', (date,))
+            row = cur.fetchone()
+            self.__valutes[date] = dict(zip([col[0] for col in cur.description], row)) if row is not None else {}
+        rate = self.__valutes[date].get(currency)
+        return round(salary * rate) if rate is not None else None
+
+
+class DedupSink:
+    """Обертка над CsvSink или SqliteSink, которая пропускает вакансии с уже записанными id. Id, записанные
+    в этом запуске, хранятся в памяти, а все записанные id - в sqlite рядом с выгрузкой, поэтому дубли
+    отсеиваются и между пересекающимися окнами, и между повторными запусками. Id сохраняются на диск после
+    записи в sink, так что при падении между этими шагами вакансия может повториться, но не потеряется.
+
+    Attributes:
+        sink: CsvSink или SqliteSink
+        path (str): Путь к хранилищу id
     """
-    hour_from = str(hour_from)
-    hour_to = str(hour_to)
-    if len(hour_from) == 1:
-        hour_from = '0' + hour_from
-    if len(hour_to) == 1:
-        hour_to = '0' + hour_to
 
+    def __init__(self, sink, path: str):
+        self.sink = sink
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__seen = set()
+        self.__con = sqlite3.connect(path, check_same_thread=False)
+        self.__con.execute('CREATE TABLE IF NOT EXISTS SEEN (id TEXT PRIMARY KEY)')
 
-    res = requests.get(base_URI + "vacancies",
-                       params={'date_from': date + f'T{hour_from}:00:00+0000',
-                               'date_to': date + f'T{hour_to}:00:00+0000',
-                               'specialization': 1},
-                       headers=header)
-    if not res.ok:
-        return None
-    res = res.json()
-    found = res['found']
-    pages = res['pages']
-    if found == 0:
-        return None
-    if pages == 0:
-        return list(map(transform_vac, res['items']))
+    def write(self, vacs: List[Dict]) -> None:
+        """Записывает в sink только вакансии, id которых еще не встречались"""
+        with self.__lock:
+            ids = [vac['id'] for vac in vacs if vac['id'] not in self.__seen]
+            stored = set()
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                stored.update(row[0] for row in self.__con.execute(
+                    f'SELECT id FROM SEEN WHERE id IN ({", ".join("?" * len(chunk))})', chunk))
+            self.__seen.update(stored)
+            new = []
+            for vac in vacs:
+                if vac['id'] not in self.__seen:
+                    self.__seen.add(vac['id'])
+                    new.append(vac)
+        self.sink.write(new)
+        with self.__lock, self.__con:
+            self.__con.executemany('INSERT OR IGNORE INTO SEEN (id) VALUES (?)', [(vac['id'],) for vac in new])
 
-    if 'items' not in res:
-        return None
-    vacs = []
+    def close(self) -> None:
+        self.sink.close()
+        self.__con.close()
+
+
+class Checkpoint:
+    """Файл с прогрессом выгрузки. Для каждого дня хранит позицию, до которой день уже выгружен, ширину
+    следующего окна, текущее окно и загруженные в нем страницы. После перезапуска выгрузка продолжается с этого
+    места. Файл перезаписывается атомарно через временный файл и os.replace. Загруженные страницы сохраняются не
+    чаще раза в CHECKPOINT_INTERVAL секунд: после падения страницы за последние секунды загрузятся повторно, а
+    DedupSink отсеет дубли.
+
+    Attributes:
+        path (str): Путь к файлу
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__state = {}
+        self.__saved = time.monotonic()
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                self.__state = json.load(file)
+
+    def day(self, day: str) -> Dict:
+        """Возвращает копию прогресса по дню"""
+        with self.__lock:
+            return dict(self.__state.get(day, {}))
+
+    def window_started(self, day: str, date_from: datetime, date_to: datetime) -> None:
+        self.__update(day, window=[format_date(date_from), format_date(date_to)], pages=[])
+
+    def page_done(self, day: str, page: int) -> None:
+        """Отмечает страницу текущего окна дня, которая загружена и записана в sink"""
+        with self.__lock:
+            self.__state[day]['pages'].append(page)
+            if time.monotonic() - self.__saved >= CHECKPOINT_INTERVAL:
+                self.__save()
+
+    def window_done(self, day: str, date_to: datetime, width: timedelta) -> None:
+        self.__update(day, cursor=format_date(date_to), width=width.total_seconds(), window=None, pages=[])
+
+    def day_done(self, day: str) -> None:
+        self.__update(day, done=True, window=None, pages=[])
+
+    def save(self) -> None:
+        """Сохраняет прогресс сразу, например перед остановкой из-за ошибки"""
+        with self.__lock:
+            self.__save()
+
+    def __update(self, day: str, **values) -> None:
+        with self.__lock:
+            self.__state.setdefault(day, {}).update(values)
+            self.__save()
+
+    def __save(self) -> None:
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.__state, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.path)
+        self.__saved = time.monotonic()
+
+
+def parse_date(date: str) -> datetime:
+    """
+    Обратное преобразование к format_date
+    :param date: Строка вида YYYY-MM-DDTHH:MM:SS+0000
+    :return: Дата
+    """
+    return datetime.strptime(date[:19], '%Y-%m-%dT%H:%M:%S')
 
-    with cf.ProcessPoolExecutor() as executor:
-        futures = [executor.submit(get_vacs_from_pages, date + f'T{hour_from}:00:00+0000', date + f'T{hour_to}:00:00+0000', page) for page in range(pages)]
 
+def crawl_range(date_from: date, date_to: date, sink, checkpoint: Checkpoint, days_parallel: int = DAYS_PARALLEL):
+    """
+    Выгружает вакансии за все дни промежутка, days_parallel дней одновременно. Частоту запросов всех дней
+    ограничивает общий client, поэтому параллельность дней только убирает простои между окнами
+    :param date_from: Первый день
+    :param date_to: Последний день включительно
+    :param sink: CsvSink, SqliteSink или DedupSink
+    :param checkpoint: Прогресс выгрузки
+    :param days_parallel: Сколько дней выгружать одновременно
+    """
+    days = [date_from + timedelta(days=i) for i in range((date_to - date_from).days + 1)]
+    with cf.ThreadPoolExecutor(max_workers=days_parallel) as executor:
+        futures = [executor.submit(crawl_day, day, sink, checkpoint) for day in days]
+        for future in cf.as_completed(futures, timeout=None):
+            future.result()
+
+
+def crawl_day(day: date, sink, checkpoint: Checkpoint) -> None:
+    """
+    Выгружает вакансии за день в sink по мере загрузки страниц. Если в checkpoint есть прогресс по этому дню,
+    продолжает с места остановки: недокачанное окно докачивается без уже записанных страниц
+    :param day: День
+    :param sink: CsvSink, SqliteSink или DedupSink
+    :param checkpoint: Прогресс выгрузки
+    """
+    day_start = datetime(day.year, day.month, day.day)
+    day_end = day_start + timedelta(days=1)
+    key = day_start.strftime('%Y-%m-%d')
+    state = checkpoint.day(key)
+    if state.get('done'):
+        return
+
+    start = parse_date(state['cursor']) if 'cursor' in state else day_start
+    width = timedelta(seconds=state['width']) if 'width' in state else timedelta(hours=2)
+    if state.get('window') is not None:
+        date_from, date_to = map(parse_date, state['window'])
+        first_page = get_first_page(date_from, date_to)
+        crawl_window(key, date_from, date_to, first_page, sink, checkpoint, set(state['pages']))
+        checkpoint.window_done(key, date_to, width)
+        start = date_to
+
+    for date_from, date_to, first_page, width in split_windows(start, day_end, width):
+        checkpoint.window_started(key, date_from, date_to)
+        crawl_window(key, date_from, date_to, first_page, sink, checkpoint)
+        checkpoint.window_done(key, date_to, width)
+    checkpoint.day_done(key)
+
+
+def split_windows(start: datetime, end: datetime, width: timedelta = timedelta(hours=2)):
+    """
+    Генератор. Проходит промежуток окнами, в каждом из которых вакансий не больше MAX_FOUND.
+    Если в окне вакансий больше, чем можно пролистать, окно сужается пропорционально found.
+    После каждого окна ширина следующего подбирается по плотности вакансий в текущем, поэтому
+    тихие часы объединяются в одно окно, а загруженные дробятся до нужного размера. Если даже окно шириной
+    MIN_WINDOW не помещается в MAX_FOUND, оно выгружается не полностью, и об этом печатается предупреждение.
+    :param start: Начало промежутка
+    :param end: Конец промежутка
+    :param width: Ширина первого окна
+    :return: Кортежи (начало окна, конец окна, ответ api на первую страницу окна, ширина следующего окна)
+    """
+    while start < end:
+        date_to = min(start + width, end)
+        first_page = get_first_page(start, date_to)
+        found = first_page['found']
+        if found > MAX_FOUND and date_to - start > MIN_WINDOW:
+            width = max(min((date_to - start) * (TARGET_FOUND / found), (date_to - start) / 2), MIN_WINDOW)
+            continue
+        if found > MAX_FOUND:
+            print(f'Окно {format_date(start)} - {format_date(date_to)}: найдено {found} вакансий, api отдает только '
+                  f'{MAX_FOUND}, {found - MAX_FOUND} будут пропущены', file=sys.stderr)
+        width = (date_to - start) * min(TARGET_FOUND / max(found, 1), MAX_GROWTH)
+        yield start, date_to, first_page, width
+        start = date_to
+
+
+def crawl_window(day: str, date_from: datetime, date_to: datetime, first_page: Dict, sink,
+                 checkpoint: Checkpoint, done_pages: Set[int] = frozenset()) -> None:
+    """
+    Выгружает все страницы одного окна в sink. Первая страница уже получена при подборе окна,
+    поэтому повторно не запрашивается. Каждая записанная страница отмечается в checkpoint. Если какую-то
+    страницу получить не удалось, после остальных страниц выбрасывается исключение, и окно остается
+    незавершенным: после перезапуска загружаются только неотмеченные страницы
+    :param day: День в формате YYYY-MM-DD
+    :param date_from: Начало окна
+    :param date_to: Конец окна
+    :param first_page: Ответ api на первую страницу окна
+    :param sink: CsvSink, SqliteSink или DedupSink
+    :param checkpoint: Прогресс выгрузки
+    :param done_pages: Страницы, которые уже записаны до перезапуска
+    """
+    if 'items' not in first_page:
+        return
+    if 0 not in done_pages:
+        sink.write(list(map(transform_vac, first_page['items'])))
+        checkpoint.page_done(day, 0)
+    pages = [page for page in range(1, first_page['pages']) if page not in done_pages]
+    if len(pages) == 0:
+        return
+
+    with cf.ThreadPoolExecutor(max_workers=client.limiter.capacity) as executor:
+        futures = {executor.submit(get_vacs_from_pages, format_date(date_from), format_date(date_to), page): page
+                   for page in pages}
+
+        failed = []
         for future in cf.as_completed(futures, timeout=None):
             data = future.result()
-            if data is not None:
-                vacs += future.result()
+            if data is None:
+                failed.append(futures[future])
+                continue
+            sink.write(data)
+            checkpoint.page_done(day, futures[future])
+    if failed:
+        checkpoint.save()
+        raise RuntimeError(f'Не удалось получить страницы {sorted(failed)} окна {format_date(date_from)} - '
+                           f'{format_date(date_to)}')
+
 
-    return vacs
+def enrich(input_path: str, output_path: str, workers: int = DETAIL_WORKERS) -> List[str]:
+    """
+    Дополняет выгрузку поиска подробностями каждой вакансии: описанием, навыками, опытом и работодателем.
+    Вакансии запрашиваются параллельно пачками по workers * 20 через пул соединений detail_client, ответы
+    кэшируются на диске, поэтому повторный запуск не ходит в сеть за уже полученными вакансиями.
+    Результат пишется по мере готовности пачек, в памяти держится только одна пачка. Вакансия, которую не удалось
+    получить, пропускается и не останавливает выгрузку остальных
+    :param input_path: csv из выгрузки поиска со столбцом id
+    :param output_path: csv с полным набором столбцов
+    :param workers: Сколько вакансий запрашивать одновременно
+    :return: Id вакансий, которые не удалось получить
+    """
+    failed = []
+    with open(input_path, encoding='utf-8') as in_file, \
+            open(output_path, 'w', encoding='utf-8', newline='') as out_file, \
+            cf.ThreadPoolExecutor(max_workers=workers) as executor:
+        writer = csv.DictWriter(out_file, fieldnames=DETAIL_FIELDS)
+        writer.writeheader()
+        ids = (row['id'] for row in csv.DictReader(in_file))
+        while True:
+            batch = list(islice(ids, workers * 20))
+            if len(batch) == 0:
+                break
+            for vac_id, vac in zip(batch, executor.map(get_vacancy, batch)):
+                if vac is None:
+                    failed.append(vac_id)
+                    continue
+                writer.writerow(transform_vac_full(vac))
+            out_file.flush()
+    return failed
+
+
+def get_vacancy(vac_id: str):
+    """
+    Делаем запрос к подробной информации о вакансии. Закэшированный ответ берется без перепроверки:
+    подробности уже выгруженной вакансии для статистики не устаревают
+    :param vac_id: Id вакансии
+    :return: Ответ api или None, если вакансия недоступна или запрос не удался
+    """
+    try:
+        return detail_client.get(f"vacancies/{vac_id}", revalidate=False)
+    except requests.RequestException:
+        return None
+
+
+def get_first_page(date_from: datetime, date_to: datetime) -> Dict:
+    """
+    Запрашивает первую страницу окна, повторяя запрос WINDOW_RETRIES раз, если api ответил ошибкой. Без первой
+    страницы неизвестно, сколько в окне вакансий, поэтому окно не пропускается молча: выгрузка останавливается
+    с исключением, а checkpoint позволяет продолжить ее с этого окна
+    :param date_from: Начало окна
+    :param date_to: Конец окна
+    :return: Ответ api на первую страницу
+    """
+    for attempt in range(WINDOW_RETRIES):
+        if attempt > 0:
+            time.sleep(WINDOW_RETRY_DELAY)
+        first_page = get_page(format_date(date_from), format_date(date_to), 0)
+        if first_page is not None:
+            return first_page
+    raise RuntimeError(f'Не удалось получить первую страницу окна {format_date(date_from)} - {format_date(date_to)}')
+
+
+def get_page(date_from: str, date_to: str, page: int):
+    """
+    Делаем запрос к одной странице вакансий в диапазоне с максимальным per_page
+    :param date_from:
+    :param date_to:
+    :param page: Номер страницы
+    :return: Ответ api или None, если запрос неуспешен. При 429/5xx и сетевых ошибках запрос сначала
+        повторяется клиентом
+    """
+    return client.get("vacancies",
+                      params={'date_from': date_from,
+                              'date_to': date_to,
+                              'page': page,
+                              'per_page': PER_PAGE,
+                              'specialization': 1})
 
 
 def get_vacs_from_pages(date_from: str, date_to: str, page: int):
     """
-    Делаем запрос по вакансиям в одном часовом диапазоне к одной странице
+    Делаем запрос по вакансиям в одном диапазоне к одной странице
     :param date_from:
     :param date_to:
     :param page: Номер страницы
     :return: Список вакансий
     """
-    res = requests.get(base_URI + "vacancies",
-                       params={'date_from': date_from,
-                               'date_to': date_to,
-                               'page': page,
-                               'specialization': 1},
-                       headers=header)
-    res = res.json()
+    res = get_page(date_from, date_to, page)
 
-    if 'items' not in res:
+    if res is None or 'items' not in res:
         return None
     return list(map(transform_vac, res['items']))
 
 
 if __name__ == '__main__':
-    d = get_vacs_in_day(12, 21)
-    print(d)
-    print(len(d))
-    header = ['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at']
-    with open('hh.csv', 'w', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=header)
-        writer.writeheader()
-        for row in d:
-            writer.writerow(row)
+    mode = input('Выгрузить вакансии (пустая строка) или дополнить выгрузку подробностями (детали): ')
+    if mode == 'детали':
+        input_path = input('Путь до csv с выгрузкой: ')
+        failed = enrich(input_path, input('Куда сохранить csv с подробностями: '))
+        if failed:
+            print(f'Не удалось получить {len(failed)} вакансий: {", ".join(failed)}', file=sys.stderr)
+    else:
+        output = input('Куда сохранить вакансии (csv или бд .db, пустая строка - hh.csv): ') or 'hh.csv'
+        checkpoint = Checkpoint(output + '.checkpoint.json')
+        resume = os.path.exists(checkpoint.path) or os.path.exists(output + '.ids.db')
+        date_from = date.fromisoformat(input('Первый день выгрузки (YYYY-MM-DD): '))
+        date_to = input('Последний день выгрузки (YYYY-MM-DD) или пустая строка для одного дня: ')
+        date_to = date_from if date_to == '' else date.fromisoformat(date_to)
+        sink = SqliteSink(output, resume) if output.endswith('.db') else CsvSink(output, resume)
+        sink = DedupSink(sink, output + '.ids.db')
+        try:
+            crawl_range(date_from, date_to, sink, checkpoint)
+        finally:
+            sink.close()
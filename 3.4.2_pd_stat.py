@@ -2,10 +2,11 @@ import pandas as pd
 import os.path as pt
 import api.valutes as valutes
 import os.path as pth
-from matplotlib import pyplot as plt
+from charts import YearSeries, draw_charts
 from reportv2 import check_file
 from jinja2 import Environment, FileSystemLoader
 import pdfkit
+from pdf_writer import write_pdf
 
 # Получение имени csv, профессии, модуля wkhtml и их проверка ----------------------------------------------------------
 file_name = pt.relpath(input('Введите название файла: '))
@@ -15,34 +16,19 @@ prof_name = input('Введите название проффесии: ')
 wkhtml_path = input('Введите путь до wkghml.exe или пустую строку для стандартного пути: ')
 wkhtml_path = pth.abspath(
         r'C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe' if wkhtml_path == "" else wkhtml_path)
+chunk_size = input('Введите размер части в строках или пустую строку, чтобы читать файл целиком: ')
 # ----------------------------------------------------------------------------------------------------------------------
 
 # Проверка csv на формат данных ----------------------------------------------------------------------------------------
 header = ['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at']
-df = pd.read_csv(file_name)
-columns = df.columns.tolist()
-if len(header) != len(columns):
-    raise SyntaxError('Файл имеет неверный формат')
-for column in columns:
-    if column not in header:
+columns = pd.read_csv(file_name, nrows=0).columns.tolist()
+for column in header:
+    if column not in columns:
         raise SyntaxError('Файл имеет неверный формат')
 # ----------------------------------------------------------------------------------------------------------------------
 
-# Очистка пропущенных данных -------------------------------------------------------------------------------------------
-df = df.dropna(subset=['name', 'salary_currency', 'area_name', 'published_at']) \
-    .dropna(subset=['salary_from', 'salary_to'], how='all').reset_index(drop=True)
-# ----------------------------------------------------------------------------------------------------------------------
-
-# Выделение даты в формате yyyy-mm -------------------------------------------------------------------------------------
-df['date'] = df['published_at'].str[:7]
-# ----------------------------------------------------------------------------------------------------------------------
-
-# Получение курсов валют на каждую представленную дату -----------------------------------------------------------------
+# Курсы валют на каждую представленную дату, запрашиваются по мере появления дат в частях файла -----------------------
 currs = {}
-for date in df['date'].unique():
-    year = date[:4]
-    month = date[5:7]
-    currs[date] = valutes.get_valutes(month, year)
 # ----------------------------------------------------------------------------------------------------------------------
 
 def multiply_currency(row):
@@ -59,24 +45,59 @@ def multiply_currency(row):
     val = currs[row['date']][row['salary_currency']]
     return row['salary'] * val
 
-# Переводим поля с salary в единую колонку с суммой в рублях -----------------------------------------------------------
-df['salary'] = df[['salary_from', 'salary_to']].mean(axis=1)
-df['salary'] = df.apply(axis=1, func=multiply_currency)
-df = df[['name', 'salary', 'area_name', 'published_at', 'date']]
-# ----------------------------------------------------------------------------------------------------------------------
 
-# Отбираем вакансии по нужной профессии, группируем по годам и определяем средние зарплаты и количество вакансий за год
-df_prof = df[df['name'].str.contains(prof_name, case=False)].reset_index(drop=True)
-df_prof['date'] = df_prof['date'].str[:4]
-prof_data = df_prof[['salary', 'date']].groupby('date').agg(['mean', 'count'])['salary']
-prof_data['mean'] = prof_data['mean'].map(round)
+def prepare(df):
+    """
+    Очищает часть данных от пропусков и переводит зарплаты в рубли.
+    :param df: Часть csv с колонками из header
+    :return: DataFrame с колонками name, salary, year
+    """
+    df = df.dropna(subset=['name', 'salary_currency', 'area_name', 'published_at']) \
+        .dropna(subset=['salary_from', 'salary_to'], how='all')
+    df = df.assign(date=df['published_at'].str[:7], salary=df[['salary_from', 'salary_to']].mean(axis=1))
+    for date in df['date'].unique():
+        if date not in currs:
+            currs[date] = valutes.get_valutes(date[5:7], date[:4])
+    if len(df) != 0:
+        df['salary'] = df.apply(axis=1, func=multiply_currency)
+    return df.assign(year=df['date'].str[:4])[['name', 'salary', 'year']]
+
+
+def add_aggregate(total, df):
+    """
+    Прибавляет к накопленным суммам и количествам зарплат по годам суммы и количества по части данных.
+    :param total: DataFrame с колонками sum и count по годам
+    :param df: Подготовленная часть данных
+    :return: DataFrame с колонками sum и count по годам
+    """
+    return total.add(df.groupby('year')['salary'].agg(['sum', 'count']), fill_value=0)
+
+
+def finish_aggregate(total):
+    """
+    Переводит накопленные суммы и количества в средние зарплаты и количества вакансий.
+    :param total: DataFrame с колонками sum и count по годам
+    :return: DataFrame с колонками mean и count по годам
+    """
+    return pd.DataFrame({'mean': (total['sum'] / total['count']).map(round),
+                         'count': total['count'].astype(int)}).sort_index()
+
+
+# Читаем файл целиком или частями по chunk_size строк, только нужные колонки. Каждая часть сразу сворачивается в суммы и
+# количества зарплат по годам, поэтому память зависит от размера части, а не от размера файла --------------------------
+chunks = [pd.read_csv(file_name, usecols=header)] if chunk_size == '' else \
+    pd.read_csv(file_name, usecols=header, chunksize=int(chunk_size))
+total_data = pd.DataFrame(columns=['sum', 'count'], dtype=float)
+total_prof = pd.DataFrame(columns=['sum', 'count'], dtype=float)
+for chunk in chunks:
+    df = prepare(chunk)
+    total_data = add_aggregate(total_data, df)
+    total_prof = add_aggregate(total_prof, df[df['name'].str.contains(prof_name, case=False)])
 # ----------------------------------------------------------------------------------------------------------------------
 
-# Группируем все вакансии по годам и определяем средние зарплаты и количество вакансий за год --------------------------
-df_data = df.reset_index(drop=True)
-df_data['date'] = df_data['date'].str[:4]
-final_df_data = df_data[['salary', 'date']].groupby('date').agg(['mean', 'count'])['salary']
-final_df_data['mean'] = final_df_data['mean'].map(round)
+# Средние зарплаты и количество вакансий за год для всех вакансий и для нужной профессии -------------------------------
+final_df_data = finish_aggregate(total_data)
+prof_data = finish_aggregate(total_prof)
 # ----------------------------------------------------------------------------------------------------------------------
 
 # Заполнение данных для таблицы с профессией по годам, в которых вакансий с профессией не было
@@ -86,44 +107,18 @@ for year in final_df_data.index.tolist():
         prof_data.loc[year] = 0
 # ----------------------------------------------------------------------------------------------------------------------
 
-# Создание графиков и их сохранение как pnd ----------------------------------------------------------------------------
-fig, axs = plt.subplots(1, 2, layout='tight', figsize=[10, 5])
-ax = axs[0]
-ax.set_title('Уровень зарплат по годам', fontsize=20)
-y_pos = range(final_df_data.shape[0])
-years = final_df_data.index.tolist()
-_salary_by_year = list(final_df_data['mean'].tolist())
-prof_salary = list(prof_data['mean'].sort_index().tolist())
-overall = ax.bar(y_pos, _salary_by_year, width=0.3)
-prof = ax.bar(list(map(lambda x: x + 0.3, y_pos)), prof_salary, width=0.3)
-ax.set_xticks(list(map(lambda x: x + 0.15, y_pos)), labels=years, rotation="vertical", fontsize=8)
-for tick in ax.get_yticklabels():
-    tick.set_fontsize(8)
-ax.legend([overall, prof], [r'средняя з\п', r'з\п ' + prof_name], fontsize=8)
-ax.grid(axis='y')
-
-ax = axs[1]
-y_pos = range(final_df_data.shape[0])
-years = list(final_df_data.index.tolist())
-salary_by_year = list(final_df_data['count'].tolist())
-prof_salary = list(prof_data['count'].sort_index().tolist())
-overall = ax.bar(y_pos, salary_by_year, width=0.3)
-prof = ax.bar(list(map(lambda x: x + 0.3, y_pos)), prof_salary, width=0.3)
-ax.set_xticks(list(map(lambda x: x + 0.15, y_pos)), labels=years, rotation="vertical", fontsize=8)
-for tick in ax.get_yticklabels():
-    tick.set_fontsize(8)
-ax.legend([overall, prof], ['Количество вакансий', 'Количество ваканисий\n' + prof_name], fontsize=8)
-ax.set_title('Количество вакансий по годам', fontsize=20)
-ax.grid(axis='y')
-
+# Создание графиков и их сохранение как png ----------------------------------------------------------------------------
 save_path = pth.relpath(pth.join('report', 'year_graph.png'))
 if check_file('png', save_path):
-    plt.savefig(save_path)
+    years_data = YearSeries(final_df_data.index.tolist(), final_df_data['mean'].tolist(),
+                            final_df_data['count'].tolist())
+    draw_charts(years_data, [(prof_name, prof_data['mean'].sort_index().tolist(),
+                              prof_data['count'].sort_index().tolist())], 'report', {prof_name: save_path})
 # ----------------------------------------------------------------------------------------------------------------------
 
 # Создание pdf с графиками и таблицей ----------------------------------------------------------------------------------
 env = Environment(loader=FileSystemLoader('.'))
-template = env.get_template('template/template_lite.html')
+template = env.get_template('template/template_years.html')
 
 years_df = final_df_data
 years_df['year'] = final_df_data.index
@@ -134,16 +129,22 @@ years_table = years_df.to_numpy().tolist()
 years_table_header = ['Год', 'Средняя зарплата', f'Средняя зарплата - {prof_name}', 'Количество вакансий',
                f'Количество вакансий - {prof_name}']
 
-pdf_template = template.render({
-    'first_table': years_table,
-    'first_table_header': years_table_header,
-    'prof_name': prof_name,
-    'to_css': pth.abspath(pth.join('template', 'style.css')),
-    'to_img': pth.abspath(pth.join('report', 'year_graph.png'))
-})
-config = pdfkit.configuration(wkhtmltopdf=wkhtml_path)
 save_path = pth.normpath(pth.join('report', 'year_report.pdf'))
-if check_file('pdf', save_path):
-    pdfkit.from_string(pdf_template, save_path, configuration=config,
-                       options={"enable-local-file-access": ""})
+if not pth.exists(wkhtml_path):
+    # wkhtmltopdf не установлен, pdf рисуется средствами matplotlib
+    if check_file('pdf', save_path):
+        write_pdf(save_path, f'Аналитика по зарплатам и городам для профессии {prof_name}',
+                  pth.join('report', 'year_graph.png'), [('Статистика по годам', years_table_header, years_table)])
+else:
+    pdf_template = template.render({
+        'first_table': years_table,
+        'first_table_header': years_table_header,
+        'prof_name': prof_name,
+        'to_css': pth.abspath(pth.join('template', 'style.css')),
+        'to_img': pth.abspath(pth.join('report', 'year_graph.png'))
+    })
+    config = pdfkit.configuration(wkhtmltopdf=wkhtml_path)
+    if check_file('pdf', save_path):
+        pdfkit.from_string(pdf_template, save_path, configuration=config,
+                           options={"enable-local-file-access": ""})
 # ----------------------------------------------------------------------------------------------------------------------
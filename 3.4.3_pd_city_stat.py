@@ -1,50 +1,37 @@
 import pandas as pd
 import api.valutes as valutes
+import os
 import os.path as pth
 from matplotlib import pyplot as plt
 import re
 from reportv2 import check_file
 from jinja2 import Environment, FileSystemLoader
 import pdfkit
+from pdf_writer import write_pdf
 import concurrent.futures as cf
 
-# Получение имени csv, профессии, модуля wkhtml и их проверка ----------------------------------------------------------
+# Получение имени csv, профессий, регионов, модуля wkhtml и их проверка ------------------------------------------------
 file_name = pth.relpath(input('Введите название файла: '))
 if not pth.exists(file_name):
     raise FileExistsError(f'Файла {file_name} не существует')
-prof_name = input('Введите название проффесии: ')
-region_name = input('Введите название региона: ')
+prof_names = list(dict.fromkeys(input('Введите название проффесии или несколько через ", ": ').split(', ')))
+region_names = list(dict.fromkeys(input('Введите название региона или несколько через ", ": ').split(', ')))
 wkhtml_path = input('Введите путь до wkghml.exe или пустую строку для стандартного пути: ')
 wkhtml_path = pth.abspath(
     r'C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe' if wkhtml_path == "" else wkhtml_path)
+chunk_size = input('Введите размер части в строках или пустую строку, чтобы читать файл целиком: ')
 # ----------------------------------------------------------------------------------------------------------------------
 
 # Проверка csv на формат данных ----------------------------------------------------------------------------------------
 header = ['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at']
-df = pd.read_csv(file_name)
-columns = df.columns.tolist()
-if len(header) != len(columns):
-    raise SyntaxError('Файл имеет неверный формат')
-for column in columns:
-    if column not in header:
+columns = pd.read_csv(file_name, nrows=0).columns.tolist()
+for column in header:
+    if column not in columns:
         raise SyntaxError('Файл имеет неверный формат')
 # ----------------------------------------------------------------------------------------------------------------------
 
-# Очистка пропущенных данных -------------------------------------------------------------------------------------------
-df = df.dropna(subset=['name', 'salary_currency', 'area_name', 'published_at']) \
-    .dropna(subset=['salary_from', 'salary_to'], how='all').reset_index(drop=True)
-# ----------------------------------------------------------------------------------------------------------------------
-
-# Выделение даты в формате yyyy-mm -------------------------------------------------------------------------------------
-df['date'] = df['published_at'].str[:7]
-# ----------------------------------------------------------------------------------------------------------------------
-
-# Получение курсов валют на каждую представленную дату -----------------------------------------------------------------
+# Курсы валют на каждую представленную дату, запрашиваются по мере появления дат в частях файла -----------------------
 currs = {}
-for date in df['date'].unique():
-    year = date[:4]
-    month = date[5:7]
-    currs[date] = valutes.get_valutes(month, year)
 # ----------------------------------------------------------------------------------------------------------------------
 
 def multiply_currency(row):
@@ -62,28 +49,127 @@ def multiply_currency(row):
     return row['salary'] * val
 
 
-# Переводим поля с salary в единую колонку с суммой в рублях -----------------------------------------------------------
-df['salary'] = df[['salary_from', 'salary_to']].mean(axis=1)
-df['salary'] = df.apply(axis=1, func=multiply_currency)
-df = df[['name', 'salary', 'area_name', 'published_at', 'date']]
-# ----------------------------------------------------------------------------------------------------------------------
+def prepare(df):
+    """
+    Очищает часть данных от пропусков и переводит зарплаты в рубли.
+    :param df: Часть csv с колонками из header
+    :return: DataFrame с колонками name, salary, area_name, year
+    """
+    df = df.dropna(subset=['name', 'salary_currency', 'area_name', 'published_at']) \
+        .dropna(subset=['salary_from', 'salary_to'], how='all')
+    df = df.assign(date=df['published_at'].str[:7], salary=df[['salary_from', 'salary_to']].mean(axis=1))
+    for date in df['date'].unique():
+        if date not in currs:
+            currs[date] = valutes.get_valutes(date[5:7], date[:4])
+    if len(df) != 0:
+        df['salary'] = df.apply(axis=1, func=multiply_currency)
+    return df.assign(year=df['date'].str[:4])[['name', 'salary', 'area_name', 'year']]
+
+
+def add_pair_aggregate(total, df):
+    """
+    Прибавляет к накопленным суммам и количествам зарплат по региону, профессии и году суммы и количества по части
+    данных для всех пар из region_names и prof_names сразу. Часть сначала сворачивается по названию вакансии, городу
+    и году, затем подстроки профессий и регионов ищутся только среди уникальных названий и городов, а пары
+    получаются соединением с этими соответствиями и одной группировкой.
+    :param total: DataFrame с индексом (region, prof, year) и колонками sum и count
+    :param df: Подготовленная часть данных
+    :return: DataFrame с индексом (region, prof, year) и колонками sum и count
+    """
+    grouped = df.groupby(['name', 'area_name', 'year'])['salary'].agg(['sum', 'count']).reset_index()
+    names = pd.Series(grouped['name'].unique(), dtype=object)
+    areas = pd.Series(grouped['area_name'].unique(), dtype=object)
+    profs = pd.concat([pd.DataFrame({'name': names[names.str.contains(prof)], 'prof': prof})
+                       for prof in prof_names])
+    regions = pd.concat([pd.DataFrame({'area_name': areas[areas.str.contains(region)], 'region': region})
+                         for region in region_names])
+    pairs = grouped.merge(profs, on='name').merge(regions, on='area_name')
+    return total.add(pairs.groupby(['region', 'prof', 'year'])[['sum', 'count']].sum(), fill_value=0)
+
+
+def year_table(region_name, prof_name):
+    """
+    Считает среднюю з\\п и количество вакансий по годам для пары региона и профессии. Годы без вакансий заполняются
+    нулями.
+    :param region_name: Регион из region_names
+    :param prof_name: Профессия из prof_names
+    :return: Список строк [год, средняя з\\п, количество вакансий]
+    """
+    table = {year: [year, 0, 0] for year in sorted(years)}
+    if (region_name, prof_name) in pair_index:
+        total = total_pairs.loc[(region_name, prof_name)]
+        for year, row in total.iterrows():
+            table[year] = [year, round(row['sum'] / row['count']), int(row['count'])]
+    return list(table.values())
+
 
-# Отбор вакансий с подходящими prof_name и region_name, подсчет средней з\п и количества за года -----------------------
-df_prof_area = df[df.name.str.contains(prof_name) & df.area_name.str.contains(region_name)].reset_index(
-    drop=True)
-df_prof_area['year'] = df_prof_area['date'].str[:4]
-df_prof_area = df_prof_area[['salary', 'year']]
-prof_area = df_prof_area.groupby('year').agg(['mean', 'count'])['salary']
-prof_area['mean'] = prof_area['mean'].map(round)
-for year in df['date'].str[:4].unique():
-    if year not in prof_area.index:
-        prof_area.loc[year] = 0
-prof_area = prof_area.sort_index()
+def render_pdf(save_path, region_name, prof_name, years_table):
+    """
+    Создает pdf отчета для пары региона и профессии с общими графиками и таблицами по городам.
+    :param save_path: Путь к pdf
+    :param region_name: Регион
+    :param prof_name: Профессия
+    :param years_table: Строки таблицы по годам
+    """
+    if not check_file('pdf', save_path):
+        return
+    if not pth.exists(wkhtml_path):
+        # wkhtmltopdf не установлен, pdf рисуется средствами matplotlib
+        write_pdf(save_path, f'Аналитика по зарплатам и городам для профессии {prof_name} в регионе {region_name}',
+                  pth.join('report', 'city_graph.png'),
+                  [('Статистика по годам', years_table_header, years_table),
+                   ('Уровень зарплат по городам', city_salary_header, city_salary_table),
+                   ('Доля вакансий по городам', city_count_header, city_count_table)])
+        return
+    pdf_template = template.render({
+        'first_table': years_table,
+        'first_table_header': years_table_header,
+        'second_table': city_salary_table,
+        'second_table_header': city_salary_header,
+        'third_table': city_count_table,
+        'third_table_header': city_count_header,
+        'prof_name': prof_name,
+        'area_name': region_name,
+        'to_css': pth.abspath(pth.join('template', 'style.css')),
+        'to_img': pth.abspath(pth.join('report', 'city_graph.png'))
+    })
+    config = pdfkit.configuration(wkhtmltopdf=wkhtml_path)
+    pdfkit.from_string(pdf_template, save_path, configuration=config, options={"enable-local-file-access": ""})
+
+
+def add_aggregate(total, df, by):
+    """
+    Прибавляет к накопленным суммам и количествам зарплат суммы и количества по части данных.
+    :param total: DataFrame с колонками sum и count
+    :param df: Подготовленная часть данных
+    :param by: Колонка для группировки
+    :return: DataFrame с колонками sum и count
+    """
+    return total.add(df.groupby(by)['salary'].agg(['sum', 'count']), fill_value=0)
+
+
+# Читаем файл целиком или частями по chunk_size строк, только нужные колонки. Каждая часть один раз переводится в рубли
+# и сразу сворачивается в суммы и количества зарплат по годам для всех пар регионов и профессий и по городам, поэтому
+# память зависит от размера части, а не от размера файла, а время почти не зависит от количества пар ------------------
+chunks = [pd.read_csv(file_name, usecols=header)] if chunk_size == '' else \
+    pd.read_csv(file_name, usecols=header, chunksize=int(chunk_size))
+total_pairs = pd.DataFrame(columns=['sum', 'count'], dtype=float,
+                           index=pd.MultiIndex.from_tuples([], names=['region', 'prof', 'year']))
+total_area = pd.DataFrame(columns=['sum', 'count'], dtype=float)
+years = set()
+for chunk in chunks:
+    df = prepare(chunk)
+    years.update(df['year'].unique())
+    total_pairs = add_pair_aggregate(total_pairs, df)
+    total_area = add_aggregate(total_area, df, 'area_name')
+total_pairs = total_pairs[total_pairs['count'] > 0].sort_index()
+pair_index = set(total_pairs.index.droplevel('year'))
 # ----------------------------------------------------------------------------------------------------------------------
 
 # Подсчет средней з\п и количества вакансий по городам, составление топ10 городов --------------------------------------
-df_area = df[['salary', 'area_name']].groupby('area_name').agg(['mean', 'count'])['salary'].dropna()
-df_area['mean'] = df_area['mean'].map(round)
+total_area = total_area[total_area['count'] > 0]
+df_area = pd.DataFrame({'mean': (total_area['sum'] / total_area['count']).map(round),
+                        'count': total_area['count'].astype(int)})
 count_sum = df_area['count'].sum()
 df_area['count'] = df_area['count'] / count_sum
 df_area = df_area[df_area['count'] > 0.01]
@@ -126,38 +212,24 @@ if check_file('png', save_path):
 env = Environment(loader=FileSystemLoader('.'))
 template = env.get_template('template/template_city.html')
 
-area_prof_table = prof_area
-area_prof_table['year'] = prof_area.index
-area_prof_table = area_prof_table[['year', 'mean', 'count']]
-
-area_salary_table = top_salary
-area_salary_table['area'] = top_salary.index
-area_salary_table = area_salary_table[['area', 'mean']]
-
-area_count_table = top_count
-area_count_table['area'] = top_count.index
-area_count_table['count'] = area_count_table['count'].map(lambda x:"{:.2f}%".format(x * 100).replace('.', ','))
-area_count_table = area_count_table[['area', 'count']]
+city_salary_table = [[city, salary] for city, salary in top_salary['mean'].items()]
+city_count_table = [[city, "{:.2f}%".format(count * 100).replace('.', ',')]
+                    for city, count in top_count['count'].items()]
 
 years_table_header = ['Год', 'Средняя зарплата', 'Количество вакансий']
 city_salary_header = ['Город', 'Уровень зарплат']
 city_count_header = ['Город', 'Доля вакансий']
 
-pdf_template = template.render({
-    'first_table': area_prof_table.to_numpy().tolist(),
-    'first_table_header': years_table_header,
-    'second_table': area_salary_table.to_numpy().tolist(),
-    'second_table_header': city_salary_header,
-    'third_table': area_count_table.to_numpy().tolist(),
-    'third_table_header': city_count_header,
-    'prof_name': prof_name,
-    'area_name': region_name,
-    'to_css': pth.abspath(pth.join('template', 'style.css')),
-    'to_img': pth.abspath(pth.join('report', 'city_graph.png'))
-})
-config = pdfkit.configuration(wkhtmltopdf=wkhtml_path)
-save_path = pth.normpath(pth.join('report', 'city_report.pdf'))
-if check_file('pdf', save_path):
-    pdfkit.from_string(pdf_template, save_path, configuration=config,
-                       options={"enable-local-file-access": ""})
+# Графики по городам общие для всех пар, поэтому рисуются один раз, а для каждой пары создается только pdf. Одна пара
+# сохраняется в report/city_report.pdf, несколько - в папку report/city_reports
+if len(region_names) == 1 and len(prof_names) == 1:
+    render_pdf(pth.normpath(pth.join('report', 'city_report.pdf')), region_names[0], prof_names[0],
+               year_table(region_names[0], prof_names[0]))
+else:
+    os.makedirs(pth.join('report', 'city_reports'), exist_ok=True)
+    for region_name in region_names:
+        for prof_name in prof_names:
+            file = re.sub(r'[\\/:*?"<>|]', '_', f'{region_name} - {prof_name}') + '.pdf'
+            render_pdf(pth.normpath(pth.join('report', 'city_reports', file)), region_name, prof_name,
+                       year_table(region_name, prof_name))
 # ----------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from typing import Dict
+
+import requests
+import requests.adapters
+
+base_URI = "https://api.hh.ru/"
+header = {'User-Agent': 'URFU_my_app'}
+cache_dir = '.hh_cache'
+# Статусы, при которых запрос стоит повторить: ограничение частоты и ошибки сервера
+retry_statuses = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Ограничитель частоты запросов по алгоритму token bucket. Общий для всех потоков процесса.
+
+    Attributes:
+        rate (float): Сколько токенов добавляется в секунду
+        capacity (int): Сколько запросов можно сделать подряд без ожидания
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.__tokens = float(capacity)
+        self.__updated = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Забирает один токен, при необходимости ждет, пока он появится"""
+        while True:
+            with self.__lock:
+                now = time.monotonic()
+                self.__tokens = min(self.capacity, self.__tokens + (now - self.__updated) * self.rate)
+                self.__updated = now
+                if self.__tokens >= 1:
+                    self.__tokens -= 1
+                    return
+                wait = (1 - self.__tokens) / self.rate
+            time.sleep(wait)
+
+
+class Client:
+    """Клиент api hh с ограничением частоты, повторами с экспоненциальной задержкой и кэшем ответов на диске.
+    Закэшированный ответ перепроверяется условным запросом (If-None-Match / If-Modified-Since), и при 304
+    тело берется из кэша. Любая неудача, в том числе 429/5xx и сетевые ошибки после всех повторов, возвращается
+    как None, а не исключением, поэтому вызывающему коду достаточно одной проверки.
+
+    Attributes:
+        limiter (TokenBucket): Ограничитель частоты запросов
+        retries (int): Сколько раз повторять запрос при 429/5xx и сетевых ошибках
+        backoff (float): Базовая задержка перед повтором в секундах
+        max_backoff (float): Максимальная задержка перед повтором в секундах
+        cache_dir (str or None): Папка кэша или None, если кэш не нужен
+    """
+
+    def __init__(self, rate: float = 5, capacity: int = 5, retries: int = 6, backoff: float = 0.5,
+                 max_backoff: float = 30, cache_dir: str or None = cache_dir, pool_size: int = 10):
+        """
+        :param pool_size: Сколько соединений с сервером держать открытыми для параллельных потоков
+        """
+        self.limiter = TokenBucket(rate, capacity)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.cache_dir = cache_dir
+        self.__session = requests.Session()
+        self.__session.mount('https://', requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self.__session.mount('http://', requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def get(self, path: str, params: Dict = None, revalidate: bool = True) -> Dict or None:
+        """Делает GET запрос к api hh
+
+        :param path: Путь относительно base_URI, например 'vacancies'
+        :param params: Параметры запроса
+        :param revalidate: Перепроверять ли закэшированный ответ. Если нет, он возвращается без запроса
+        :return: Ответ в виде словаря или None, если сервер ответил ошибкой или был недоступен и после повторов
+        """
+        cache_path = self.__cache_path(path, params)
+        cached = self.__read_cache(cache_path)
+        if cached is not None and not revalidate:
+            return cached['body']
+        headers = dict(header)
+        if cached is not None:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        try:
+            res = self.__request(base_URI + path, params, headers)
+        except (requests.ConnectionError, requests.Timeout):
+            return None
+        if res.status_code == 304 and cached is not None:
+            return cached['body']
+        if not res.ok:
+            return None
+        body = res.json()
+        self.__write_cache(cache_path, res, body)
+        return body
+
+    def __request(self, url: str, params: Dict, headers: Dict) -> requests.Response:
+        """Делает запрос, повторяя его с экспоненциальной задержкой со случайным разбросом при 429/5xx и
+        сетевых ошибках. Для 429 учитывается заголовок Retry-After
+
+        :return: Последний полученный ответ. Сетевая ошибка последней попытки выбрасывается
+        """
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+            try:
+                res = self.__session.get(url, params=params, headers=headers, timeout=30)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.__delay(attempt))
+                continue
+            if res.status_code not in retry_statuses or attempt == self.retries:
+                return res
+            retry_after = res.headers.get('Retry-After')
+            delay = self.__delay(attempt)
+            if retry_after is not None and retry_after.isdigit():
+                delay = max(delay, int(retry_after))
+            time.sleep(delay)
+
+    def __delay(self, attempt: int) -> float:
+        """Задержка перед повтором: случайная величина от 0 до backoff * 2^attempt, но не больше max_backoff"""
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def __cache_path(self, path: str, params: Dict) -> str or None:
+        if self.cache_dir is None:
+            return None
+        key = json.dumps([path, sorted((params or {}).items())], ensure_ascii=False, default=str)
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    @staticmethod
+    def __read_cache(cache_path: str or None) -> Dict or None:
+        if cache_path is None or not os.path.exists(cache_path):
+            return None
+        with open(cache_path, encoding='utf-8') as file:
+            return json.load(file)
+
+    @staticmethod
+    def __write_cache(cache_path: str or None, res: requests.Response, body: Dict) -> None:
+        """Сохраняет ответ в кэш вместе с ETag и Last-Modified. Запись атомарная: через временный файл и
+        os.replace"""
+        if cache_path is None:
+            return
+        etag = res.headers.get('ETag')
+        last_modified = res.headers.get('Last-Modified')
+        tmp_path = f'{cache_path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({'etag': etag, 'last_modified': last_modified, 'body': body}, file, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
@@ -1,71 +1,77 @@
 import multiprocessing
 import os
+import time
 from functools import partial, reduce
-from typing import Dict
-from cProfile import Profile
-from pstats import Stats
-from main import DataSet
+from metrics import Metrics
+from scheduler import collect_task, plan_tasks, print_timings
+from stats import Statistics
 from reportv2 import Report
-from multiprocessing import Pool, Process, Manager
-prof = Profile()
-prof.disable()
+from timeseries import TimeSeriesStore
+from multiprocessing import Pool
 
-def do_work(file_name, prof_name):
-    reader = DataSet(_to_show='Статистика')
-    salary_by_city_to_print, vacancies_by_city_to_print, salary_by_year, vacancies_by_year, \
-    profs_salary_by_year, professions_by_year, prof_name = reader.read_csv(file_name=file_name,
-                                                                                        prof_name=prof_name)
-    rep = Report(salary_by_year, vacancies_by_year, profs_salary_by_year, professions_by_year, prof_name)
-    header, rows = rep.generate_years_table()
-    return {'header': header, 'rows': rows[0], 'salary': salary_by_year, 'vacs': vacancies_by_year,
-            'profs_salary': profs_salary_by_year, 'profs_vacs': professions_by_year}
 
-
-def merge_dicts(origin: Dict, dicts, by: str):
-    for dict in dicts:
-        origin.update(dict[by].items())
+def do_work(task, prof_name, top_cities, quantiles, distinct):
+    return collect_task(task, prof_name, top_cities, quantiles, distinct)
 
 
 if __name__ == "__main__":
-    prof.enable()
     files = []
-    prof.disable()
     csvs_dir = input('Путь до папки с csv: ')
     prof_name = input('Профессия: ')
-    prof.enable()
-    reader = partial(do_work, prof_name=prof_name)
+    top_cities = input('Сколько городов отслеживать или пустую строку, чтобы считать все города точно: ')
+    top_cities = int(top_cities) if top_cities != '' else None
+    quantiles = input('Считать медиану, p90 и p99 зарплат (да) или пустую строку, чтобы не считать: ') == 'да'
+    distinct = input('Считать количество различных компаний и названий вакансий (да) или пустую строку, '
+                     'чтобы не считать: ') == 'да'
+    timeseries_path = input('Путь до базы месячных рядов или пустую строку, чтобы их не сохранять: ')
+    metrics_path = input('Путь до json с метриками или пустую строку, чтобы только напечатать их: ')
+    reader = partial(do_work, prof_name=prof_name, top_cities=top_cities, quantiles=quantiles,
+                     distinct=distinct)
     for file in os.listdir(os.path.join('.', csvs_dir)):
-        files.append(os.path.join('.', 'csvs', file))
-    p = Pool(multiprocessing.cpu_count() * 3)
-    prof.disable()
+        files.append(os.path.join('.', csvs_dir, file))
+    workers = multiprocessing.cpu_count()
+    p = Pool(workers)
     wkhtml_path = input('Введите путь до wkghml.exe или пустую строку для стандартного пути: ')
-    prof.enable()
     wkhtml_path = os.path.abspath(
         r'C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe' if wkhtml_path == "" else wkhtml_path)
-    output = p.map(reader, files)
-    header = output[0]['header']
-    rows = sorted(map(lambda data: data['rows'], output), key=lambda row: row[0])
-    salary_by_year = {}
-    merge_dicts(salary_by_year, output, 'salary')
-    vacs_by_year = {}
-    prof_salary_by_year = {}
-    prof_vacs_by_year = {}
-    merge_dicts(vacs_by_year, output, 'vacs')
-    merge_dicts(prof_vacs_by_year, output, 'profs_vacs')
-    merge_dicts(prof_salary_by_year, output, 'profs_salary')
+    metrics = Metrics()
+    started = time.perf_counter()
+    # chunksize=1, чтобы задачи раздавались по одной от больших к меньшим, а не пачками
+    output = list(p.imap_unordered(reader, plan_tasks(files, workers), chunksize=1))
+    print_timings([timing for statistics, timing in output], time.perf_counter() - started)
+    reduce(Metrics.merge, [timing.metrics for statistics, timing in output], metrics)
+    with metrics.stage('reduce'):
+        statistics = reduce(Statistics.merge, [statistics for statistics, timing in output],
+                            Statistics(prof_name, top_cities=top_cities, quantiles=quantiles,
+                                       distinct=distinct))
     output = []
-    rows.sort(key=lambda row: row[0])
-    rep = Report({}, {}, {}, {}, prof_name)
-    rep.generate_excel(header, rows)
-    rep.generate_image(count_by_year=vacs_by_year, prof_count_by_year=prof_vacs_by_year, salary_by_year=salary_by_year,
-                       prof_salary_by_year=prof_salary_by_year)
-
-    rep.generate_pdf(wkhtml_path=wkhtml_path, years_table_header=header, years_table=rows)
+    if timeseries_path != '':
+        store = TimeSeriesStore(timeseries_path)
+        store.put_statistics(statistics)
+        store.close()
+        print(f'Месячные ряды сохранены в {store.path}')
+    header, rows = statistics.years_table()
+    salary_by_city, vacancies_by_city = statistics.cities()
+    print('Уровень зарплат по городам (в порядке убывания):', salary_by_city)
+    print('Доля вакансий по городам (в порядке убывания):', vacancies_by_city)
+    if quantiles:
+        print('Медиана, p90 и p99 зарплат по годам:', statistics.salary_quantiles_by_year())
+        print('Медиана, p90 и p99 зарплат по годам для выбранной профессии:',
+              statistics.prof_salary_quantiles_by_year())
+        print('Медиана, p90 и p99 зарплат по городам:', statistics.salary_quantiles_by_city(list(salary_by_city)))
+    if distinct:
+        print('Различных компаний и названий вакансий по годам:', statistics.distinct_by_year_counts())
+        print('Различных компаний и названий вакансий по городам:',
+              statistics.distinct_by_city_counts(list(vacancies_by_city)))
+    with metrics.stage('render'):
+        rep = Report({}, {}, {}, {}, prof_name)
+        rep.generate_all(header, rows, salary_by_year=statistics.salary_by_year(),
+                         prof_salary_by_year=statistics.prof_salary_by_year(),
+                         count_by_year=statistics.vacancies_by_year(),
+                         prof_count_by_year=statistics.prof_vacancies_by_year(),
+                         wkhtml_path=wkhtml_path, executor=p)
     p.close()
-    prof.disable()
 
-    prof.dump_stats('async.stats')
-    with open('async_output.txt', 'wt') as _output:
-        stats = Stats('async.stats', stream=_output)
-        stats.sort_stats('cumulative', 'time')
-        stats.print_stats()
\ No newline at end of file
+    metrics.print()
+    if metrics_path != '':
+        metrics.to_json(metrics_path)
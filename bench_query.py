@@ -0,0 +1,111 @@
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from main import DataSet, Utils
+from query_server import HOST
+
+PORT = 8766
+CLIENTS = 8
+REQUESTS = 50
+# Запросы в том же виде, что вводятся в режиме 'Вакансии' main.py
+QUERIES = [
+    {'filter': '', 'sort': 'Оклад', 'reverse': 'Да', 'rows': '1 20', 'fields': 'Название, Оклад, Название региона'},
+    {'filter': 'Название региона: Москва', 'sort': 'Дата публикации вакансии', 'reverse': 'Нет', 'rows': '1 50',
+     'fields': ''},
+    {'filter': 'Оклад: 100000', 'sort': 'Название', 'reverse': '', 'rows': '10 30', 'fields': 'Название, Оклад'},
+    {'filter': 'Навыки: Git', 'sort': '', 'reverse': '', 'rows': '1 20', 'fields': 'Название, Навыки'},
+]
+
+
+def run_cli(file_name: str, query: dict) -> float:
+    """Время одного запроса так, как его выполняет main.py: чтение и разбор csv, фильтр, сортировка и строки
+    таблицы, в миллисекундах"""
+    started = time.perf_counter()
+    dataset = DataSet('Вакансии')
+    vacancies = list(dataset.iter_csv(file_name))
+    (filter_name, filter_value, sort_query, sort_reverse,
+     start, end, fields, err_msg) = dataset.parse_inputs(query['filter'], query['sort'], query['reverse'],
+                                                         query['rows'], query['fields'])
+    if filter_name != '':
+        vacancies = [vacancy for vacancy in vacancies if Utils.filter(filter_name)(filter_value, vacancy)]
+    if sort_query != '':
+        vacancies = sorted(vacancies, key=Utils.sort(sort_query), reverse=sort_reverse)
+    for number, vacancy in enumerate(vacancies[start:end], start + 1):
+        dataset.table_row(number, vacancy)
+    return (time.perf_counter() - started) * 1000
+
+
+async def client(queries: list, latencies: list) -> None:
+    """Отправляет запросы по одному соединению с keep-alive и записывает задержки в миллисекундах"""
+    reader, writer = await asyncio.open_connection(HOST, PORT)
+    for query in queries:
+        body = json.dumps(query, ensure_ascii=False).encode('utf-8')
+        started = time.perf_counter()
+        writer.write(f'POST /query HTTP/1.1\r\nHost: {HOST}\r\nContent-Type: application/json\r\n'
+                     f'Content-Length: {len(body)}\r\n\r\n'.encode('latin-1') + body)
+        await writer.drain()
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line == b'\r\n':
+                break
+            if line.lower().startswith(b'content-length:'):
+                length = int(line.split(b':')[1])
+        await reader.readexactly(length)
+        latencies.append((time.perf_counter() - started) * 1000)
+    writer.close()
+
+
+async def run_clients() -> (list, float):
+    """Запускает CLIENTS клиентов одновременно, каждый отправляет REQUESTS запросов"""
+    latencies = []
+    started = time.perf_counter()
+    await asyncio.gather(*(client([QUERIES[(i + j) % len(QUERIES)] for j in range(REQUESTS)], latencies)
+                           for i in range(CLIENTS)))
+    return latencies, time.perf_counter() - started
+
+
+async def wait_server(process: subprocess.Popen) -> None:
+    """Ждет, пока сервис загрузит файл и начнет принимать соединения"""
+    while True:
+        if process.poll() is not None:
+            raise RuntimeError('Сервис завершился при запуске')
+        try:
+            reader, writer = await asyncio.open_connection(HOST, PORT)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+
+
+def percentile(values: list, fraction: float) -> float:
+    return sorted(values)[min(len(values) - 1, int(len(values) * fraction))]
+
+
+if __name__ == '__main__':
+    file_name = os.path.abspath(input('Путь до csv с вакансиями (со всеми столбцами): '))
+    cli = [run_cli(file_name, query) for query in QUERIES]
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                            'query_server.py')],
+                              stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, text=True)
+    server.stdin.write(f'{file_name}\n{PORT}\n')
+    server.stdin.close()
+    try:
+        asyncio.run(wait_server(server))
+        load = time.perf_counter() - started
+        asyncio.run(run_clients())
+        latencies, wall = asyncio.run(run_clients())
+    finally:
+        server.terminate()
+        server.wait()
+    print(f'main.py, один запрос: медиана {statistics.median(cli):.1f} мс (чтение и разбор csv на каждый запрос)')
+    print(f'Сервис: загрузка {load:.2f} с, {CLIENTS} клиентов по {REQUESTS} запросов, '
+          f'{len(latencies) / wall:.0f} запросов/с')
+    print(f'Задержка: p50 {percentile(latencies, 0.5):.2f} мс, p90 {percentile(latencies, 0.9):.2f} мс, '
+          f'p99 {percentile(latencies, 0.99):.2f} мс')
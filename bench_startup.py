@@ -0,0 +1,60 @@
+import os
+import statistics
+import subprocess
+import sys
+
+# Каждый сценарий запускается в новом интерпретаторе и печатает два числа: время импортов и время до первого
+# результата от начала импортов. Общее время процесса с запуском интерпретатора меряется снаружи
+SCENARIOS = {
+    'CLI (main.py): первая вакансия': '''
+import time
+started = time.perf_counter()
+from main import DataSet
+imported = time.perf_counter()
+next(DataSet('Статистика').iter_csv(FILE_NAME))
+print(imported - started, time.perf_counter() - started)
+''',
+    'Воркер (scheduler.py): статистика по задаче': '''
+import time
+started = time.perf_counter()
+from scheduler import collect_task, plan_tasks
+imported = time.perf_counter()
+collect_task(plan_tasks([FILE_NAME], 1)[-1], 'Программист')
+print(imported - started, time.perf_counter() - started)
+''',
+    'Отчет (reportv2.py): таблица без графиков': '''
+import time
+started = time.perf_counter()
+from reportv2 import Report
+imported = time.perf_counter()
+Report({2022: 1}, {2022: 1}, {2022: 1}, {2022: 1}, 'Программист').generate_years_table()
+print(imported - started, time.perf_counter() - started)
+''',
+}
+RUNS = 5
+
+
+def run_scenario(code: str, file_name: str) -> (float, float, float):
+    """Запускает сценарий RUNS раз и возвращает медианы времени импортов, времени до первого результата и
+    времени всего процесса в миллисекундах"""
+    imports, firsts, totals = [], [], []
+    for _ in range(RUNS):
+        started = os.times().elapsed
+        out = subprocess.run([sys.executable, '-c', f'FILE_NAME = {file_name!r}\n{code}'], capture_output=True,
+                             text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+        totals.append(os.times().elapsed - started)
+        imported, first = map(float, out.split())
+        imports.append(imported)
+        firsts.append(first)
+    return tuple(statistics.median(values) * 1000 for values in (imports, firsts, totals))
+
+
+if __name__ == '__main__':
+    file_name = os.path.abspath(input('Путь до csv с вакансиями: '))
+    lines = [f'{"Сценарий":45} {"импорт, мс":>12} {"первый результат, мс":>22} {"процесс, мс":>12}']
+    for name, code in SCENARIOS.items():
+        imported, first, total = run_scenario(code, file_name)
+        lines.append(f'{name:45} {imported:12.1f} {first:22.1f} {total:12.1f}')
+    print('\n'.join(lines))
+    with open('bench_output.txt', 'w', encoding='utf-8') as output:
+        output.write('\n'.join(lines) + '\n')
@@ -0,0 +1,108 @@
+import multiprocessing
+import os
+import re
+from typing import Dict, List, NamedTuple, Tuple
+
+from stats import MultiStatistics
+
+
+class YearSeries(NamedTuple):
+    """Данные по годам для всех вакансий, общие для графиков всех профессий.
+
+        Attributes:
+            years (List[int]): Годы
+            salary (List[int]): Средняя з\\п по годам
+            count (List[int]): Количество вакансий по годам
+    """
+    years: List[int]
+    salary: List[int]
+    count: List[int]
+
+
+def render_profession_charts(statistics: MultiStatistics, out_dir: str,
+                             processes: int = 1) -> Dict[str, str]:
+    """Рисует графики з\\п и количества вакансий по годам для каждой профессии из одной агрегированной таблицы.
+    Фигура строится один раз на процесс: общие столбцы, подписи и оси остаются, а для каждой профессии меняются
+    только высоты ее столбцов и подпись в легенде.
+
+        Args:
+            statistics (MultiStatistics): Статистика по всем профессиям
+            out_dir (str): Папка для изображений, создается при необходимости
+            processes (int): Количество процессов. Профессии делятся между ними поровну
+
+        Returns:
+            Dict[str, str]: Путь к изображению по профессии
+    """
+    if len(statistics.prof_names) == 0:
+        return {}
+    years = sorted(statistics.by_year)
+    data = YearSeries(years, [int(statistics.by_year[year][0] // statistics.by_year[year][1]) for year in years],
+                      [statistics.by_year[year][1] for year in years])
+    series = []
+    for prof_name in statistics.prof_names:
+        prof = statistics.for_profession(prof_name)
+        series.append((prof_name, list(prof.prof_salary_by_year().values()),
+                       list(prof.prof_vacancies_by_year().values())))
+    os.makedirs(out_dir, exist_ok=True)
+    if processes <= 1 or len(series) < 2:
+        return draw_charts(data, series, out_dir)
+    parts = [series[i::processes] for i in range(processes) if len(series[i::processes]) != 0]
+    paths = {}
+    with multiprocessing.Pool(len(parts)) as pool:
+        for part in pool.starmap(draw_charts, [(data, part, out_dir) for part in parts]):
+            paths.update(part)
+    return paths
+
+
+def draw_charts(data: YearSeries, series: List[Tuple[str, List[int], List[int]]], out_dir: str,
+                file_names: Dict[str, str] = None) -> Dict[str, str]:
+    """Рисует графики для части профессий на одной фигуре с бэкендом Agg. Фигура создается без pyplot, поэтому
+    не зависит от выбранного в процессе бэкенда и не копится в списке открытых фигур.
+
+        Args:
+            data (YearSeries): Данные по годам для всех вакансий
+            series (List[Tuple[str, List[int], List[int]]]): Профессия, ее з\\п и количество вакансий по годам
+            out_dir (str): Папка для изображений
+            file_names (Dict[str, str] or None): Пути к изображениям по профессиям, если их нужно сохранить не в
+                out_dir
+
+        Returns:
+            Dict[str, str]: Путь к изображению по профессии
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=[10, 5], layout='tight')
+    FigureCanvasAgg(fig)
+    y_pos = range(len(data.years))
+    charts = []
+    for ax, overall, title, labels in zip(fig.subplots(1, 2), (data.salary, data.count),
+                                          ('Уровень зарплат по годам', 'Количество вакансий по годам'),
+                                          ((r'средняя з\п', r'з\п '), ('Количество вакансий', 'Количество ваканисий\n'))):
+        overall_bars = ax.bar(y_pos, overall, width=0.3)
+        prof_bars = ax.bar([x + 0.3 for x in y_pos], [0] * len(y_pos), width=0.3)
+        ax.set_xticks([x + 0.15 for x in y_pos], labels=data.years, rotation='vertical', fontsize=8)
+        ax.tick_params(axis='y', labelsize=8)
+        ax.set_title(title, fontsize=20)
+        ax.grid(axis='y')
+        legend = ax.legend([overall_bars, prof_bars], [labels[0], labels[1]], fontsize=8)
+        charts.append((ax, max(overall, default=0), prof_bars, legend.get_texts()[1], labels[1]))
+
+    # Раскладка считается один раз по самому большому масштабу оси, чтобы подписи любой профессии поместились,
+    # и дальше не пересчитывается при каждом сохранении
+    for index, (ax, overall_max, *_) in enumerate(charts):
+        ax.set_ylim(0, max([overall_max] + [max(values[index], default=0) for _, *values in series]) * 1.05 or 1)
+    fig.canvas.draw()
+    fig.set_layout_engine('none')
+    paths = {}
+    for prof_name, *values in series:
+        for (ax, overall_max, prof_bars, label, label_prefix), prof_values in zip(charts, values):
+            for bar, height in zip(prof_bars, prof_values):
+                bar.set_height(height)
+            ax.set_ylim(0, max(overall_max, max(prof_values, default=0)) * 1.05 or 1)
+            label.set_text(label_prefix + prof_name)
+        path = (file_names or {}).get(prof_name) or os.path.join(out_dir,
+                                                                 re.sub(r'[\\/:*?"<>|]', '_', prof_name) + '.png')
+        fig.savefig(path)
+        paths[prof_name] = path
+    return paths
@@ -0,0 +1,235 @@
+import json
+import multiprocessing
+import os
+import re
+import socket
+import socketserver
+import time
+from collections import OrderedDict
+from functools import reduce
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from scheduler import parse_task, plan_tasks
+from stats import BaseStatistics, MultiStatistics, Statistics
+
+HOST = '127.0.0.1'
+PORT = 8764
+# Сколько разобранных записей держать в кэше: дольше всех не использованные файлы вытесняются первыми
+CACHE_RECORDS = 5_000_000
+# Меньшие срезы записей не выгодно считать в пуле: пересылка среза воркеру дороже подсчета
+MIN_SLICE = 50_000
+
+
+class ReportDaemon:
+    """Долгоживущий процесс для формирования отчетов. Держит прогретый пул воркеров и кэш разобранных данных:
+    для каждого csv файла хранятся записи (название, год, город, з\\п, компания, месяц), по которым статистика
+    для любой профессии считается без повторного чтения csv. Запись кэша привязана к пути, размеру и времени
+    изменения файла, поэтому измененный файл разбирается заново, а добавление или удаление других файлов в папке
+    кэш не сбрасывает. На задачи планировщика делятся только файлы, которых нет в кэше. Кэш ограничен
+    cache_records записями и вытесняет файлы, которые дольше всех не использовались. Статистика считается в том
+    же пуле: записи режутся на срезы по числу воркеров, а частичные агрегаты объединяются через merge.
+
+        Attributes:
+            workers (int): Количество процессов в пуле
+            cache_records (int): Наибольшее количество записей в кэше
+            parsed_files (int): Сколько раз файл разбирался заново, а не брался из кэша
+    """
+
+    def __init__(self, workers: int = None, cache_records: int = CACHE_RECORDS):
+        self.workers = workers or multiprocessing.cpu_count()
+        self.cache_records = cache_records
+        self.parsed_files = 0
+        self.__pool = multiprocessing.Pool(self.workers)
+        self.__cache: OrderedDict = OrderedDict()
+        self.__cached_records = 0
+
+    def run_job(self, job: Dict) -> Dict:
+        """Выполняет задание на отчет.
+
+            Args:
+                job (Dict): Задание вида {"csvs_dir": папка с csv, "prof_name": профессия,
+                    "render": создавать ли файлы отчета, "wkhtml_path": путь к wkhtmltopdf или null, тогда pdf
+                    создается без него}.
+                    Вместо "prof_name" можно передать "prof_names" со списком профессий, тогда таблицы по годам
+                    для всех них считаются за один проход, а при "render" создаются только графики профессий в
+                    папке report/charts. "top_cities" - сколько городов отслеживать в SpaceSaving вместо подсчета
+                    всех городов
+
+            Returns:
+                Dict: Таблица по годам (или таблицы по профессиям в "professions"), топ городов, папка с файлами
+                    отчета и время разбора и подсчета
+        """
+        started = time.perf_counter()
+        csvs_dir = job['csvs_dir']
+        files = [os.path.join(csvs_dir, file) for file in sorted(os.listdir(csvs_dir))]
+        records = self.__load(files)
+        parsed = time.perf_counter()
+
+        if 'prof_names' in job:
+            statistics = self.__aggregate(records, lambda: MultiStatistics(job['prof_names'],
+                                                                           top_cities=job.get('top_cities')))
+            professions = {}
+            for prof_name in statistics.prof_names:
+                header, rows = statistics.for_profession(prof_name).years_table()
+                professions[prof_name] = {'header': header, 'rows': rows}
+            salary_by_city, vacancies_by_city = statistics.cities()
+            charts = None
+            if job.get('render'):
+                from charts import render_profession_charts
+                charts = render_profession_charts(statistics, os.path.join('report', 'charts'))
+            return {'professions': professions, 'salary_by_city': salary_by_city,
+                    'vacancies_by_city': vacancies_by_city, 'charts': charts, 'parse_seconds': parsed - started,
+                    'total_seconds': time.perf_counter() - started}
+
+        statistics = self.__aggregate(records, lambda: Statistics(job['prof_name'], top_cities=job.get('top_cities')))
+        header, rows = statistics.years_table()
+        salary_by_city, vacancies_by_city = statistics.cities()
+        report_dir = self.__render(job, statistics, header, rows) if job.get('render') else None
+
+        return {'header': header, 'rows': rows, 'salary_by_city': salary_by_city,
+                'vacancies_by_city': vacancies_by_city, 'report_dir': report_dir,
+                'parse_seconds': parsed - started, 'total_seconds': time.perf_counter() - started}
+
+    def close(self) -> None:
+        self.__pool.close()
+        self.__pool.join()
+
+    def __load(self, files: List[str]) -> List[List[Tuple[str, int, str, float, str, str]]]:
+        """Возвращает разобранные записи по каждому файлу, разбирая в пуле только файлы, которых нет в кэше"""
+        keys = {}
+        for file_name in files:
+            stat = os.stat(file_name)
+            keys[file_name] = (stat.st_size, stat.st_mtime_ns)
+        missing = [file_name for file_name in files
+                   if file_name not in self.__cache or self.__cache[file_name][0] != keys[file_name]]
+        parts = {file_name: [] for file_name in missing}
+        tasks = plan_tasks(missing, self.workers)
+        for task, records in zip(tasks, self.__pool.imap(parse_task, tasks, chunksize=1)):
+            parts[task.file_name].append((task.start, records))
+        for file_name, chunks in parts.items():
+            self.__forget(file_name)
+            records = [record for start, chunk in sorted(chunks, key=lambda pair: pair[0]) for record in chunk]
+            self.__cache[file_name] = (keys[file_name], records)
+            self.__cached_records += len(records)
+            self.parsed_files += 1
+        result = []
+        for file_name in files:
+            self.__cache.move_to_end(file_name)
+            result.append(self.__cache[file_name][1])
+        while self.__cached_records > self.cache_records and len(self.__cache) > 0:
+            self.__forget(next(iter(self.__cache)))
+        return result
+
+    def __aggregate(self, parts: List[List[Tuple]], create: Callable[[], BaseStatistics]) -> BaseStatistics:
+        """Считает статистику по записям в пуле: каждый воркер заполняет пустую статистику из create своим
+        срезом записей, а результаты объединяются через merge"""
+        size = max(MIN_SLICE, -(-sum(len(part) for part in parts) // self.workers))
+        partials = self.__pool.starmap(aggregate_records, [(create(), records)
+                                                           for records in slice_records(parts, size)])
+        statistics = create()
+        return reduce(type(statistics).merge, partials, statistics)
+
+    def __forget(self, file_name: str) -> None:
+        """Удаляет файл из кэша"""
+        if file_name in self.__cache:
+            self.__cached_records -= len(self.__cache.pop(file_name)[1])
+
+    @staticmethod
+    def __render(job: Dict, statistics: Statistics, header, rows) -> str:
+        """Создает файлы отчета в папке report/{профессия}"""
+        from reportv2 import Report
+
+        report_dir = os.path.join('report', re.sub(r'[\\/:*?"<>|]', '_', job['prof_name']))
+        os.makedirs(report_dir, exist_ok=True)
+        rep = Report({}, {}, {}, {}, job['prof_name'], report_dir=report_dir)
+        rep.generate_excel(header, rows)
+        rep.generate_image(count_by_year=statistics.vacancies_by_year(),
+                           prof_count_by_year=statistics.prof_vacancies_by_year(),
+                           salary_by_year=statistics.salary_by_year(),
+                           prof_salary_by_year=statistics.prof_salary_by_year())
+        rep.generate_pdf(wkhtml_path=job.get('wkhtml_path'), years_table_header=header, years_table=rows)
+        return report_dir
+
+
+def slice_records(parts: List[List[Tuple]], size: int) -> Iterator[List[Tuple]]:
+    """Генератор. Режет записи всех файлов подряд на срезы по size записей, последний срез может быть меньше"""
+    current = []
+    for part in parts:
+        start = 0
+        while start < len(part):
+            taken = part[start:start + size - len(current)]
+            current.extend(taken)
+            start += len(taken)
+            if len(current) == size:
+                yield current
+                current = []
+    if current:
+        yield current
+
+
+def aggregate_records(statistics: BaseStatistics, records: List[Tuple]) -> BaseStatistics:
+    """Добавляет записи в статистику. Вызывается в процессах пула демона.
+
+        Args:
+            statistics (BaseStatistics): Пустая Statistics или MultiStatistics
+            records (List[Tuple]): Записи (название, год, город, з\\п, компания, месяц), см. scheduler.parse_task
+
+        Returns:
+            BaseStatistics: Заполненная статистика
+    """
+    for record in records:
+        statistics.add_record(*record)
+    return statistics
+
+
+class JobHandler(socketserver.StreamRequestHandler):
+    """Принимает задания построчно в json и отвечает строкой json. Задания выполняются по одному: matplotlib
+    не потокобезопасен"""
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                response = self.server.report_daemon.run_job(json.loads(line))
+            except Exception as e:
+                response = {'error': f'{type(e).__name__}: {e}'}
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+
+
+def serve(host: str = HOST, port: int = PORT) -> None:
+    """Запускает демон на локальном сокете и обслуживает задания до прерывания"""
+    daemon = ReportDaemon()
+    with socketserver.TCPServer((host, port), JobHandler) as server:
+        server.report_daemon = daemon
+        print(f'Демон отчетов слушает {host}:{port}, воркеров: {daemon.workers}')
+        try:
+            server.serve_forever()
+        finally:
+            daemon.close()
+
+
+def send_job(job: Dict, host: str = HOST, port: int = PORT) -> Dict:
+    """Отправляет задание демону и ждет ответа.
+
+        Args:
+            job (Dict): Задание, см. ReportDaemon.run_job
+
+        Returns:
+            Dict: Ответ демона
+    """
+    with socket.create_connection((host, port)) as sock:
+        sock.sendall(json.dumps(job, ensure_ascii=False).encode('utf-8') + b'\n')
+        with sock.makefile('rb') as file:
+            return json.loads(file.readline())
+
+
+if __name__ == '__main__':
+    mode = input('Запустить демон (пустая строка) или отправить задание (задание): ')
+    if mode == 'задание':
+        csvs_dir = input('Путь до папки с csv: ')
+        prof_name = input('Профессия: ')
+        wkhtml_path = input('Введите путь до wkghml.exe или пустую строку, чтобы создать pdf без него: ')
+        result = send_job({'csvs_dir': csvs_dir, 'prof_name': prof_name, 'render': True,
+                           'wkhtml_path': wkhtml_path or None})
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        serve()
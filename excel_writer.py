@@ -0,0 +1,112 @@
+import pickle
+import tempfile
+from typing import Iterable, List
+
+# Стили создаются один раз на книгу и подключаются к ячейкам по имени, а не копируются в каждую ячейку
+HEADER_STYLE = 'report_header'
+CELL_STYLE = 'report_cell'
+PERCENT_STYLE = 'report_percent'
+# Значение-разделитель между таблицами на одном листе: такие ячейки не получают рамку и не влияют на ширину
+SEPARATOR = ' '
+
+
+class StreamingWorkbook:
+    """Потоковая запись книги excel в режиме write-only. Строки не хранятся в памяти: при добавлении они
+    сбрасываются во временный файл, а ширина столбцов обновляется по ходу. В xlsx ширина столбцов записывается
+    до строк, поэтому при закрытии листа ширины проставляются, а строки переписываются из временного файла в
+    лист уже со стилями. Память не зависит от количества строк, время линейно.
+
+        Attributes:
+            workbook (Workbook): Книга openpyxl в режиме write-only
+    """
+
+    def __init__(self):
+        """Создает пустую книгу и регистрирует в ней стили заголовка, ячейки и процентов."""
+        from openpyxl import Workbook
+        from openpyxl.styles import Border, Font, NamedStyle, Side
+
+        self.workbook = Workbook(write_only=True)
+        side = Side(style='thin')
+        border = Border(left=side, top=side, right=side, bottom=side)
+        self.workbook.add_named_style(NamedStyle(HEADER_STYLE, font=Font(bold=True), border=border))
+        self.workbook.add_named_style(NamedStyle(CELL_STYLE, border=border))
+        self.workbook.add_named_style(NamedStyle(PERCENT_STYLE, border=border, number_format='0.00%'))
+        self.__title = None
+        self.__spool = None
+        self.__widths: List[int] = []
+        self.__percent_columns = set()
+
+    def add_sheet(self, title: str, header: Iterable, percent_columns: Iterable[int] = ()) -> None:
+        """Начинает новый лист. Предыдущий лист закрывается.
+
+            Args:
+                title (str): Название листа
+                header (Iterable): Заголовок таблицы
+                percent_columns (Iterable[int]): Номера столбцов с долями, начиная с 1
+        """
+        self.close_sheet()
+        self.__title = title
+        self.__spool = tempfile.TemporaryFile()
+        self.__widths = []
+        self.__percent_columns = set(percent_columns)
+        self.append(header)
+
+    def append(self, row: Iterable) -> None:
+        """Добавляет строку в текущий лист и обновляет ширину столбцов.
+
+            Args:
+                row (Iterable): Значения строки
+        """
+        row = tuple(row)
+        widths = self.__widths
+        for index, value in enumerate(row):
+            if index == len(widths):
+                widths.append(0)
+            if value != SEPARATOR and widths[index] < len(str(value)):
+                widths[index] = len(str(value))
+        pickle.dump(row, self.__spool, pickle.HIGHEST_PROTOCOL)
+
+    def extend(self, rows: Iterable[Iterable]) -> None:
+        """Добавляет строки в текущий лист"""
+        for row in rows:
+            self.append(row)
+
+    def close_sheet(self) -> None:
+        """Записывает текущий лист в книгу: ширину столбцов, затем строки со стилями"""
+        if self.__spool is None:
+            return
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.utils import get_column_letter
+
+        sheet = self.workbook.create_sheet(self.__title)
+        for index, width in enumerate(self.__widths):
+            sheet.column_dimensions[get_column_letter(index + 1)].width = width + 2
+        cell_styles = [PERCENT_STYLE if index + 1 in self.__percent_columns else CELL_STYLE
+                       for index in range(len(self.__widths))]
+        row_styles = [HEADER_STYLE] * len(self.__widths)
+        self.__spool.seek(0)
+        while True:
+            try:
+                row = pickle.load(self.__spool)
+            except EOFError:
+                break
+            cells = []
+            for value, style in zip(row, row_styles):
+                cell = WriteOnlyCell(sheet, value)
+                if value != SEPARATOR or style == HEADER_STYLE:
+                    cell.style = style
+                cells.append(cell)
+            sheet.append(cells)
+            row_styles = cell_styles
+        self.__spool.close()
+        self.__spool = None
+
+    def save(self, file_name: str) -> None:
+        """Закрывает текущий лист и сохраняет книгу.
+
+            Args:
+                file_name (str): Путь к файлу xlsx
+        """
+        self.close_sheet()
+        self.workbook.save(file_name)
+
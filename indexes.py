@@ -0,0 +1,219 @@
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List
+
+from main import Vacancy
+
+# Навык получает битовую карту, если указан хотя бы в каждой DENSE_RATIO-й вакансии: тогда карта в n / 8 байт не
+# больше его списка номеров по 4 байта
+DENSE_RATIO = 32
+# Номера единичных битов для каждого значения байта
+BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+NONZERO_BYTE = re.compile(rb'[^\x00]')
+
+
+def intersect(smaller: array, larger: array) -> array:
+    """Пересечение двух отсортированных списков номеров. Каждый номер меньшего списка ищется в большем бинарным
+    поиском от места предыдущей находки, поэтому стоимость зависит от длины меньшего списка, а не от суммы длин.
+
+        Args:
+            smaller (array): Меньший отсортированный список
+            larger (array): Больший отсортированный список
+
+        Returns:
+            array: Общие номера по возрастанию
+    """
+    result = array('I')
+    low, size = 0, len(larger)
+    for item in smaller:
+        low = bisect_left(larger, item, low)
+        if low == size:
+            break
+        if larger[low] == item:
+            result.append(item)
+    return result
+
+
+def to_bitmap(posting: Iterable[int], size: int) -> bytes:
+    """Битовая карта номеров: бит i байта j соответствует номеру 8 * j + i.
+
+        Args:
+            posting (Iterable[int]): Номера
+            size (int): Количество номеров всего
+
+        Returns:
+            bytes: Битовая карта
+    """
+    bitmap = bytearray((size + 7) // 8)
+    for index in posting:
+        bitmap[index >> 3] |= 1 << (index & 7)
+    return bytes(bitmap)
+
+
+def from_bitmap(bitmap: bytes) -> array:
+    """Номера единичных битов карты по возрастанию. Нулевые байты пропускаются регулярным выражением, поэтому
+    стоимость зависит от количества найденных номеров.
+
+        Args:
+            bitmap (bytes): Битовая карта
+
+        Returns:
+            array: Номера
+    """
+    result = array('I')
+    for match in NONZERO_BYTE.finditer(bitmap):
+        start = match.start()
+        result.extend(start * 8 + bit for bit in BYTE_BITS[bitmap[start]])
+    return result
+
+
+class SkillIndex:
+    """Инвертированный индекс навыков: для каждого навыка - отсортированный список номеров вакансий, где он указан,
+    а для частых навыков еще и битовая карта. Строится один раз за проход по вакансиям, после чего фильтр 'Навыки' не
+    перебирает вакансии. Если все навыки запроса частые, карты пересекаются одним побитовым И над числами. Иначе
+    берется самый короткий список, и его номера проверяются по картам частых навыков и бинарным поиском по спискам
+    редких, от короткого к длинному, так что каждый шаг не дороже длины уже найденного.
+
+        Attributes:
+            size (int): Количество вакансий
+            postings (Dict[str, array]): Номера вакансий по навыкам
+            bitmaps (Dict[str, bytes]): Битовые карты частых навыков
+    """
+
+    def __init__(self, vacancies: Iterable[Vacancy]):
+        """Строит индекс.
+
+            Args:
+                vacancies (Iterable[Vacancy]): Вакансии, номер вакансии - ее позиция
+        """
+        self.size = 0
+        self.postings: Dict[str, array] = {}
+        for index, vacancy in enumerate(vacancies):
+            self.size += 1
+            for skill in vacancy.key_skills or []:
+                posting = self.postings.setdefault(skill, array('I'))
+                if len(posting) == 0 or posting[-1] != index:
+                    posting.append(index)
+        self.bitmaps: Dict[str, bytes] = {skill: to_bitmap(posting, self.size)
+                                          for skill, posting in self.postings.items()
+                                          if len(posting) * DENSE_RATIO >= self.size}
+
+    def find(self, skills: List[str]) -> array:
+        """Номера вакансий, где указаны все навыки, как фильтр 'Навыки' в Utils.filter.
+
+            Args:
+                skills (List[str]): Навыки
+
+            Returns:
+                array: Номера вакансий по возрастанию
+        """
+        skills = sorted(set(skills), key=lambda skill: len(self.postings.get(skill, ())))
+        if len(skills) == 0:
+            return array('I', range(self.size))
+        if len(skills) == 1:
+            return self.postings.get(skills[0], array('I'))
+        if all(skill in self.bitmaps for skill in skills):
+            bits = -1
+            for skill in skills:
+                bits &= int.from_bytes(self.bitmaps[skill], 'little')
+            return from_bitmap(bits.to_bytes(len(self.bitmaps[skills[0]]), 'little'))
+        result = self.postings.get(skills[0], array('I'))
+        dense = [self.bitmaps[skill] for skill in skills[1:] if skill in self.bitmaps]
+        if dense:
+            result = array('I', (index for index in result
+                                 if all(bitmap[index >> 3] >> (index & 7) & 1 for bitmap in dense)))
+        for skill in skills[1:]:
+            if len(result) == 0:
+                break
+            if skill not in self.bitmaps:
+                result = intersect(result, self.postings.get(skill, array('I')))
+        return result
+
+
+class SalaryIndex:
+    """Интервальное дерево вилок з\\п для фильтра 'Оклад'. Вилки разбираются из строк один раз и сортируются по
+    нижней границе; дерево неявное: узел отрезка [left, right) - его середина, и для каждого узла хранятся максимум
+    и минимум верхних границ поддерева. Вилки с нижней границей выше запроса отсекаются бинарным поиском, поддеревья
+    с максимумом ниже запроса пропускаются целиком, а поддеревья, где подходят все вилки, копируются срезом, поэтому
+    запрос стоит O(log n) плюс количество найденных вакансий.
+
+        Attributes:
+            size (int): Количество вилок в индексе
+    """
+
+    def __init__(self, vacancies: Iterable[Vacancy]):
+        """Строит индекс. Вакансии с неразбираемой или перевернутой вилкой в индекс не попадают.
+
+            Args:
+                vacancies (Iterable[Vacancy]): Вакансии, номер вакансии - ее позиция
+        """
+        intervals = []
+        for index, vacancy in enumerate(vacancies):
+            try:
+                low, high = int(float(vacancy.salary.salary_from)), int(float(vacancy.salary.salary_to))
+            except (TypeError, ValueError):
+                continue
+            if low <= high:
+                intervals.append((low, high, index))
+        intervals.sort()
+        self.size = len(intervals)
+        self.__lows = array('q', (low for low, high, index in intervals))
+        self.__highs = array('q', (high for low, high, index in intervals))
+        self.__ids = array('I', (index for low, high, index in intervals))
+        self.__max_highs = array('q', self.__highs)
+        self.__min_highs = array('q', self.__highs)
+        self.__build(0, self.size)
+
+    def covering(self, salary: int) -> array:
+        """Номера вакансий, чья вилка содержит salary, как фильтр 'Оклад' в Utils.filter.
+
+            Args:
+                salary (int): З\\п
+
+            Returns:
+                array: Номера вакансий по возрастанию
+        """
+        return self.overlapping(salary, salary)
+
+    def overlapping(self, low: int, high: int) -> array:
+        """Номера вакансий, чья вилка пересекается с отрезком [low, high].
+
+            Args:
+                low (int): Нижняя граница
+                high (int): Верхняя граница
+
+            Returns:
+                array: Номера вакансий по возрастанию
+        """
+        stop = bisect_right(self.__lows, high)
+        found = []
+        stack = [(0, self.size)]
+        while stack:
+            left, right = stack.pop()
+            if left >= right or left >= stop:
+                continue
+            middle = (left + right) // 2
+            if self.__max_highs[middle] < low:
+                continue
+            if right <= stop and self.__min_highs[middle] >= low:
+                found.extend(self.__ids[left:right])
+                continue
+            if middle < stop and self.__highs[middle] >= low:
+                found.append(self.__ids[middle])
+            stack.append((left, middle))
+            stack.append((middle + 1, right))
+        return array('I', sorted(found))
+
+    def __build(self, left: int, right: int) -> None:
+        """Считает максимум и минимум верхних границ поддеревьев отрезка [left, right) в его середине"""
+        if right - left <= 1:
+            return
+        middle = (left + right) // 2
+        self.__build(left, middle)
+        self.__build(middle + 1, right)
+        for child in ((left + middle) // 2 if middle > left else None,
+                      (middle + 1 + right) // 2 if right > middle + 1 else None):
+            if child is not None:
+                self.__max_highs[middle] = max(self.__max_highs[middle], self.__max_highs[child])
+                self.__min_highs[middle] = min(self.__min_highs[middle], self.__min_highs[child])
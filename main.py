@@ -1,23 +1,16 @@
-from cProfile import Profile
-from pstats import Stats
-
-# prof = Profile()
-# prof.disable()
 import csv
 import datetime
 import os.path
 import re
+import time
 from enum import Enum, IntEnum
-from typing import List, Dict, Callable, Iterable, Tuple
+from typing import List, Dict, Callable, Iterable, Iterator, Tuple, TYPE_CHECKING
 from itertools import groupby
-from prettytable import PrettyTable
-import report
-from report import Report
-
-to_show = 'Статистика'
 
+if TYPE_CHECKING:
+    from metrics import Metrics
 
-# prof.enable()
+to_show = 'Статистика'
 
 
 class Salary:
@@ -515,12 +508,10 @@ class InputConnect:
             if len(self._DataSet__table.rows) == 0:
                 print("Ничего не найдено")
                 return
-            # prof.disable()
             if end is None:
                 print(self._DataSet__table.get_string(start=start, fields=fields))
             else:
                 print(self._DataSet__table.get_string(start=start, end=end, fields=fields))
-            # prof.enable()
 
         def file(self, prof_name: str = None, file_name: str = None):
             """Создает файлы graph.png, report.pdf, report.xlsx в папке report."""
@@ -566,9 +557,6 @@ class InputConnect:
                 salary_by_city_to_print, vacancies_by_city_to_print, salary_by_year,\
                    vacancies_by_year, profs_salary_by_year, professions_by_year, prof_name
 
-        # prof.disable()
-
-        # prof.enable()
         return file if to_show == 'Статистика' else table
 
 
@@ -593,10 +581,22 @@ class DataSet:
         self.__header_for_table = ['№', 'Название', 'Описание', 'Навыки',
                                    'Опыт работы', 'Премиум-вакансия', 'Компания',
                                    'Оклад', 'Название региона', 'Дата публикации вакансии']
-        self.__table = PrettyTable(self.__header_for_table,
-                                   max_width=20, align='l', hrules=1)
+        self.__table_instance = None
         self.to_show = _to_show
 
+    @property
+    def __table(self):
+        """Таблица для вывода вакансий. Создается при первом обращении, чтобы prettytable не загружался там,
+        где вакансии не печатаются, например в воркерах статистики.
+
+            Returns:
+                PrettyTable: Таблица вакансий
+        """
+        if self.__table_instance is None:
+            from prettytable import PrettyTable
+            self.__table_instance = PrettyTable(self.__header_for_table, max_width=20, align='l', hrules=1)
+        return self.__table_instance
+
     @InputConnect.print_table
     def read_csv(self, file_name: str = None) -> Vacancy or []:
         """Генератор. Возвращает вакансии типа Vacancy для каждой строки из csv файла.
@@ -604,25 +604,12 @@ class DataSet:
             Returns:
                 Iterator[Vacancy]: Итератор по вакансиям из csv файла
         """
-        # prof.disable()
         self.file_name = input('Введите название файла: ') if file_name is None else file_name
-        # prof.enable()
         with open(self.file_name, encoding="utf-8") as file:
-            header = []
             file_reader = csv.reader(file)
-            columns_count = 0
-            for row in file_reader:
-                header = row
-                header[0] = 'name'
-                self.__header = header
-                columns_count = len(row)
-                break
+            header = self.__set_header(next(file_reader, []))
             yield header
-            for row in file_reader:
-                if "" in row or len(row) < columns_count:
-                    continue
-                cleared = self.__clear_field(row)
-                vacancy = Vacancy(**cleared)
+            for vacancy in self.__parse_rows(file_reader):
                 self.vacancies_objects.append(vacancy)
                 yield vacancy
             if len(self.vacancies_objects) == 0:
@@ -630,6 +617,109 @@ class DataSet:
             else:
                 return []
 
+    def iter_csv(self, file_name: str) -> Iterator[Vacancy]:
+        """Генератор. Возвращает вакансии типа Vacancy для каждой строки из csv файла, не сохраняя их в
+        vacancies_objects. Нужен там, где вакансии просматриваются один раз, например при подсчете статистики.
+
+            Args:
+                file_name (str): Путь к csv файлу
+
+            Returns:
+                Iterator[Vacancy]: Итератор по вакансиям из csv файла
+        """
+        with open(file_name, encoding="utf-8") as file:
+            file_reader = csv.reader(file)
+            self.__set_header(next(file_reader, []))
+            yield from self.__parse_rows(file_reader)
+
+    def iter_rows(self, header: List[str], rows: Iterable[List[str]],
+                  metrics: 'Metrics' = None) -> Iterator[Vacancy]:
+        """Возвращает вакансии типа Vacancy для уже разобранных строк csv с заданным заголовком. Используется
+        для частей файла, у которых своего заголовка нет.
+
+            Args:
+                header (List[str]): Заголовок csv файла
+                rows (Iterable[List[str]]): Строки csv файла без заголовка
+                metrics (Metrics): Метрики, в которые записывается время этапов parse, clean и convert и
+                    количество строк, или None
+
+            Returns:
+                Iterator[Vacancy]: Итератор по вакансиям
+        """
+        self.__set_header(list(header))
+        return self.__parse_rows(rows) if metrics is None else self.__parse_rows_measured(rows, metrics)
+
+    def __set_header(self, header: List[str]) -> List[str]:
+        """Запоминает заголовок csv файла. Первый столбец всегда 'name': в выгрузках с BOM его имя искажено.
+
+            Args:
+                header (List[str]): Заголовок csv файла
+
+            Returns:
+                List[str]: Заголовок
+        """
+        if len(header) != 0:
+            header[0] = 'name'
+        self.__header = header
+        return header
+
+    def __parse_rows(self, rows: Iterable[List[str]]) -> Iterator[Vacancy]:
+        """Генератор. Пропускает неполные строки и превращает остальные в вакансии типа Vacancy.
+
+            Args:
+                rows (Iterable[List[str]]): Строки csv файла без заголовка
+
+            Returns:
+                Iterator[Vacancy]: Итератор по вакансиям
+        """
+        columns_count = len(self.__header)
+        for row in rows:
+            if "" in row or len(row) < columns_count:
+                continue
+            yield Vacancy(**self.__clear_field(row))
+
+    def __parse_rows_measured(self, rows: Iterable[List[str]], metrics: 'Metrics') -> Iterator[Vacancy]:
+        """То же, что __parse_rows, но копит время разбора csv (parse), очистки полей (clean) и создания
+        вакансий (convert) и считает строки. Время копится в локальных переменных и записывается в метрики
+        один раз в конце, чтобы замеры не замедляли разбор.
+
+            Args:
+                rows (Iterable[List[str]]): Строки csv файла без заголовка
+                metrics (Metrics): Метрики
+
+            Returns:
+                Iterator[Vacancy]: Итератор по вакансиям
+        """
+        columns_count = len(self.__header)
+        clock = time.perf_counter
+        parse = clean = convert = 0.0
+        parsed = skipped = 0
+        rows = iter(rows)
+        try:
+            while True:
+                parse_started = clock()
+                row = next(rows, None)
+                clean_started = clock()
+                parse += clean_started - parse_started
+                if row is None:
+                    break
+                if "" in row or len(row) < columns_count:
+                    skipped += 1
+                    continue
+                fields = self.__clear_field(row)
+                convert_started = clock()
+                vacancy = Vacancy(**fields)
+                clean += convert_started - clean_started
+                convert += clock() - convert_started
+                parsed += 1
+                yield vacancy
+        finally:
+            metrics.add_time('parse', parse, parsed + skipped)
+            metrics.add_time('clean', clean, parsed)
+            metrics.add_time('convert', convert, parsed)
+            metrics.count('rows', parsed)
+            metrics.count('skipped_rows', skipped)
+
     def __prepare_for_table(self, fields: List[Vacancy], filter_name: str, filter_value: str,
                             sort_query: str, sort_reverse: bool) -> None:
         """Применяет требуемые фильтр и сортировку к списку вакансий и добавляет их в таблицу
@@ -646,11 +736,27 @@ class DataSet:
             fields = list(filter(lambda x: Utils.filter(filter_name)(filter_value, x), fields))
         if sort_query != '':
             fields = sorted(fields, key=Utils.sort(sort_query), reverse=sort_reverse)
-        fields = map(lambda v: v.transform_for_table(), fields)
-        for field in fields:
+        for vacancy in fields:
             index += 1
-            self.__table.add_row(
-                [str(index)] + [self.__trim_row(self.__transform_skill(k, v)) for k, v in field.__dict__.items()])
+            self.__table.add_row(self.table_row(index, vacancy))
+
+    @property
+    def table_header(self) -> List[str]:
+        """Столбцы таблицы вакансий в порядке вывода"""
+        return self.__header_for_table
+
+    def table_row(self, index: int, vacancy: Vacancy) -> List[str]:
+        """Превращает вакансию в строку таблицы: номер и поля для печати, обрезанные до 100 символов.
+
+            Args:
+                index (int): Номер вакансии в таблице, начиная с 1
+                vacancy (Vacancy): Вакансия
+
+            Returns:
+                List[str]: Значения в порядке table_header
+        """
+        field = vacancy.transform_for_table()
+        return [str(index)] + [self.__trim_row(self.__transform_skill(k, v)) for k, v in field.__dict__.items()]
 
     @staticmethod
     def __transform_skill(k: str, v: List[str]) -> str:
@@ -699,11 +805,28 @@ class DataSet:
                 str: Сообщение об ошибке\n
                 ]
         """
-        # prof.disable()
         filter_query = input('Введите параметр фильтрации: ')
         sort_query = input('Введите параметр сортировки: ')
         sort_reverse_query = input('Обратный порядок сортировки (Да / Нет): ')
-        # prof.enable()
+        a1 = input('Введите диапазон вывода: ')
+        a2 = input('Введите требуемые столбцы: ')
+        return self.parse_inputs(filter_query, sort_query, sort_reverse_query, a1, a2)
+
+    def parse_inputs(self, filter_query: str, sort_query: str, sort_reverse_query: str, rows: str,
+                     fields: str) -> (str, str, str, bool, int, int or None, List[str], str):
+        """Проверяет на валидность параметры для сортировки и фильтрации в том виде, в котором они вводятся в
+        консоли, и возвращает их и сообщение об ошибке последним элементом, если параметры не валидные.
+
+            Args:
+                filter_query (str): Параметр фильтрации вида '{Столбец}: {Значение}'
+                sort_query (str): Параметр сортировки
+                sort_reverse_query (str): Обратный порядок сортировки: 'Да', 'Нет' или пустая строка
+                rows (str): Диапазон вывода: начальная и конечная позиции через пробел
+                fields (str): Требуемые столбцы через ', '
+
+            Returns:
+                tuple: То же, что __get_inputs
+        """
         sort_reverse = False if sort_reverse_query in ['Нет', ''] else True
         filter_name, filter_value, err_msg = self.__parse_query(filter_query)
 
@@ -711,12 +834,8 @@ class DataSet:
             err_msg = 'Параметр сортировки некорректен'
         if sort_reverse_query not in ['Нет', 'Да', '']:
             err_msg = 'Порядок сортировки задан некорректно'
-        # prof.disable()
-        a1 = input('Введите диапазон вывода: ')
-        a2 = input('Введите требуемые столбцы: ')
-        # prof.enable()
-        start, end = self.__prepend_rows(a1)
-        fields = self.__prepend_fields(a2.split(', '))
+        start, end = self.__prepend_rows(rows)
+        fields = self.__prepend_fields(fields.split(', '))
 
         return filter_name, filter_value, sort_query, sort_reverse, start, end, fields, err_msg
 
@@ -833,21 +952,13 @@ class DataSet:
         """
         return re.split(self.__RE_ALL_NEWLINE, item)
 
+# from report import Report
 # reader = DataSet('Статистика')
-# #prof.disable()
 # prof_name = input('Введите название профессии: ')
 # wkhtml_path = input('Введите путь до wkghml.exe или пустую строку для стандартного пути: ')
-# #prof.enable()
 # wkhtml_path = os.path.abspath(
 #     r'C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe' if wkhtml_path == "" else wkhtml_path)
 # rep = Report(*reader.read_csv(prof_name=prof_name))
 # rep.generate_excel()
 # rep.generate_image()
 # rep.generate_pdf(wkhtml_path)
-
-# prof.disable()
-# prof.dump_stats('mystats.stats')
-# with open('mystats_output.txt', 'wt') as output:
-#     stats = Stats('mystats.stats', stream=output)
-#     stats.sort_stats('cumulative', 'time')
-#     stats.print_stats()
@@ -0,0 +1,62 @@
+from typing import Dict, List, Set
+
+
+class AhoCorasick:
+    """Автомат Ахо-Корасик для поиска сразу нескольких подстрок за один проход по тексту. Находит те же
+    совпадения, что и проверка prof_name in name для каждого шаблона, но время не зависит от количества
+    шаблонов: каждый символ текста обрабатывается один раз.
+
+        Attributes:
+            patterns (List[str]): Шаблоны в порядке передачи
+    """
+
+    def __init__(self, patterns: List[str]):
+        """Строит бор по шаблонам и суффиксные ссылки обходом в ширину.
+
+            Args:
+                patterns (List[str]): Шаблоны для поиска
+        """
+        self.patterns = list(patterns)
+        self.__goto: List[Dict[str, int]] = [{}]
+        self.__fail: List[int] = [0]
+        self.__output: List[Set[int]] = [set()]
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                if char not in self.__goto[state]:
+                    self.__goto.append({})
+                    self.__fail.append(0)
+                    self.__output.append(set())
+                    self.__goto[state][char] = len(self.__goto) - 1
+                state = self.__goto[state][char]
+            self.__output[state].add(index)
+
+        queue = list(self.__goto[0].values())
+        for state in queue:
+            for char, child in self.__goto[state].items():
+                fail = self.__fail[state]
+                while fail and char not in self.__goto[fail]:
+                    fail = self.__fail[fail]
+                self.__fail[child] = self.__goto[fail].get(char, 0)
+                self.__output[child] |= self.__output[self.__fail[child]]
+                queue.append(child)
+
+    def find(self, text: str) -> Set[int]:
+        """Ищет шаблоны в тексте.
+
+            Args:
+                text (str): Текст, например название вакансии
+
+            Returns:
+                Set[int]: Индексы шаблонов, которые входят в текст
+        """
+        goto, fail, output = self.__goto, self.__fail, self.__output
+        found = set(output[0])
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+        return found
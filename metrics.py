@@ -0,0 +1,102 @@
+import json
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+# Этапы обработки в порядке вывода. Этапы с другими именами выводятся после них
+STAGES = ['read', 'parse', 'clean', 'convert', 'aggregate', 'reduce', 'render']
+
+
+class Metrics:
+    """Легковесные метрики: время по именованным этапам и счетчики строк и байт. В отличие от cProfile не
+    замедляет каждый вызов функции, поэтому может быть включена всегда. Метрики воркеров передаются в
+    родительский процесс вместе с результатом и складываются через merge, как и Statistics.
+
+        Attributes:
+            stages (Dict[str, List[float, int]]): [время в секундах, количество замеров] по этапам
+            counters (Dict[str, int]): Счетчики по именам
+    """
+
+    def __init__(self):
+        """Инициализирует пустой объект Metrics."""
+        self.stages: Dict[str, List] = {}
+        self.counters: Dict[str, int] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Контекстный менеджер, который добавляет время выполнения блока к этапу.
+
+            Args:
+                name (str): Название этапа
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def add_time(self, name: str, seconds: float, calls: int = 1) -> None:
+        """Добавляет время к этапу. Нужен там, где время копится по строкам в локальной переменной, а
+        контекстный менеджер на каждую строку был бы слишком дорогим.
+
+            Args:
+                name (str): Название этапа
+                seconds (float): Время в секундах
+                calls (int): Количество замеров
+        """
+        value = self.stages.get(name)
+        if value is None:
+            self.stages[name] = [seconds, calls]
+        else:
+            value[0] += seconds
+            value[1] += calls
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Увеличивает счетчик.
+
+            Args:
+                name (str): Название счетчика, например rows или bytes
+                value (int): На сколько увеличить
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def merge(self, other: 'Metrics') -> 'Metrics':
+        """Добавляет метрики другого процесса или задачи.
+
+            Args:
+                other (Metrics): Метрики для добавления
+
+            Returns:
+                Metrics: self, чтобы merge можно было передать в functools.reduce
+        """
+        for name, (seconds, calls) in other.stages.items():
+            self.add_time(name, seconds, calls)
+        for name, value in other.counters.items():
+            self.count(name, value)
+        return self
+
+    def to_dict(self) -> Dict:
+        """Метрики в виде словаря для json: этапы в порядке STAGES, затем остальные по алфавиту"""
+        order = {name: index for index, name in enumerate(STAGES)}
+        names = sorted(self.stages, key=lambda name: (order.get(name, len(order)), name))
+        return {'stages': {name: {'seconds': round(self.stages[name][0], 6), 'calls': self.stages[name][1]}
+                           for name in names},
+                'counters': dict(sorted(self.counters.items()))}
+
+    def to_json(self, file_name: str) -> None:
+        """Сохраняет метрики в json файл.
+
+            Args:
+                file_name (str): Путь к файлу
+        """
+        with open(file_name, 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(), file, ensure_ascii=False, indent=2)
+
+    def print(self) -> None:
+        """Печатает время по этапам с долей от суммы и счетчики"""
+        data = self.to_dict()
+        total = sum(stage['seconds'] for stage in data['stages'].values()) or 1
+        for name, stage in data['stages'].items():
+            print(f'{name:12} {stage["seconds"]:10.3f} c {stage["seconds"] / total:7.1%} {stage["calls"]:10}')
+        for name, value in data['counters'].items():
+            print(f'{name:12} {value:12}')
@@ -0,0 +1,99 @@
+import os.path as pth
+import textwrap
+from typing import Iterable, List, Sequence, Tuple
+
+# Размер страницы A4 в дюймах и высота строки таблицы в долях страницы
+PAGE_SIZE = (8.27, 11.69)
+ROW_HEIGHT = 0.022
+MARGIN = 0.04
+
+
+def write_pdf(save_path: str, title: str, image_path: str = None,
+              tables: Iterable[Tuple[str, Sequence[str], List[Sequence]]] = ()) -> None:
+    """Создает pdf отчета средствами matplotlib (PdfPages), без html шаблона и внешнего wkhtmltopdf: заголовок,
+    изображение с графиками и таблицы. Таблицы, которые не помещаются на страницу, продолжаются на следующей с
+    повтором заголовка таблицы.
+
+        Args:
+            save_path (str): Путь к pdf файлу
+            title (str): Заголовок отчета
+            image_path (str): Путь к png с графиками или None
+            tables (Iterable[Tuple[str, Sequence[str], List[Sequence]]]): Подпись, заголовок и строки каждой таблицы
+    """
+    from matplotlib.backends.backend_pdf import PdfPages
+    from matplotlib.figure import Figure
+
+    with PdfPages(save_path) as pdf:
+        fig = Figure(figsize=PAGE_SIZE)
+        fig.text(0.5, 1 - MARGIN, textwrap.fill(title, 50), ha='center', va='top', fontsize=16, weight='bold')
+        top = 1 - MARGIN - 0.06
+        if image_path is not None and pth.exists(image_path):
+            top = add_image(fig, image_path, top)
+
+        for caption, header, rows in tables:
+            rows = list(rows)
+            start = 0
+            while start < len(rows) or start == 0:
+                fit = int((top - MARGIN) / ROW_HEIGHT) - 4
+                if fit < min(3, len(rows) - start):
+                    pdf.savefig(fig)
+                    fig, top = Figure(figsize=PAGE_SIZE), 1 - MARGIN
+                    continue
+                part = rows[start:start + fit]
+                top = add_table(fig, caption if start == 0 else f'{caption} (продолжение)', header, part, top)
+                start += max(len(part), 1)
+        pdf.savefig(fig)
+
+
+def add_image(fig, image_path: str, top: float) -> float:
+    """Добавляет на страницу изображение во всю ширину, но не выше половины страницы.
+
+        Args:
+            fig (Figure): Страница
+            image_path (str): Путь к png
+            top (float): Верхняя граница свободного места в долях страницы
+
+        Returns:
+            float: Новая верхняя граница свободного места
+    """
+    from matplotlib.image import imread
+
+    image = imread(image_path)
+    width = 1 - 2 * MARGIN
+    height = min(0.5, width * PAGE_SIZE[0] / PAGE_SIZE[1] * image.shape[0] / image.shape[1])
+    ax = fig.add_axes([MARGIN, top - height, width, height])
+    ax.imshow(image)
+    ax.axis('off')
+    return top - height - 0.02
+
+
+def add_table(fig, caption: str, header: Sequence[str], rows: List[Sequence], top: float) -> float:
+    """Добавляет на страницу подпись и таблицу с жирным заголовком.
+
+        Args:
+            fig (Figure): Страница
+            caption (str): Подпись таблицы
+            header (Sequence[str]): Заголовок таблицы
+            rows (List[Sequence]): Строки таблицы, которые помещаются на страницу
+            top (float): Верхняя граница свободного места в долях страницы
+
+        Returns:
+            float: Новая верхняя граница свободного места
+    """
+    fig.text(MARGIN, top, caption, ha='left', va='top', fontsize=13, weight='bold')
+    top -= 0.035
+    height = ROW_HEIGHT * (len(rows) + 2)
+    ax = fig.add_axes([MARGIN, top - height, 1 - 2 * MARGIN, height])
+    ax.axis('off')
+    header = [textwrap.fill(str(item), 22) for item in header]
+    cells = [[str(item) for item in row] for row in rows] or [[''] * len(header)]
+    table = ax.table(cellText=cells, colLabels=header,
+                     cellLoc='center', bbox=[0, 0, 1, 1])
+    table.auto_set_font_size(False)
+    table.set_fontsize(8)
+    for (row, column), cell in table.get_celld().items():
+        if row == 0:
+            cell.set_text_props(weight='bold')
+            cell.set_facecolor('#eeeeee')
+            cell.set_height(cell.get_height() * 2)
+    return top - height - 0.03
@@ -0,0 +1,208 @@
+import asyncio
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from indexes import SalaryIndex, SkillIndex
+from main import DataSet, Utils, Vacancy
+
+HOST = '127.0.0.1'
+PORT = 8765
+# Сколько последних результатов фильтрации держать в памяти
+FILTER_CACHE_SIZE = 256
+# Наибольшее тело запроса в байтах: параметры запроса занимают сотни байт, а больший Content-Length не читается
+MAX_BODY = 64 * 1024
+
+
+class QueryIndex:
+    """Вакансии одного csv в памяти и запросы к ним в том же виде, что в режиме 'Вакансии' main.py: фильтр,
+    сортировка, диапазон и столбцы. Файл читается и разбирается один раз. Порядок вакансий для каждой сортировки
+    считается при первом запросе и дальше переиспользуется, как и результаты последних фильтров, поэтому повторный
+    запрос стоит одного прохода по индексам и форматирования только выводимых строк. Запросы могут выполняться
+    из нескольких потоков: кэши и ленивые индексы защищены блокировкой.
+
+        Attributes:
+            file_name (str): Путь к csv файлу
+            vacancies (List[Vacancy]): Вакансии
+    """
+
+    def __init__(self, file_name: str):
+        """Читает csv файл.
+
+            Args:
+                file_name (str): Путь к csv файлу
+        """
+        self.file_name = file_name
+        self.__dataset = DataSet('Вакансии')
+        self.vacancies: List[Vacancy] = list(self.__dataset.iter_csv(file_name))
+        self.__orders: Dict[Tuple[str, bool], List[int]] = {}
+        self.__filters: OrderedDict = OrderedDict()
+        self.__skills: SkillIndex or None = None
+        self.__salaries: SalaryIndex or None = None
+        self.__lock = threading.Lock()
+
+    def query(self, params: Dict[str, str]) -> Dict:
+        """Выполняет запрос.
+
+            Args:
+                params (Dict[str, str]): Параметры с теми же значениями, что вводятся в консоли: 'filter'
+                    ('Навыки: Git, SQL'), 'sort' ('Оклад'), 'reverse' ('Да' / 'Нет'), 'rows' ('1 20') и
+                    'fields' ('Название, Оклад'). Отсутствующий параметр - пустая строка
+
+            Returns:
+                Dict: {'header': столбцы, 'rows': строки таблицы, 'total': количество найденных вакансий} или
+                    {'error': сообщение}, как его печатает main.py
+        """
+        (filter_name, filter_value, sort_query, sort_reverse,
+         start, end, fields, err_msg) = self.__dataset.parse_inputs(*(str(params.get(name, '')) for name in
+                                                                      ('filter', 'sort', 'reverse', 'rows', 'fields')))
+        if len(self.vacancies) == 0:
+            return {'error': 'Нет данных'}
+        if err_msg:
+            return {'error': err_msg}
+        indexes = self.__order(sort_query, sort_reverse)
+        if filter_name != '':
+            found = self.__filter(filter_name, filter_value)
+            indexes = sorted(found) if sort_query == '' else [index for index in indexes if index in found]
+        if len(indexes) == 0:
+            return {'error': 'Ничего не найдено'}
+        header = self.__dataset.table_header
+        columns = [position for position, column in enumerate(header) if column in fields]
+        rows = []
+        for number, index in enumerate(indexes[start:end], start + 1):
+            row = self.__dataset.table_row(number, self.vacancies[index])
+            rows.append([row[position] for position in columns])
+        return {'header': [header[position] for position in columns], 'rows': rows, 'total': len(indexes)}
+
+    def __order(self, sort_query: str, sort_reverse: bool) -> List[int] or range:
+        """Индексы вакансий в порядке сортировки. Сортировка устойчивая, как sorted в main.py, поэтому отбор
+        отсортированных индексов по фильтру дает тот же порядок, что сортировка отфильтрованных вакансий"""
+        if sort_query == '':
+            return range(len(self.vacancies))
+        key = (sort_query, sort_reverse)
+        with self.__lock:
+            if key not in self.__orders:
+                sort = Utils.sort(sort_query)
+                self.__orders[key] = sorted(range(len(self.vacancies)),
+                                            key=lambda index: sort(self.vacancies[index]), reverse=sort_reverse)
+            return self.__orders[key]
+
+    def __filter(self, filter_name: str, filter_value: str or List[str]) -> set:
+        """Множество индексов вакансий, подходящих под фильтр. Последние FILTER_CACHE_SIZE результатов кэшируются.
+        Фильтры 'Навыки' и 'Оклад' отвечают по SkillIndex и SalaryIndex, которые строятся при первом таком запросе"""
+        key = (filter_name, tuple(filter_value) if isinstance(filter_value, list) else filter_value)
+        with self.__lock:
+            if key in self.__filters:
+                self.__filters.move_to_end(key)
+                return self.__filters[key]
+            if filter_name == 'Навыки':
+                if self.__skills is None:
+                    self.__skills = SkillIndex(self.vacancies)
+                found = set(self.__skills.find(filter_value))
+            elif filter_name == 'Оклад':
+                if self.__salaries is None:
+                    self.__salaries = SalaryIndex(self.vacancies)
+                found = set(self.__salaries.covering(int(filter_value)))
+            else:
+                check = Utils.filter(filter_name)
+                found = {index for index, vacancy in enumerate(self.vacancies) if check(filter_value, vacancy)}
+            self.__filters[key] = found
+            if len(self.__filters) > FILTER_CACHE_SIZE:
+                self.__filters.popitem(last=False)
+            return found
+
+
+async def handle(index: QueryIndex, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Обслуживает одно соединение: HTTP/1.1 с keep-alive. GET /query?filter=...&sort=... или POST /query с json
+    телом, ответ - json. Запрос выполняется в пуле потоков цикла событий, поэтому долгая сортировка или фильтр
+    по всем вакансиям не задерживает чтение и ответы других соединений. Тело больше MAX_BODY не читается: клиент
+    получает 413, и соединение закрывается.
+
+        Args:
+            index (QueryIndex): Вакансии в памяти
+            reader (asyncio.StreamReader): Поток запроса
+            writer (asyncio.StreamWriter): Поток ответа
+    """
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, target, version = request_line.decode('latin-1').split()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, value = line.decode('latin-1').split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get('content-length', 0))
+            keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+            if length > MAX_BODY:
+                status, response, keep_alive = '413 Payload Too Large', {'error': 'Слишком большой запрос'}, False
+            else:
+                body = await reader.readexactly(length)
+                status, response = await asyncio.get_running_loop().run_in_executor(None, respond, index, method,
+                                                                                    target, body)
+            payload = json.dumps(response, ensure_ascii=False).encode('utf-8')
+            writer.write(f'HTTP/1.1 {status}\r\nContent-Type: application/json; charset=utf-8\r\n'
+                         f'Content-Length: {len(payload)}\r\n'
+                         f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode('latin-1') + payload)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+def respond(index: QueryIndex, method: str, target: str, body: bytes) -> (str, Dict):
+    """Разбирает запрос и выполняет его.
+
+        Args:
+            index (QueryIndex): Вакансии в памяти
+            method (str): GET или POST
+            target (str): Путь с параметрами
+            body (bytes): Тело запроса
+
+        Returns:
+            Tuple[str, Dict]: Статус HTTP и json ответа
+    """
+    url = urlsplit(target)
+    if url.path == '/health':
+        return '200 OK', {'vacancies': len(index.vacancies), 'file_name': index.file_name}
+    if url.path != '/query':
+        return '404 Not Found', {'error': 'Неизвестный путь'}
+    try:
+        params = json.loads(body or b'{}') if method == 'POST' else dict(parse_qsl(url.query))
+        result = index.query(params)
+    except (ValueError, KeyError, TypeError, AttributeError) as error:
+        return '400 Bad Request', {'error': f'Некорректный запрос: {error!r}'}
+    return ('400 Bad Request' if 'error' in result else '200 OK'), result
+
+
+async def serve(file_name: str, host: str = HOST, port: int = PORT) -> None:
+    """Загружает вакансии и обслуживает запросы, пока процесс не остановят.
+
+        Args:
+            file_name (str): Путь к csv файлу
+            host (str): Адрес, по умолчанию только локальный
+            port (int): Порт
+    """
+    index = QueryIndex(file_name)
+    server = await asyncio.start_server(lambda reader, writer: handle(index, reader, writer), host, port)
+    print(f'Загружено вакансий: {len(index.vacancies)}. Сервис слушает http://{host}:{port}/query', flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == '__main__':
+    file_name = input('Введите название файла: ')
+    port = input(f'Порт или пустую строку для {PORT}: ')
+    try:
+        asyncio.run(serve(file_name, port=int(port) if port else PORT))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,102 @@
+import filecmp
+import hashlib
+import json
+import os
+import shutil
+import stat
+from typing import Any, List
+
+CACHE_DIR = '.render_cache'
+
+
+class RenderCache:
+    """Кэш готовых файлов отчета с адресацией по содержимому. Ключ файла - хэш всего, от чего зависит результат:
+    таблиц и словарей с данными, шаблона, стилей и кода, который рисует файл. Поэтому при тех же данных дорогой
+    рендер (графики matplotlib, книга excel, вызов wkhtmltopdf) не повторяется, а файл копируется из кэша, а при
+    любом изменении входа ключ меняется сам и устаревшие файлы не используются. Файлы копируются, а не связываются
+    жесткой ссылкой: это стоит места на диске и времени на копирование, зато отчет можно открыть и пересохранить,
+    не испортив запись кэша. Сами записи кэша доступны только для чтения.
+
+        Attributes:
+            cache_dir (str): Папка кэша
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        """Инициализирует объект RenderCache.
+
+            Args:
+                cache_dir (str): Папка кэша, создается при первом сохранении
+        """
+        self.cache_dir = cache_dir
+
+    @staticmethod
+    def key(kind: str, data: Any, files: List[str] = ()) -> str:
+        """Считает ключ файла отчета.
+
+            Args:
+                kind (str): Вид файла, например xlsx, png или pdf
+                data (Any): Данные, из которых строится файл. Должны сериализоваться в json
+                files (List[str]): Файлы, содержимое которых влияет на результат: шаблоны, стили, код рендера
+
+            Returns:
+                str: sha256 в шестнадцатеричном виде
+        """
+        digest = hashlib.sha256(kind.encode('utf-8'))
+        digest.update(json.dumps(data, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8'))
+        for file_name in files:
+            with open(file_name, 'rb') as file:
+                digest.update(hashlib.sha256(file.read()).digest())
+        return digest.hexdigest()
+
+    def is_cached(self, key: str, dest: str) -> bool:
+        """Проверяет, что по пути dest лежит файл с тем же содержимым, что файл из кэша с таким ключом"""
+        cached = self.__path(key, dest)
+        return os.path.exists(dest) and os.path.exists(cached) and filecmp.cmp(cached, dest, shallow=False)
+
+    def fetch(self, key: str, dest: str) -> bool:
+        """Копирует файл из кэша по пути dest.
+
+            Args:
+                key (str): Ключ файла
+                dest (str): Путь к файлу отчета
+
+            Returns:
+                bool: Да, если файл был в кэше
+        """
+        cached = self.__path(key, dest)
+        if not os.path.exists(cached):
+            return False
+        copy(cached, dest)
+        return True
+
+    def store(self, key: str, path: str) -> None:
+        """Сохраняет созданный файл отчета в кэш.
+
+            Args:
+                key (str): Ключ файла
+                path (str): Путь к созданному файлу
+        """
+        cached = self.__path(key, path)
+        if os.path.exists(cached):
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp = f'{cached}.{os.getpid()}.tmp'
+        shutil.copyfile(path, temp)
+        os.chmod(temp, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        os.replace(temp, cached)
+
+    def __path(self, key: str, file_name: str) -> str:
+        """Путь к файлу кэша: ключ с расширением файла отчета"""
+        return os.path.join(self.cache_dir, key + os.path.splitext(file_name)[1])
+
+
+def copy(source: str, dest: str) -> None:
+    """Копирует файл через временный файл рядом с dest, чтобы по пути dest не оказался недописанный файл.
+
+        Args:
+            source (str): Существующий файл
+            dest (str): Путь к новому файлу, существующий файл заменяется
+    """
+    temp = f'{dest}.{os.getpid()}.part'
+    shutil.copyfile(source, temp)
+    os.replace(temp, dest)
@@ -1,14 +1,10 @@
 import re
 from typing import Tuple, List, Dict
-from openpyxl import Workbook
-from openpyxl.styles import Font, Border, Side
-from openpyxl.utils import get_column_letter
-from openpyxl.worksheet.worksheet import Worksheet
-from matplotlib import pyplot as plt
-from jinja2 import Environment, FileSystemLoader
-import pdfkit
 import os.path as pth
 
+# openpyxl, matplotlib, jinja2 и pdfkit загружаются при первом создании соответствующего файла: импорт модуля и
+# Report нужен и там, где файлы не создаются, а эти библиотеки заметно замедляют запуск
+
 
 class Report:
     """Класс, формирующий отчеты из данных по вакансиям"""
@@ -33,44 +29,26 @@ class Report:
         self.__prof_salary_by_year = prof_salary_by_year
         self.__prof_count_by_year = prof_count_by_year
         self.__prof_name = prof_name
-        self.__font = Font(bold=True)
-        self.__border = Border(
-            left=Side(style='thin'),
-            top=Side(style='thin'),
-            right=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-        self.__fig, self.__axs = plt.subplots(2, 2, layout='tight', figsize=[10, 10])
+        self.__fig, self.__axs = None, None
         self.first_table_header, self.first_table = self.__generate_years_table()
         self.second_table_header, self.second_table = self.__generate_cities_salary_table()
         self.third_table_header, self.third_table = self.__generate_cities_vacancy_table()
 
     def generate_excel(self):
         """Создает excel файл с таблицами по пути report/report.xlsx"""
-        wk = Workbook()
-        dest_filename = pth.relpath(pth.join('report', 'report.xlsx'))
-        ws = wk.worksheets[0]
-        ws.title = "Статистика по годам"
-        ws.append(self.first_table_header)
-        self.__style_header(ws)
-        for t in self.first_table:
-            ws.append(t)
-        self.__style_cells(ws)
+        from excel_writer import SEPARATOR, StreamingWorkbook
 
-        wk.create_sheet(title="Статистика по городам")
-        ws = wk.worksheets[1]
-        header = (self.second_table_header + tuple(' ') + self.third_table_header)
-        ws.append(header)
+        wk = StreamingWorkbook()
+        dest_filename = pth.relpath(pth.join('report', 'report.xlsx'))
+        wk.add_sheet("Статистика по годам", self.first_table_header)
+        wk.extend(self.first_table)
 
-        table = [(self.second_table[i] + tuple(" ") + self.third_table[i]) for i in range(len(self.third_table))]
-        for t in table:
-            ws.append(t)
-        self.__style_percent_column(ws, 5)
-        self.__style_cells(ws)
-        self.__style_header(ws)
+        wk.add_sheet("Статистика по городам", self.second_table_header + (SEPARATOR,) + self.third_table_header,
+                     percent_columns=[5])
+        wk.extend(self.second_table[i] + (SEPARATOR,) + self.third_table[i] for i in range(len(self.third_table)))
 
         if check_file('xlsx', dest_filename):
-            wk.save(filename=dest_filename)
+            wk.save(dest_filename)
 
     def generate_image(self) -> None:
         """Создает изображение графиков по пути report/graph.png"""
@@ -80,14 +58,30 @@ class Report:
         self.__generate_pie()
         save_path = pth.relpath(pth.join('report', 'graph.png'))
         if check_file('png', save_path):
-            plt.savefig(save_path)
+            self.__fig.savefig(save_path)
 
-    def generate_pdf(self, wkhtml_path: str) -> None:
-        """Создает pdf файл по пути report/report.pdf с помощью таблиц и шаблона по пути template/template.html
+    def generate_pdf(self, wkhtml_path: str or None) -> None:
+        """Создает pdf файл по пути report/report.pdf с помощью таблиц и шаблона по пути template/template.html.
+        Если wkhtmltopdf не найден, pdf создается внутри процесса средствами matplotlib (см. pdf_writer)
 
             Args:
-                wkhtml_path (str): Путь к модулю wkghtml
+                wkhtml_path (str or None): Путь к модулю wkghtml или None, чтобы не использовать его
         """
+        save_path = pth.normpath(pth.join('report', 'report.pdf'))
+        third_table = list(map(lambda tup: (tup[0], "{:.2f}%".format(tup[1] * 100).replace('.', ',')),
+                               self.third_table))
+        if wkhtml_path is None or not pth.exists(wkhtml_path):
+            from pdf_writer import write_pdf
+            if check_file('pdf', save_path):
+                write_pdf(save_path, f'Аналитика по зарплатам и городам для профессии {self.__prof_name}',
+                          pth.join('report', 'graph.png'),
+                          [('Статистика по годам', self.first_table_header, self.first_table),
+                           ('Статистика по городам', self.second_table_header, self.second_table),
+                           ('Доля вакансий по городам', self.third_table_header, third_table)])
+            return
+        from jinja2 import Environment, FileSystemLoader
+        import pdfkit
+
         env = Environment(loader=FileSystemLoader('.'))
         template = env.get_template('template/template.html')
 
@@ -97,14 +91,12 @@ class Report:
             'first_table_header': self.first_table_header,
             'second_table_header': self.second_table_header,
             'third_table_header': self.third_table_header,
-            'third_table': list(
-                map(lambda tup: (tup[0], "{:.2f}%".format(tup[1] * 100).replace('.', ',')), self.third_table)),
+            'third_table': third_table,
             'prof_name': self.__prof_name,
             'to_css': pth.abspath(pth.join('template', 'style.css')),
             'to_img': pth.abspath(pth.join('report', 'graph.png'))
         })
         config = pdfkit.configuration(wkhtmltopdf=wkhtml_path)
-        save_path = pth.normpath(pth.join('report', 'report.pdf'))
         if check_file('pdf', save_path):
             pdfkit.from_string(pdf_template, save_path, configuration=config,
                                options={"enable-local-file-access": ""})
@@ -167,57 +159,28 @@ class Report:
         tt = [(city, self.__count_by_city[city]) for city in self.__count_by_city]
         return tth, tt
 
-    def __style_header(self, worksheet: Worksheet) -> None:
-        """Применяет стили шрифта и рамки для главной строки таблицы
-
-            Args:
-                worksheet (Worksheet): Страница excell
-        """
-        for header in worksheet.iter_rows(min_row=1, max_row=1):
-            for cell in header:
-                cell.font = self.__font
-                cell.border = self.__border
-
-    def __style_cells(self, worksheet: Worksheet) -> None:
-        """Применяет рамку и устанавливает ширину по максимално широкой ячейке для каждого столбца
-
-            Args:
-                worksheet (Worksheet): Страница excell
-        """
-        dims = []
-        for column in worksheet.columns:
-            max_width = 0
-            for cell in column:
-                if cell.value != " ":
-                    cell.border = self.__border
-                    if max_width < len(str(cell.value)):
-                        max_width = len(str(cell.value))
-            dims.append(max_width + 2)
-        for i, width in enumerate(dims):
-            worksheet.column_dimensions[get_column_letter(i + 1)].width = width
-
-    def __style_percent_column(self, worksheet: Worksheet, col_index: int) -> None:
-        """Применяет ко всем ячейкам столбца стиль процентный с двумя знаками после запятой
+    def __axes(self):
+        """Создает фигуру с четырьмя окнами для графиков при первом обращении. Пока изображение не нужно,
+        matplotlib не загружается и фигура не создается.
 
-            Args:
-                worksheet (Worksheet): Страница excell
-                col_index (int): Индекс столбца
+            Returns:
+                ndarray: Окна фигуры 2x2
         """
-        for column in worksheet.iter_cols(col_index):
-            for cell in column:
-                cell.style = 'Percent'
-                cell.number_format = '0.00%'
+        if self.__fig is None:
+            from matplotlib import pyplot as plt
+            self.__fig, self.__axs = plt.subplots(2, 2, layout='tight', figsize=[10, 10])
+        return self.__axs
 
     def __generate_pie(self):
         """Создает круговую диаграмму с распределением долей вакансий по городам в четвертом окне"""
-        ax = self.__axs[1, 1]
+        ax = self.__axes()[1, 1]
         data = {'Другие': 1 - sum(self.__count_by_city.values()), **self.__count_by_city}
         ax.pie(list(data.values()), labels=list(data.keys()), textprops={'fontsize': 6})
         ax.set_title('Доля вакансий по городам', fontsize=20)
 
     def __generate_hor(self):
         """Создает горизонтальную диаграмму с зарплатами по топ-10 городам в третьем окне"""
-        ax = self.__axs[1, 0]
+        ax = self.__axes()[1, 0]
         y_pos = range(len(self.__salary_by_city.keys()))
         cities = list(self.__salary_by_city.keys())
         for i, city in enumerate(cities):
@@ -235,7 +198,7 @@ class Report:
 
     def __generate_salary_diagram(self):
         """Создает диаграмму з\п по годам в первом окне"""
-        ax = self.__axs[0, 0]
+        ax = self.__axes()[0, 0]
         ax.set_title('Уровень зарплат по годам', fontsize=20)
         y_pos = range(len(self.__salary_by_year.keys()))
         years = list(self.__salary_by_year.keys())
@@ -251,7 +214,7 @@ class Report:
 
     def __generate_vacancy_diagram(self):
         """Создает диаграмму количества вакансий по годам во втором окне"""
-        ax = self.__axs[0, 1]
+        ax = self.__axes()[0, 1]
         y_pos = range(len(self.__count_by_year.keys()))
         years = list(self.__count_by_year.keys())
         salary_by_year = list(self.__count_by_year.values())
@@ -1,21 +1,23 @@
+import os
 import re
-from typing import Tuple, List, Dict
-from openpyxl import Workbook
-from openpyxl.styles import Font, Border, Side
-from openpyxl.utils import get_column_letter
-from openpyxl.worksheet.worksheet import Worksheet
-from matplotlib import pyplot as plt
-from jinja2 import Environment, FileSystemLoader
-import pdfkit
+import concurrent.futures as cf
+from multiprocessing.pool import Pool
+from typing import Callable, Tuple, List, Dict
 import os.path as pth
 
+from render_cache import CACHE_DIR, RenderCache
+
+# openpyxl, matplotlib, jinja2 и pdfkit загружаются при первом создании соответствующего файла: импорт модуля и
+# Report нужен и там, где файлы не создаются, а эти библиотеки заметно замедляют запуск
+
 
 class Report:
     """Класс, формирующий отчеты из данных по вакансиям"""
 
     def __init__(self, salary_by_year: Dict[str, int],
                  count_by_year: Dict[str, int], prof_salary_by_year: Dict[str, int],
-                 prof_count_by_year: Dict[str, int], prof_name: str):
+                 prof_count_by_year: Dict[str, int], prof_name: str, report_dir: str = 'report',
+                 cache_dir: str or None = CACHE_DIR):
         """Инициализирует объект Report
 
             Args:
@@ -26,67 +28,87 @@ class Report:
                 prof_salary_by_year (Dict[str, int]): З\п по професси по годам
                 prof_count_by_year (Dict[str, int]): Количество вакансий по профессии по годам
                 prof_name (str): Профессия
+                report_dir (str): Папка, в которую сохраняются файлы отчета
+                cache_dir (str or None): Папка кэша готовых файлов (см. RenderCache) или None, чтобы рисовать
+                    файлы каждый раз заново
         """
+        self.__report_dir = report_dir
+        self.__cache = RenderCache(cache_dir) if cache_dir is not None else None
         self.__salary_by_year = salary_by_year
         self.__count_by_year = count_by_year
         self.__prof_salary_by_year = prof_salary_by_year
         self.__prof_count_by_year = prof_count_by_year
         self.__prof_name = prof_name
-        self.__font = Font(bold=True)
-        self.__border = Border(
-            left=Side(style='thin'),
-            top=Side(style='thin'),
-            right=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-        self.__fig, self.__axs = plt.subplots(2, 2, layout='tight', figsize=[10, 10])
+        self.__fig, self.__axs = None, None
 
     def generate_excel(self, years_table_header: List[Tuple], years_table: List[Tuple]):
-        """Создает excel файл с таблицами по пути report/report.xlsx"""
-        wk = Workbook()
-        dest_filename = pth.relpath(pth.join('report', 'report.xlsx'))
-        ws = wk.worksheets[0]
-        ws.title = "Статистика по годам"
-        ws.append(years_table_header)
-        self.__style_header(ws)
-
-        for t in years_table:
-            ws.append(t)
-        self.__style_cells(ws)
-
-        if check_file('xlsx', dest_filename):
-            wk.save(filename=dest_filename)
+        """Создает excel файл с таблицами по пути {report_dir}/report.xlsx"""
+        dest_filename = pth.relpath(pth.join(self.__report_dir, 'report.xlsx'))
+        self.__render_cached('xlsx', dest_filename, [years_table_header, years_table],
+                             [pth.abspath(pth.join(pth.dirname(__file__), 'excel_writer.py'))],
+                             lambda path: self.__render_excel(path, years_table_header, years_table))
 
     def generate_image(self, salary_by_year: Dict[str, int], prof_salary_by_year: Dict[str, int],
                        count_by_year: Dict[str, int], prof_count_by_year: Dict[str, int]) -> None:
-        """Создает изображение графиков по пути report/graph.png"""
-        self.__generate_salary_diagram(salary_by_year, prof_salary_by_year)
-        self.__generate_vacancy_diagram(count_by_year, prof_count_by_year)
-        save_path = pth.relpath(pth.join('report', 'graph.png'))
-        if check_file('png', save_path):
-            plt.savefig(save_path)
+        """Создает изображение графиков по пути {report_dir}/graph.png"""
+        save_path = pth.relpath(pth.join(self.__report_dir, 'graph.png'))
+        data = [self.__prof_name] + [list(values.items()) for values in
+                                     (salary_by_year, prof_salary_by_year, count_by_year, prof_count_by_year)]
+        self.__render_cached('png', save_path, data, [],
+                             lambda path: self.__render_image(path, salary_by_year, prof_salary_by_year,
+                                                              count_by_year, prof_count_by_year))
 
-    def generate_pdf(self, wkhtml_path: str, years_table_header, years_table) -> None:
-        """Создает pdf файл по пути report/report.pdf с помощью таблиц и шаблона по пути template/template.html
+    def generate_pdf(self, wkhtml_path: str or None, years_table_header, years_table) -> None:
+        """Создает pdf файл по пути {report_dir}/report.pdf. Если wkhtmltopdf есть, pdf создается из таблиц и шаблона
+        по пути template/template_years.html, иначе - внутри процесса средствами matplotlib (см. pdf_writer)
 
             Args:
-                wkhtml_path (str): Путь к модулю wkghtml
+                wkhtml_path (str or None): Путь к модулю wkghtml или None, чтобы не использовать его
         """
-        env = Environment(loader=FileSystemLoader('.'))
-        template = env.get_template('template/template_lite.html')
+        save_path = pth.normpath(pth.join(self.__report_dir, 'report.pdf'))
+        image_path = pth.join(self.__report_dir, 'graph.png')
+        native = wkhtml_path is None or not pth.exists(wkhtml_path)
+        files = [pth.abspath(pth.join(pth.dirname(__file__), 'pdf_writer.py'))] if native else \
+            [pth.join('template', 'template_years.html'), pth.join('template', 'style.css')]
+        self.__render_cached('pdf', save_path, [native, self.__prof_name, years_table_header, years_table],
+                             files + ([image_path] if pth.exists(image_path) else []),
+                             lambda path: self.__render_pdf(path, None if native else wkhtml_path,
+                                                            years_table_header, years_table))
 
-        pdf_template = template.render({
-            'first_table': years_table,
-            'first_table_header': years_table_header,
-            'prof_name': self.__prof_name,
-            'to_css': pth.abspath(pth.join('template', 'style.css')),
-            'to_img': pth.abspath(pth.join('report', 'graph.png'))
-        })
-        config = pdfkit.configuration(wkhtmltopdf=wkhtml_path)
-        save_path = pth.normpath(pth.join('report', 'report.pdf'))
-        if check_file('pdf', save_path):
-            pdfkit.from_string(pdf_template, save_path, configuration=config,
-                               options={"enable-local-file-access": ""})
+    def generate_all(self, years_table_header: List[Tuple], years_table: List[Tuple], salary_by_year: Dict[str, int],
+                     prof_salary_by_year: Dict[str, int], count_by_year: Dict[str, int],
+                     prof_count_by_year: Dict[str, int], wkhtml_path: str or None = None,
+                     executor: cf.Executor or Pool = None) -> None:
+        """Создает excel, изображение и pdf параллельно. Книга и графики строятся в отдельных процессах
+        (matplotlib не потокобезопасен), а pdf, которому нужны только таблица и готовое изображение, начинает
+        создаваться сразу после графиков, не дожидаясь excel. Общее время равно времени самой долгой цепочки,
+        а не сумме времени всех файлов.
+
+            Args:
+                years_table_header (List[Tuple]): Заголовок таблицы по годам
+                years_table (List[Tuple]): Строки таблицы по годам
+                salary_by_year (Dict[str, int]): З\п по годам
+                prof_salary_by_year (Dict[str, int]): З\п по професси по годам
+                count_by_year (Dict[str, int]): Количество вакансий по годам
+                prof_count_by_year (Dict[str, int]): Количество вакансий по профессии по годам
+                wkhtml_path (str or None): Путь к модулю wkghtml или None, чтобы создать pdf без него
+                executor (Executor or Pool): Пул процессов concurrent.futures или multiprocessing, например уже
+                    запущенный для подсчета статистики. Если не передан, создается пул на два процесса
+        """
+        own_executor = executor is None
+        executor = cf.ProcessPoolExecutor(max_workers=2) if own_executor else executor
+        try:
+            excel = submit(executor, render_artifact, self, 'generate_excel', years_table_header, years_table)
+            image = submit(executor, render_artifact, self, 'generate_image', salary_by_year, prof_salary_by_year,
+                           count_by_year, prof_count_by_year)
+            image.result()
+            pdf = submit(executor, render_artifact, self, 'generate_pdf', wkhtml_path, years_table_header,
+                         years_table)
+            for future in (excel, pdf):
+                future.result()
+        finally:
+            if own_executor:
+                executor.shutdown()
 
     def generate_years_table(self) -> (Tuple[str, str, str, str, str], List[Tuple[int, int, int, int, int]]):
         """Создает заголовок и генератор строк для количества вакансий и з\п по вакансиям и профессии по годам.
@@ -112,50 +134,95 @@ class Report:
                self.__count_by_year[i], self.__prof_count_by_year[i]) for i in years]
         return fth, ft
 
-    def __style_header(self, worksheet: Worksheet) -> None:
-        """Применяет стили шрифта и рамки для главной строки таблицы
+    def __render_cached(self, ext: str, save_path: str, data, files: List[str], render: Callable[[str], None]) -> None:
+        """Создает файл отчета через кэш: если файл с тем же ключом уже лежит по пути save_path, ничего не делает,
+        если он есть в кэше, копирует его из кэша, и только иначе вызывает render и сохраняет результат в кэш.
+        Файл создается рядом под временным именем и заменяет прежний файл отчета, поэтому повторный запуск с
+        другими данными перезаписывает отчет, а прерванный рендер не оставляет недописанный файл.
 
             Args:
-                worksheet (Worksheet): Страница excell
+                ext (str): Расширение файла
+                save_path (str): Путь к файлу отчета
+                data: Данные, из которых строится файл, для ключа кэша
+                files (List[str]): Шаблоны, стили и другие файлы, от которых зависит результат
+                render (Callable[[str], None]): Функция, которая создает файл по переданному пути
         """
-        for header in worksheet.iter_rows(min_row=1, max_row=1):
-            for cell in header:
-                cell.font = self.__font
-                cell.border = self.__border
+        key = RenderCache.key(ext, data, files + [pth.abspath(__file__)]) if self.__cache is not None else None
+        if key is not None and self.__cache.is_cached(key, save_path):
+            return
+        temp_path = f'{pth.splitext(save_path)[0]}.{os.getpid()}.tmp.{ext}'
+        check_file(ext, temp_path)
+        try:
+            if key is None or not self.__cache.fetch(key, temp_path):
+                render(temp_path)
+                if key is not None:
+                    self.__cache.store(key, temp_path)
+            os.replace(temp_path, save_path)
+        finally:
+            if pth.exists(temp_path):
+                os.remove(temp_path)
 
-    def __style_cells(self, worksheet: Worksheet) -> None:
-        """Применяет рамку и устанавливает ширину по максимално широкой ячейке для каждого столбца
+    def __render_excel(self, save_path: str, years_table_header: List[Tuple], years_table: List[Tuple]) -> None:
+        """Создает книгу excel с таблицей по годам и сохраняет ее"""
+        from excel_writer import StreamingWorkbook
 
-            Args:
-                worksheet (Worksheet): Страница excell
-        """
-        dims = []
-        for column in worksheet.columns:
-            max_width = 0
-            for cell in column:
-                if cell.value != " ":
-                    cell.border = self.__border
-                    if max_width < len(str(cell.value)):
-                        max_width = len(str(cell.value))
-            dims.append(max_width + 2)
-        for i, width in enumerate(dims):
-            worksheet.column_dimensions[get_column_letter(i + 1)].width = width
-
-    def __style_percent_column(self, worksheet: Worksheet, col_index: int) -> None:
-        """Применяет ко всем ячейкам столбца стиль процентный с двумя знаками после запятой
+        wk = StreamingWorkbook()
+        wk.add_sheet("Статистика по годам", years_table_header)
+        wk.extend(years_table)
+        wk.save(save_path)
 
-            Args:
-                worksheet (Worksheet): Страница excell
-                col_index (int): Индекс столбца
+    def __render_image(self, save_path: str, salary_by_year: Dict[str, int], prof_salary_by_year: Dict[str, int],
+                       count_by_year: Dict[str, int], prof_count_by_year: Dict[str, int]) -> None:
+        """Рисует графики и сохраняет их в png"""
+        from matplotlib import pyplot as plt
+
+        self.__generate_salary_diagram(salary_by_year, prof_salary_by_year)
+        self.__generate_vacancy_diagram(count_by_year, prof_count_by_year)
+        self.__fig.savefig(save_path)
+        plt.close(self.__fig)
+        self.__fig, self.__axs = None, None
+
+    def __render_pdf(self, save_path: str, wkhtml_path: str or None, years_table_header, years_table) -> None:
+        """Заполняет html шаблон и превращает его в pdf с помощью wkhtmltopdf, а без wkhtmltopdf рисует pdf
+        средствами matplotlib"""
+        if wkhtml_path is None:
+            from pdf_writer import write_pdf
+            write_pdf(save_path, f'Аналитика по зарплатам и городам для профессии {self.__prof_name}',
+                      pth.join(self.__report_dir, 'graph.png'),
+                      [('Статистика по годам', years_table_header, years_table)])
+            return
+        from jinja2 import Environment, FileSystemLoader
+        import pdfkit
+
+        env = Environment(loader=FileSystemLoader('.'))
+        template = env.get_template('template/template_years.html')
+
+        pdf_template = template.render({
+            'first_table': years_table,
+            'first_table_header': years_table_header,
+            'prof_name': self.__prof_name,
+            'to_css': pth.abspath(pth.join('template', 'style.css')),
+            'to_img': pth.abspath(pth.join(self.__report_dir, 'graph.png'))
+        })
+        config = pdfkit.configuration(wkhtmltopdf=wkhtml_path)
+        pdfkit.from_string(pdf_template, save_path, configuration=config,
+                           options={"enable-local-file-access": ""})
+
+    def __axes(self):
+        """Создает фигуру с четырьмя окнами для графиков при первом обращении. Пока изображение не нужно,
+        matplotlib не загружается и фигура не создается.
+
+            Returns:
+                ndarray: Окна фигуры 2x2
         """
-        for column in worksheet.iter_cols(col_index):
-            for cell in column:
-                cell.style = 'Percent'
-                cell.number_format = '0.00%'
+        if self.__fig is None:
+            from matplotlib import pyplot as plt
+            self.__fig, self.__axs = plt.subplots(2, 2, layout='tight', figsize=[10, 10])
+        return self.__axs
 
     def __generate_salary_diagram(self, salary_by_year: Dict[str, int], prof_salary_by_year: Dict[str, int]):
         """Создает диаграмму з\п по годам в первом окне"""
-        ax = self.__axs[0, 0]
+        ax = self.__axes()[0, 0]
         ax.set_title('Уровень зарплат по годам', fontsize=20)
         y_pos = range(len(salary_by_year.keys()))
         years = list(salary_by_year.keys())
@@ -171,7 +238,7 @@ class Report:
 
     def __generate_vacancy_diagram(self, count_by_year: Dict[str, int], prof_count_by_year: Dict[str, int]):
         """Создает диаграмму количества вакансий по годам во втором окне"""
-        ax = self.__axs[0, 1]
+        ax = self.__axes()[0, 1]
         y_pos = range(len(count_by_year.keys()))
         years = list(count_by_year.keys())
         salary_by_year = list(count_by_year.values())
@@ -186,6 +253,36 @@ class Report:
         ax.grid(axis='y')
 
 
+def render_artifact(report: Report, method: str, *args) -> None:
+    """Вызывает метод создания файла у копии отчета в процессе пула. Нужна, потому что в пул процессов можно
+    передать только функцию уровня модуля.
+
+        Args:
+            report (Report): Отчет
+            method (str): Название метода, например generate_image
+            args: Аргументы метода
+    """
+    getattr(report, method)(*args)
+
+
+def submit(executor: cf.Executor or Pool, fn: Callable, *args) -> cf.Future:
+    """Отправляет задачу в пул concurrent.futures или multiprocessing и возвращает Future в обоих случаях.
+
+        Args:
+            executor (Executor or Pool): Пул процессов
+            fn (Callable): Функция уровня модуля
+            args: Аргументы функции
+
+        Returns:
+            Future: Результат задачи
+    """
+    if isinstance(executor, cf.Executor):
+        return executor.submit(fn, *args)
+    future = cf.Future()
+    executor.apply_async(fn, args, callback=future.set_result, error_callback=future.set_exception)
+    return future
+
+
 def check_file(ext: str, dir_name: str) -> bool:
     """Проверяет, что названия файла имеет правильное расширение, в качестве пути к файлу передана строка,
         папка для файла существует и что файла с таким именем не существует
@@ -0,0 +1,236 @@
+import csv
+import io
+import os
+import time
+from typing import Iterator, List, NamedTuple, Tuple
+
+from main import DataSet, Vacancy
+from metrics import Metrics
+from stats import MultiStatistics, Statistics
+
+# Части меньше этого размера не выгодны: накладные расходы на задачу сравнимы со временем ее разбора
+MIN_CHUNK = 4 * 1024 * 1024
+# Сколько задач приходится на одного воркера: чем больше, тем ровнее нагрузка в конце
+TASKS_PER_WORKER = 4
+BLOCK = 1024 * 1024
+
+
+class Task(NamedTuple):
+    """Задача для воркера: байтовый диапазон csv файла, выровненный по границам записей.
+
+        Attributes:
+            file_name (str): Путь к csv файлу
+            start (int): Смещение начала диапазона
+            end (int): Смещение конца диапазона
+    """
+    file_name: str
+    start: int
+    end: int
+
+    @property
+    def size(self) -> int:
+        return self.end - self.start
+
+
+class Timing(NamedTuple):
+    """Время выполнения одной задачи.
+
+        Attributes:
+            task (Task): Задача
+            seconds (float): Время разбора в секундах
+            rows (int): Количество разобранных вакансий
+            metrics (Metrics): Время этапов и счетчики задачи
+    """
+    task: Task
+    seconds: float
+    rows: int
+    metrics: Metrics = None
+
+
+def plan_tasks(files: List[str], workers: int) -> List[Task]:
+    """Разбивает файлы на задачи по размеру в байтах. Файлы больше целевого размера задачи делятся на части
+    по границам записей. Задачи отсортированы от больших к меньшим, чтобы самые долгие стартовали первыми, а
+    мелкие заполняли простои в конце.
+
+        Args:
+            files (List[str]): Пути к csv файлам
+            workers (int): Количество воркеров
+
+        Returns:
+            List[Task]: Задачи в порядке убывания размера
+    """
+    sizes = {file_name: os.path.getsize(file_name) for file_name in files}
+    chunk = max(MIN_CHUNK, sum(sizes.values()) // (workers * TASKS_PER_WORKER) + 1)
+    tasks = []
+    for file_name, size in sizes.items():
+        parts = -(-size // chunk)
+        if parts <= 1:
+            tasks.append(Task(file_name, 0, size))
+            continue
+        bounds = [0] + find_boundaries(file_name, [size * i // parts for i in range(1, parts)]) + [size]
+        tasks += [Task(file_name, start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+    return sorted(tasks, key=lambda task: task.size, reverse=True)
+
+
+def find_boundaries(file_name: str, offsets: List[int]) -> List[int]:
+    """Для каждого смещения находит ближайшее начало записи csv после него. Перевод строки считается концом
+    записи, только если до него прочитано четное число кавычек, поэтому многострочные поля в кавычках
+    (например, описания вакансий) не разрываются.
+
+        Args:
+            file_name (str): Путь к csv файлу
+            offsets (List[int]): Смещения в порядке возрастания
+
+        Returns:
+            List[int]: Смещения начал записей, без повторов
+    """
+    boundaries = []
+    targets = iter(offsets)
+    target = next(targets, None)
+    quotes = 0
+    position = 0
+    with open(file_name, 'rb') as file:
+        while target is not None:
+            block = file.read(BLOCK)
+            if not block:
+                break
+            index = 0
+            while target is not None:
+                newline = block.find(b'\n', max(index, target - position))
+                if newline == -1:
+                    break
+                quotes += block.count(b'"', index, newline)
+                index = newline + 1
+                if quotes % 2 == 0:
+                    boundary = position + newline + 1
+                    if len(boundaries) == 0 or boundaries[-1] != boundary:
+                        boundaries.append(boundary)
+                    while target is not None and target < boundary:
+                        target = next(targets, None)
+            quotes += block.count(b'"', index)
+            position += len(block)
+    return boundaries
+
+
+def read_header(file_name: str) -> List[str]:
+    """Читает заголовок csv файла"""
+    with open(file_name, encoding='utf-8') as file:
+        return next(csv.reader(file), [])
+
+
+def iter_task(task: Task, metrics: Metrics = None) -> Iterator[Vacancy]:
+    """Возвращает вакансии из байтового диапазона файла.
+
+        Args:
+            task (Task): Задача
+            metrics (Metrics): Метрики для времени этапов и счетчиков или None
+
+        Returns:
+            Iterator[Vacancy]: Итератор по вакансиям диапазона
+    """
+    started = time.perf_counter()
+    header = read_header(task.file_name)
+    with open(task.file_name, 'rb') as file:
+        file.seek(task.start)
+        text = file.read(task.size).decode('utf-8-sig' if task.start == 0 else 'utf-8')
+    if metrics is not None:
+        metrics.add_time('read', time.perf_counter() - started)
+        metrics.count('bytes', task.size)
+    reader = csv.reader(io.StringIO(text, newline=''))
+    if task.start == 0:
+        next(reader, None)
+    return DataSet(_to_show='Статистика').iter_rows(header, reader, metrics)
+
+
+def collect_task(task: Task, prof_name: str, top_cities: int = None, quantiles: bool = False,
+                 distinct: bool = False) -> Tuple[Statistics, Timing]:
+    """Map-шаг для одной задачи: считает частичные агрегаты по байтовому диапазону файла. Вызывается в
+    процессах-воркерах.
+
+        Args:
+            task (Task): Задача
+            prof_name (str): Профессия
+            top_cities (int or None): Сколько городов отслеживать в SpaceSaving или None, чтобы считать все
+            quantiles (bool): Считать ли скетчи квантилей з\\п
+            distinct (bool): Считать ли количество различных компаний и названий вакансий
+
+        Returns:
+            Tuple[Statistics, Timing]: Агрегаты по диапазону и время его разбора с метриками этапов
+    """
+    statistics = Statistics(prof_name, top_cities=top_cities, quantiles=quantiles, distinct=distinct)
+    return statistics, collect_into(task, statistics)
+
+
+def collect_task_many(task: Task, prof_names: List[str], top_cities: int = None, quantiles: bool = False,
+                      distinct: bool = False) -> Tuple[MultiStatistics, Timing]:
+    """То же, что collect_task, но сразу для нескольких профессий за один проход по диапазону.
+
+        Args:
+            task (Task): Задача
+            prof_names (List[str]): Профессии
+            top_cities (int or None): Сколько городов отслеживать в SpaceSaving или None, чтобы считать все
+            quantiles (bool): Считать ли скетчи квантилей з\\п
+            distinct (bool): Считать ли количество различных компаний и названий вакансий
+
+        Returns:
+            Tuple[MultiStatistics, Timing]: Агрегаты по диапазону и время его разбора с метриками этапов
+    """
+    statistics = MultiStatistics(prof_names, top_cities=top_cities, quantiles=quantiles, distinct=distinct)
+    return statistics, collect_into(task, statistics)
+
+
+def collect_into(task: Task, statistics: Statistics or MultiStatistics) -> Timing:
+    """Добавляет вакансии диапазона в агрегаты и замеряет этапы read, parse, clean, convert и aggregate.
+
+        Args:
+            task (Task): Задача
+            statistics (Statistics or MultiStatistics): Агрегаты, в которые добавляются вакансии
+
+        Returns:
+            Timing: Время разбора диапазона с метриками этапов
+    """
+    started = time.perf_counter()
+    metrics = Metrics()
+    clock = time.perf_counter
+    aggregate = 0.0
+    rows = 0
+    for vacancy in iter_task(task, metrics):
+        aggregate_started = clock()
+        statistics.add(vacancy)
+        aggregate += clock() - aggregate_started
+        rows += 1
+    metrics.add_time('aggregate', aggregate, rows)
+    metrics.count('tasks')
+    return Timing(task, time.perf_counter() - started, rows, metrics)
+
+
+def parse_task(task: Task) -> List[Tuple[str, int, str, float, str, str]]:
+    """Разбирает байтовый диапазон файла и сжимает вакансии до полей, нужных для статистики. Такие записи
+    не зависят от профессии, поэтому их можно держать в памяти и считать по ним статистику для любой профессии
+    без повторного разбора csv.
+
+        Args:
+            task (Task): Задача
+
+        Returns:
+            List[Tuple[str, int, str, float, str, str]]: Записи (название, год, город, средняя з\\п в рублях, компания,
+                месяц)
+    """
+    return [(vacancy.name, int(vacancy.year), vacancy.area_name, vacancy.salary.get_middle_salary_rub(),
+             vacancy.employer_name, vacancy.published_at[:7]) for vacancy in iter_task(task)]
+
+
+def print_timings(timings: List[Timing], wall: float, top: int = 10) -> None:
+    """Печатает самые долгие задачи и общее время, чтобы были видны отстающие.
+
+        Args:
+            timings (List[Timing]): Время выполнения задач
+            wall (float): Общее время обработки в секундах
+            top (int): Сколько самых долгих задач показать
+    """
+    busy = sum(timing.seconds for timing in timings)
+    print(f'Задач: {len(timings)}, общее время: {wall:.2f} c, суммарное время воркеров: {busy:.2f} c')
+    for timing in sorted(timings, key=lambda t: t.seconds, reverse=True)[:top]:
+        task = timing.task
+        print(f'{timing.seconds:8.2f} c  {task.size / 1024 / 1024:8.1f} МБ  {timing.rows:9} строк  '
+              f'{os.path.basename(task.file_name)} [{task.start}:{task.end}]')
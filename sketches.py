@@ -0,0 +1,357 @@
+import hashlib
+import math
+import random
+from typing import Dict, List, Sequence, Tuple
+
+# Квантили з\п, которые показываются в отчетах: медиана, p90 и p99
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class KLLSketch:
+    """Скетч KLL для приближенных квантилей потока чисел. Хранит не больше O(k) значений независимо от длины
+    потока: значения копятся на уровне 0, а переполненный уровень сортируется и отдает на следующий уровень каждое
+    второе значение, которое дальше весит вдвое больше. Два скетча объединяются слиянием уровней, поэтому квантили
+    по частям данных из разных процессов складываются так же, как суммы и количества. Ошибка ранга порядка 1.7 / k
+    и не зависит от того, как данные были разбиты на части.
+
+        Attributes:
+            k (int): Вместимость верхнего уровня, задает точность
+            levels (List[List[float]]): Значения по уровням, значение уровня h весит 2 ** h
+            count (int): Количество добавленных значений
+    """
+
+    def __init__(self, k: int = 200):
+        """Инициализирует пустой скетч.
+
+            Args:
+                k (int): Вместимость верхнего уровня
+        """
+        self.k = k
+        self.levels: List[List[float]] = [[]]
+        self.count = 0
+        self.__size = 0
+        self.__max_size = self.__capacity(0)
+
+    def __capacity(self, level: int) -> int:
+        """Вместимость уровня: верхний вмещает k значений, каждый следующий вниз - в 3/2 раза меньше"""
+        return int(math.ceil(self.k * (2 / 3) ** (len(self.levels) - level - 1))) + 1
+
+    def add(self, value: float) -> None:
+        """Добавляет значение в скетч.
+
+            Args:
+                value (float): Значение
+        """
+        self.levels[0].append(value)
+        self.count += 1
+        self.__size += 1
+        if self.__size >= self.__max_size:
+            self.__compress()
+
+    def merge(self, other: 'KLLSketch') -> 'KLLSketch':
+        """Добавляет к скетчу значения другого скетча.
+
+            Args:
+                other (KLLSketch): Скетч по другой части данных
+
+            Returns:
+                KLLSketch: self, чтобы merge можно было передать в functools.reduce
+        """
+        while len(self.levels) < len(other.levels):
+            self.__grow()
+        for level, values in enumerate(other.levels):
+            self.levels[level].extend(values)
+        self.count += other.count
+        self.__size = sum(map(len, self.levels))
+        while self.__size >= self.__max_size:
+            self.__compress()
+        return self
+
+    def quantiles(self, fractions: Sequence[float] = QUANTILES) -> List[float]:
+        """Считает приближенные квантили.
+
+            Args:
+                fractions (Sequence[float]): Доли от 0 до 1 в порядке возрастания
+
+            Returns:
+                List[float]: Квантили в том же порядке или пустой список, если значений не было
+        """
+        if self.count == 0:
+            return []
+        weighted = sorted((value, 1 << level) for level, values in enumerate(self.levels) for value in values)
+        total = sum(weight for value, weight in weighted)
+        result = []
+        cumulative, index = 0, 0
+        for fraction in fractions:
+            while index < len(weighted) - 1 and cumulative + weighted[index][1] < fraction * total:
+                cumulative += weighted[index][1]
+                index += 1
+            result.append(weighted[index][0])
+        return result
+
+    def __grow(self) -> None:
+        """Добавляет уровень сверху и пересчитывает общую вместимость"""
+        self.levels.append([])
+        self.__max_size = sum(self.__capacity(level) for level in range(len(self.levels)))
+
+    def __compress(self) -> None:
+        """Уплотняет переполненные уровни снизу вверх, пока значений не станет меньше общей вместимости"""
+        for level in range(len(self.levels)):
+            values = self.levels[level]
+            if len(values) < self.__capacity(level):
+                continue
+            if level + 1 == len(self.levels):
+                self.__grow()
+            values.sort()
+            # При нечетном количестве наибольшее значение остается на уровне, чтобы вес не терялся
+            keep = [values.pop()] if len(values) % 2 else []
+            self.levels[level + 1].extend(values[random.getrandbits(1)::2])
+            self.levels[level] = keep
+            self.__size = sum(map(len, self.levels))
+            if self.__size < self.__max_size:
+                break
+
+
+def add_value(sketches: Dict, key, value: float, k: int = 200) -> None:
+    """Добавляет значение в скетч по ключу, создавая скетч при первом значении.
+
+        Args:
+            sketches (Dict): Словарь KLLSketch по ключам
+            key: Год или город
+            value (float): Значение
+            k (int): Точность нового скетча
+    """
+    sketch = sketches.get(key)
+    if sketch is None:
+        sketch = sketches[key] = KLLSketch(k)
+    sketch.add(value)
+
+
+def merge_into(target: Dict, source: Dict) -> None:
+    """Сливает словарь скетчей source в target по ключам. Скетчи source не изменяются и не разделяются с target"""
+    for key, sketch in source.items():
+        if key not in target:
+            target[key] = KLLSketch(sketch.k)
+        target[key].merge(sketch)
+
+
+# Точность HyperLogLog по умолчанию: 2 ** 12 регистров, стандартная ошибка 1.04 / 64, около 1.6%
+HLL_PRECISION = 12
+
+
+class HyperLogLog:
+    """HyperLogLog для приближенного количества различных значений. Значение хэшируется в 64 бита: первые precision
+    бит выбирают регистр, а в регистре хранится максимальная позиция первой единицы в остальных битах. Стандартная
+    ошибка оценки 1.04 / sqrt(2 ** precision) и не зависит от количества значений, а память - не больше 2 ** precision
+    байт. Хэш не зависит от процесса, поэтому скетчи из разных воркеров и файлов объединяются через merge поэлементным
+    максимумом регистров, как если бы значения добавлялись в один скетч. Пока заполненных регистров мало, они хранятся
+    в словаре, поэтому небольшие группы (города с парой вакансий) почти не занимают памяти.
+
+        Attributes:
+            precision (int): Количество бит индекса регистра, от 4 до 16
+            registers (Dict[int, int] or bytearray): Регистры: словарь заполненных регистров или массив всех
+    """
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        """Инициализирует пустой скетч.
+
+            Args:
+                precision (int): Количество бит индекса регистра, от 4 до 16
+        """
+        if not 4 <= precision <= 16:
+            raise ValueError('Точность HyperLogLog должна быть от 4 до 16')
+        self.precision = precision
+        self.registers: Dict[int, int] or bytearray = {}
+
+    @property
+    def error(self) -> float:
+        """Стандартная относительная ошибка оценки"""
+        return 1.04 / math.sqrt(1 << self.precision)
+
+    @staticmethod
+    def hash(value: str) -> int:
+        """64-битный хэш строки, одинаковый во всех процессах, в отличие от встроенного hash"""
+        return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+    def add(self, value: str) -> None:
+        """Добавляет значение в скетч.
+
+            Args:
+                value (str): Значение, например название компании
+        """
+        self.add_hash(HyperLogLog.hash(value))
+
+    def add_hash(self, hashed: int) -> None:
+        """Добавляет значение по уже посчитанному хэшу, чтобы одно значение можно было добавить в несколько скетчей
+        с одним хэшированием.
+
+            Args:
+                hashed (int): Хэш значения из HyperLogLog.hash
+        """
+        bits = 64 - self.precision
+        index = hashed >> bits
+        rank = bits - (hashed & ((1 << bits) - 1)).bit_length() + 1
+        registers = self.registers
+        if isinstance(registers, dict):
+            if registers.get(index, 0) < rank:
+                registers[index] = rank
+                if len(registers) > (1 << self.precision) >> 6:
+                    self.__to_dense()
+        elif registers[index] < rank:
+            registers[index] = rank
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        """Добавляет к скетчу значения другого скетча.
+
+            Args:
+                other (HyperLogLog): Скетч по другой части данных с той же точностью
+
+            Returns:
+                HyperLogLog: self, чтобы merge можно было передать в functools.reduce
+        """
+        if other.precision != self.precision:
+            raise ValueError('Нельзя объединить HyperLogLog разной точности')
+        items = other.registers.items() if isinstance(other.registers, dict) else \
+            ((index, rank) for index, rank in enumerate(other.registers) if rank != 0)
+        if isinstance(self.registers, dict) and not isinstance(other.registers, dict):
+            self.__to_dense()
+        registers = self.registers
+        if isinstance(registers, dict):
+            for index, rank in items:
+                if registers.get(index, 0) < rank:
+                    registers[index] = rank
+            if len(registers) > (1 << self.precision) >> 6:
+                self.__to_dense()
+        else:
+            for index, rank in items:
+                if registers[index] < rank:
+                    registers[index] = rank
+        return self
+
+    def count(self) -> int:
+        """Оценивает количество различных значений. Для малых количеств, пока есть пустые регистры, используется
+        линейный подсчет по доле пустых регистров, он точнее основной оценки.
+
+            Returns:
+                int: Приближенное количество различных значений
+        """
+        m = 1 << self.precision
+        ranks = list(self.registers.values()) if isinstance(self.registers, dict) else \
+            [rank for rank in self.registers if rank != 0]
+        zeros = m - len(ranks)
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+        estimate = alpha * m * m / (zeros + sum(2.0 ** -rank for rank in ranks))
+        if estimate <= 2.5 * m and zeros != 0:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def __to_dense(self) -> None:
+        """Переводит регистры из словаря в массив"""
+        registers = bytearray(1 << self.precision)
+        for index, rank in self.registers.items():
+            registers[index] = rank
+        self.registers = registers
+
+
+class SpaceSaving:
+    """Алгоритм Space-Saving для самых частых значений потока в ограниченной памяти. Отслеживается не больше capacity
+    значений. Новое значение при заполненной таблице вытесняет значение с наименьшим счетчиком и наследует его
+    счетчик как погрешность. Для каждого значения верно count - error <= настоящее количество <= count, а
+    error <= total / capacity, поэтому любое значение с долей больше 1 / capacity гарантированно в таблице. Скетчи
+    объединяются через merge (mergeable summaries): отсутствующему в одной таблице значению прибавляется минимальный
+    счетчик заполненной таблицы. Для каждого значения также копится сумма з\\п с момента, как оно попало в таблицу.
+
+        Attributes:
+            capacity (int): Наибольшее количество отслеживаемых значений
+            total (int): Количество добавленных значений
+            counters (Dict[str, List[int, int, float, int]]): [count, error, сумма з\\п, количество з\\п] по значениям
+    """
+
+    def __init__(self, capacity: int):
+        """Инициализирует пустой скетч.
+
+            Args:
+                capacity (int): Наибольшее количество отслеживаемых значений
+        """
+        if capacity < 1:
+            raise ValueError('Вместимость SpaceSaving должна быть положительной')
+        self.capacity = capacity
+        self.total = 0
+        self.counters: Dict[str, List] = {}
+        self.__buckets: Dict[int, set] = {}
+        self.__min = 0
+
+    def add(self, item: str, salary: float = 0.0) -> str or None:
+        """Добавляет значение в скетч. Значения с одинаковым счетчиком лежат в одной корзине, поэтому и
+        увеличение счетчика, и вытеснение наименьшего занимают O(1).
+
+            Args:
+                item (str): Значение, например город
+                salary (float): З\\п вакансии
+
+            Returns:
+                str or None: Вытесненное значение, если новое значение заняло его место
+        """
+        self.total += 1
+        buckets = self.__buckets
+        counter = self.counters.get(item)
+        victim = None
+        if counter is None:
+            if len(self.counters) < self.capacity:
+                counter = self.counters[item] = [0, 0, 0.0, 0]
+                self.__min = 0
+            else:
+                victim = buckets[self.__min].pop()
+                if len(buckets[self.__min]) == 0:
+                    del buckets[self.__min]
+                del self.counters[victim]
+                counter = self.counters[item] = [self.__min, self.__min, 0.0, 0]
+        else:
+            bucket = buckets[counter[0]]
+            bucket.discard(item)
+            if len(bucket) == 0:
+                del buckets[counter[0]]
+        counter[0] += 1
+        counter[2] += salary
+        counter[3] += 1
+        buckets.setdefault(counter[0], set()).add(item)
+        if self.__min not in buckets:
+            self.__min = counter[0] if len(buckets) == 1 else min(self.__min + 1, counter[0])
+        return victim
+
+    def merge(self, other: 'SpaceSaving') -> 'SpaceSaving':
+        """Добавляет к скетчу значения другого скетча. Оценки остаются в тех же границах для суммарного потока.
+
+            Args:
+                other (SpaceSaving): Скетч по другой части данных
+
+            Returns:
+                SpaceSaving: self, чтобы merge можно было передать в functools.reduce
+        """
+        own_min = self.__min if len(self.counters) >= self.capacity else 0
+        other_min = other.__min if len(other.counters) >= other.capacity else 0
+        merged = {}
+        for item in set(self.counters) | set(other.counters):
+            own = self.counters.get(item, [own_min, own_min, 0.0, 0])
+            theirs = other.counters.get(item, [other_min, other_min, 0.0, 0])
+            merged[item] = [own[0] + theirs[0], own[1] + theirs[1], own[2] + theirs[2], own[3] + theirs[3]]
+        kept = sorted(merged.items(), key=lambda pair: (-pair[1][0], pair[0]))[:self.capacity]
+        self.counters = dict(kept)
+        self.total += other.total
+        self.__buckets = {}
+        for item, counter in self.counters.items():
+            self.__buckets.setdefault(counter[0], set()).add(item)
+        self.__min = min(self.__buckets, default=0)
+        return self
+
+    def top(self, k: int) -> List[Tuple[str, int, int]]:
+        """Возвращает k значений с наибольшими счетчиками, при равных - по алфавиту.
+
+            Args:
+                k (int): Количество значений
+
+            Returns:
+                List[Tuple[str, int, int]]: (значение, count, error) в порядке убывания count
+        """
+        top = sorted(self.counters.items(), key=lambda pair: (-pair[1][0], pair[0]))[:k]
+        return [(item, count, error) for item, (count, error, salary, observed) in top]
@@ -0,0 +1,488 @@
+from typing import Dict, List, Tuple
+
+from main import DataSet, Vacancy
+from matcher import AhoCorasick
+from sketches import HLL_PRECISION, QUANTILES, HyperLogLog, KLLSketch, SpaceSaving, add_value, merge_into
+
+
+class BaseStatistics:
+    """Общие для Statistics и MultiStatistics частичные агрегаты, которые не зависят от профессий: сумма з\\п и
+    количество вакансий по годам, по городам и по месяцам, скетчи квантилей и различных значений. В отличие от
+    средних, суммы и количества можно складывать, поэтому статистики по любым частям данных (файлам, нескольким
+    частям одного года, произвольным шардам) объединяются через merge без потерь. Агрегаты по профессиям
+    добавляют наследники в add_professions и merge_professions.
+
+        Attributes:
+            by_year (Dict[int, List[float, int]]): [сумма з\\п, количество] по годам
+            by_city (Dict[str, List[float, int]]): [сумма з\\п, количество] по городам
+            by_month (Dict[str, List[float, int]]): [сумма з\\п, количество] по месяцам YYYY-MM
+            quantiles (bool): Считать ли скетчи квантилей. Без них add_record только складывает суммы и
+                количества, а скетчи остаются пустыми
+            quantiles_by_year (Dict[int, KLLSketch]): Скетчи квантилей з\\п по годам. Как и суммы, скетчи
+                объединяются через merge, а память на каждый не зависит от количества вакансий
+            quantiles_by_city (Dict[str, KLLSketch]): Скетчи квантилей з\\п по городам
+            distinct (bool): Считать ли скетчи различных компаний и названий вакансий
+            precision (int): Точность HyperLogLog
+            distinct_by_year (Dict[int, List[HyperLogLog, HyperLogLog]]): [компании, названия вакансий] по годам
+                для приближенного количества различных значений
+            distinct_by_city (Dict[str, List[HyperLogLog, HyperLogLog]]): [компании, названия вакансий] по городам
+            city_counts (SpaceSaving or None): Приближенные количества и з\\п по самым частым городам. Если задан,
+                by_city не заполняется, а quantiles_by_city и distinct_by_city хранятся только для городов в
+                таблице SpaceSaving и считаются с момента, как город в нее попал, поэтому память на города
+                ограничена
+    """
+
+    def __init__(self, precision: int = HLL_PRECISION, top_cities: int = None, quantiles: bool = False,
+                 distinct: bool = False):
+        """Инициализирует пустые агрегаты.
+
+            Args:
+                precision (int): Точность HyperLogLog, ошибка количества различных значений 1.04 / sqrt(2 ** precision)
+                top_cities (int or None): Сколько городов отслеживать в SpaceSaving вместо всех городов. Города с долей
+                    больше 1 / top_cities гарантированно попадают в топ, погрешность количества не больше
+                    количества вакансий / top_cities. None - считать все города точно
+                quantiles (bool): Считать ли скетчи квантилей з\\п. Каждая вакансия добавляется в несколько
+                    скетчей, что в разы дороже сложения сумм, поэтому по умолчанию квантили не считаются
+                distinct (bool): Считать ли количество различных компаний и названий вакансий. Это два хэша и
+                    четыре обновления HyperLogLog на вакансию, поэтому по умолчанию тоже выключено
+        """
+        self.by_year: Dict[int, List] = {}
+        self.by_city: Dict[str, List] = {}
+        self.by_month: Dict[str, List] = {}
+        self.quantiles = quantiles
+        self.quantiles_by_year: Dict[int, KLLSketch] = {}
+        self.quantiles_by_city: Dict[str, KLLSketch] = {}
+        self.distinct = distinct
+        self.precision = precision
+        self.distinct_by_year: Dict[int, List] = {}
+        self.distinct_by_city: Dict[str, List] = {}
+        self.city_counts = SpaceSaving(top_cities) if top_cities is not None else None
+
+    def add(self, vacancy: Vacancy) -> None:
+        """Учитывает вакансию в агрегатах.
+
+            Args:
+                vacancy (Vacancy): Вакансия
+        """
+        self.add_record(vacancy.name, int(vacancy.year), vacancy.area_name, vacancy.salary.get_middle_salary_rub(),
+                        vacancy.employer_name, vacancy.published_at[:7])
+
+    def add_record(self, name: str, year: int, area_name: str, salary: float, employer_name: str = None,
+                   month: str = None) -> None:
+        """Учитывает вакансию, уже сжатую до нужных для статистики полей (см. scheduler.parse_task).
+
+            Args:
+                name (str): Название вакансии
+                year (int): Год публикации
+                area_name (str): Город
+                salary (float): Средняя з\\п в рублях
+                employer_name (str or None): Компания, если она есть в csv
+                month (str or None): Месяц публикации в формате YYYY-MM
+        """
+        add_to(self.by_year, year, salary, 1)
+        if month is not None:
+            add_to(self.by_month, month, salary, 1)
+        if self.city_counts is None:
+            add_to(self.by_city, area_name, salary, 1)
+        else:
+            forget_city(self, self.city_counts.add(area_name, salary))
+        if self.quantiles:
+            add_value(self.quantiles_by_year, year, salary)
+            add_value(self.quantiles_by_city, area_name, salary)
+        if self.distinct:
+            add_distinct(self, year, area_name, name, employer_name)
+        self.add_professions(name, year, salary, month)
+
+    def add_professions(self, name: str, year: int, salary: float, month: str or None) -> None:
+        """Учитывает вакансию в агрегатах профессий, если ее название подходит. Вызывается из add_record.
+
+            Args:
+                name (str): Название вакансии
+                year (int): Год публикации
+                salary (float): Средняя з\\п в рублях
+                month (str or None): Месяц публикации в формате YYYY-MM
+        """
+        raise NotImplementedError
+
+    def merge(self, other: 'BaseStatistics') -> 'BaseStatistics':
+        """Добавляет к агрегатам агрегаты другой части данных.
+
+            Args:
+                other (BaseStatistics): Статистика того же вида по другой части данных
+
+            Returns:
+                BaseStatistics: self, чтобы merge можно было передать в functools.reduce
+        """
+        for target, source in ((self.by_year, other.by_year), (self.by_city, other.by_city),
+                               (self.by_month, other.by_month)):
+            merge_sums(target, source)
+        merge_into(self.quantiles_by_year, other.quantiles_by_year)
+        merge_into(self.quantiles_by_city, other.quantiles_by_city)
+        merge_distinct(self.distinct_by_year, other.distinct_by_year)
+        merge_distinct(self.distinct_by_city, other.distinct_by_city)
+        if self.city_counts is not None:
+            self.city_counts.merge(other.city_counts)
+            for city in set(self.quantiles_by_city) - set(self.city_counts.counters):
+                forget_city(self, city)
+        self.merge_professions(other)
+        return self
+
+    def merge_professions(self, other: 'BaseStatistics') -> None:
+        """Добавляет агрегаты профессий другой части данных. Вызывается из merge"""
+        raise NotImplementedError
+
+    def salary_by_year(self) -> Dict[int, int]:
+        """Средняя з\\п по годам в порядке возрастания года"""
+        return {year: int(salary // count) for year, (salary, count) in sorted(self.by_year.items())}
+
+    def vacancies_by_year(self) -> Dict[int, int]:
+        """Количество вакансий по годам в порядке возрастания года"""
+        return {year: count for year, (salary, count) in sorted(self.by_year.items())}
+
+    def salary_quantiles_by_year(self) -> Dict[int, Tuple[int, ...]]:
+        """Медиана, p90 и p99 з\\п по годам в порядке возрастания года"""
+        return quantiles(self.quantiles_by_year, sorted(self.by_year))
+
+    def salary_quantiles_by_city(self, cities: List[str]) -> Dict[str, Tuple[int, ...]]:
+        """Медиана, p90 и p99 з\\п по городам.
+
+            Args:
+                cities (List[str]): Города, например из топа cities()
+
+            Returns:
+                Dict[str, Tuple[int, ...]]: Квантили з\\п по городам в том же порядке
+        """
+        return quantiles(self.quantiles_by_city, cities)
+
+    def distinct_by_year_counts(self) -> Dict[int, Tuple[int, int]]:
+        """Приближенное количество различных компаний и названий вакансий по годам в порядке возрастания года"""
+        return distinct_counts(self.distinct_by_year, sorted(self.by_year))
+
+    def distinct_by_city_counts(self, cities: List[str]) -> Dict[str, Tuple[int, int]]:
+        """Приближенное количество различных компаний и названий вакансий по городам.
+
+            Args:
+                cities (List[str]): Города, например из топа cities()
+
+            Returns:
+                Dict[str, Tuple[int, int]]: (компании, названия вакансий) по городам в том же порядке
+        """
+        return distinct_counts(self.distinct_by_city, cities)
+
+    def cities(self) -> Tuple[Dict[str, int], Dict[str, float]]:
+        """Считает топ-10 городов по средней з\\п и по доле вакансий. Как и в InputConnect.clear_by_city, города
+        с долей вакансий меньше 0.01 не учитываются. При равных значениях города идут по алфавиту, чтобы топ не
+        зависел от того, на какие части были разбиты данные. Если города считаются через SpaceSaving, доли
+        приближенные, а средняя з\\п считается по вакансиям с момента, как город попал в таблицу.
+
+            Returns:
+                Tuple[\n
+                    Dict[str, int]: Средняя з\\п по городам в порядке убывания\n
+                    Dict[str, float]: Доля вакансий по городам в порядке убывания\n
+                ]
+        """
+        if self.city_counts is None:
+            all_count = sum(count for salary, count in self.by_city.values())
+            by_city = {city: (salary, count, count) for city, (salary, count) in self.by_city.items()}
+        else:
+            all_count = self.city_counts.total
+            by_city = {city: (salary, observed, count)
+                       for city, (count, error, salary, observed) in self.city_counts.counters.items()}
+        big_cities = {city: value for city, value in by_city.items() if value[2] / all_count >= 0.01}
+        salary_by_city = sorted(((city, int(salary // observed)) for city, (salary, observed, count)
+                                 in big_cities.items()), key=lambda item: (-item[1], item[0]))[:10]
+        vacancies_by_city = sorted(((city, count / all_count) for city, (salary, observed, count)
+                                    in big_cities.items()), key=lambda item: (-item[1], item[0]))[:10]
+        return dict(salary_by_city), {city: float('{:.4f}'.format(share)) for city, share in vacancies_by_city}
+
+
+class Statistics(BaseStatistics):
+    """Частичные агрегаты по вакансиям для одной профессии: общие агрегаты BaseStatistics и сумма з\\п и
+    количество вакансий по годам и по месяцам для профессии.
+
+        Attributes:
+            prof_name (str): Профессия
+            prof_by_year (Dict[int, List[float, int]]): [сумма з\\п, количество] по годам для профессии
+            prof_by_month (Dict[str, List[float, int]]): [сумма з\\п, количество] по месяцам для профессии
+            prof_quantiles_by_year (Dict[int, KLLSketch]): Скетчи квантилей з\\п по годам для профессии
+    """
+
+    def __init__(self, prof_name: str, precision: int = HLL_PRECISION, top_cities: int = None,
+                 quantiles: bool = False, distinct: bool = False):
+        """Инициализирует пустой объект Statistics.
+
+            Args:
+                prof_name (str): Профессия
+                precision (int): Точность HyperLogLog, см. BaseStatistics
+                top_cities (int or None): Сколько городов отслеживать в SpaceSaving, см. BaseStatistics
+                quantiles (bool): Считать ли скетчи квантилей з\\п, см. BaseStatistics
+                distinct (bool): Считать ли количество различных значений, см. BaseStatistics
+        """
+        super().__init__(precision, top_cities, quantiles, distinct)
+        self.prof_name = prof_name
+        self.prof_by_year: Dict[int, List] = {}
+        self.prof_by_month: Dict[str, List] = {}
+        self.prof_quantiles_by_year: Dict[int, KLLSketch] = {}
+
+    def add_professions(self, name: str, year: int, salary: float, month: str or None) -> None:
+        if self.prof_name in name:
+            add_to(self.prof_by_year, year, salary, 1)
+            if self.quantiles:
+                add_value(self.prof_quantiles_by_year, year, salary)
+            if month is not None:
+                add_to(self.prof_by_month, month, salary, 1)
+
+    def merge_professions(self, other: 'Statistics') -> None:
+        merge_sums(self.prof_by_year, other.prof_by_year)
+        merge_sums(self.prof_by_month, other.prof_by_month)
+        merge_into(self.prof_quantiles_by_year, other.prof_quantiles_by_year)
+
+    def prof_salary_by_year(self) -> Dict[int, int]:
+        """Средняя з\\п по годам для профессии. Годы, в которые вакансий профессии не было, заполнены нулями"""
+        return {year: int(self.prof_by_year[year][0] // self.prof_by_year[year][1])
+                if year in self.prof_by_year else 0 for year in sorted(self.by_year)}
+
+    def prof_vacancies_by_year(self) -> Dict[int, int]:
+        """Количество вакансий по годам для профессии. Годы, в которые вакансий профессии не было, заполнены
+        нулями"""
+        return {year: self.prof_by_year[year][1] if year in self.prof_by_year else 0 for year in sorted(self.by_year)}
+
+    def prof_salary_quantiles_by_year(self) -> Dict[int, Tuple[int, ...]]:
+        """Медиана, p90 и p99 з\\п по годам для профессии. Годы, в которые вакансий профессии не было, заполнены
+        нулями"""
+        return quantiles(self.prof_quantiles_by_year, sorted(self.by_year))
+
+    def quantiles_table(self) -> (Tuple[str, ...], List[Tuple[int, ...]]):
+        """Создает заголовок и строки таблицы квантилей з\\п по годам для всех вакансий и для профессии.
+
+            Returns:
+                Tuple[
+                    Tuple[str, ...]: Заголовок,
+                    List[Tuple[int, ...]]: Строки таблицы
+                ]
+        """
+        header = ('Год', 'Медиана зарплаты', 'p90 зарплаты', 'p99 зарплаты', f'Медиана зарплаты - {self.prof_name}',
+                  f'p90 зарплаты - {self.prof_name}', f'p99 зарплаты - {self.prof_name}')
+        overall, prof = self.salary_quantiles_by_year(), self.prof_salary_quantiles_by_year()
+        return header, [(year,) + overall[year] + prof[year] for year in overall]
+
+    def years_table(self) -> (Tuple[str, str, str, str, str], List[Tuple[int, int, int, int, int]]):
+        """Создает заголовок и строки таблицы по годам в том же виде, что и Report.generate_years_table.
+
+            Returns:
+                Tuple[
+                    Tuple[str, str, str, str, str]: Заголовок,
+                    List[Tuple[int, int, int, int, int]]: Строки таблицы
+                ]
+        """
+        header = ('Год', 'Средняя зарплата', f'Средняя зарплата - {self.prof_name}', 'Количество вакансий',
+                  f'Количество вакансий - {self.prof_name}')
+        salary, count = self.salary_by_year(), self.vacancies_by_year()
+        prof_salary, prof_count = self.prof_salary_by_year(), self.prof_vacancies_by_year()
+        return header, [(year, salary[year], prof_salary[year], count[year], prof_count[year]) for year in salary]
+
+
+class MultiStatistics(BaseStatistics):
+    """Частичные агрегаты сразу для нескольких профессий. Общие агрегаты по годам и городам считаются один раз,
+    а вхождения всех профессий в название вакансии ищутся одним проходом автомата Ахо-Корасик, поэтому
+    статистика для сотни профессий требует одного чтения данных, а не сотни.
+
+        Attributes:
+            prof_names (List[str]): Профессии
+            prof_by_year (Dict[str, Dict[int, List[float, int]]]): [сумма з\\п, количество] по годам для каждой
+                профессии
+            prof_by_month (Dict[str, Dict[str, List[float, int]]]): [сумма з\\п, количество] по месяцам для каждой
+                профессии
+            prof_quantiles_by_year (Dict[str, Dict[int, KLLSketch]]): Скетчи квантилей з\\п по годам для каждой
+                профессии
+    """
+
+    def __init__(self, prof_names: List[str], precision: int = HLL_PRECISION, top_cities: int = None,
+                 quantiles: bool = False, distinct: bool = False):
+        """Инициализирует пустой объект MultiStatistics.
+
+            Args:
+                prof_names (List[str]): Профессии
+                precision (int): Точность HyperLogLog, см. BaseStatistics
+                top_cities (int or None): Сколько городов отслеживать в SpaceSaving, см. BaseStatistics
+                quantiles (bool): Считать ли скетчи квантилей з\\п, см. BaseStatistics
+                distinct (bool): Считать ли количество различных значений, см. BaseStatistics
+        """
+        super().__init__(precision, top_cities, quantiles, distinct)
+        self.prof_names = list(dict.fromkeys(prof_names))
+        self.prof_by_year: Dict[str, Dict[int, List]] = {prof_name: {} for prof_name in self.prof_names}
+        self.prof_by_month: Dict[str, Dict[str, List]] = {prof_name: {} for prof_name in self.prof_names}
+        self.prof_quantiles_by_year: Dict[str, Dict[int, KLLSketch]] = {prof_name: {}
+                                                                        for prof_name in self.prof_names}
+        self.__matcher = AhoCorasick(self.prof_names)
+
+    def __getstate__(self) -> Dict:
+        """Автомат не передается между процессами: он строится заново по списку профессий"""
+        state = dict(self.__dict__)
+        del state['_MultiStatistics__matcher']
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self.__matcher = AhoCorasick(self.prof_names)
+
+    def add_professions(self, name: str, year: int, salary: float, month: str or None) -> None:
+        for index in self.__matcher.find(name):
+            add_to(self.prof_by_year[self.prof_names[index]], year, salary, 1)
+            if self.quantiles:
+                add_value(self.prof_quantiles_by_year[self.prof_names[index]], year, salary)
+            if month is not None:
+                add_to(self.prof_by_month[self.prof_names[index]], month, salary, 1)
+
+    def merge_professions(self, other: 'MultiStatistics') -> None:
+        for prof_name in self.prof_names:
+            merge_sums(self.prof_by_year[prof_name], other.prof_by_year[prof_name])
+            merge_sums(self.prof_by_month[prof_name], other.prof_by_month[prof_name])
+            merge_into(self.prof_quantiles_by_year[prof_name], other.prof_quantiles_by_year[prof_name])
+
+    def for_profession(self, prof_name: str) -> Statistics:
+        """Возвращает статистику для одной профессии. Агрегаты не копируются, а разделяются с self.
+
+            Args:
+                prof_name (str): Профессия из prof_names
+
+            Returns:
+                Statistics: Статистика, как если бы ее считали только для этой профессии
+        """
+        statistics = Statistics(prof_name, self.precision)
+        for key in vars(BaseStatistics()):
+            setattr(statistics, key, getattr(self, key))
+        statistics.prof_by_year = self.prof_by_year[prof_name]
+        statistics.prof_by_month = self.prof_by_month[prof_name]
+        statistics.prof_quantiles_by_year = self.prof_quantiles_by_year[prof_name]
+        return statistics
+
+
+def add_to(aggregate: Dict, key, salary: float, count: int) -> None:
+    """Прибавляет з\\п и количество к агрегату по ключу.
+
+        Args:
+            aggregate (Dict): Словарь [сумма з\\п, количество] по ключам
+            key: Год или город
+            salary (float): Сумма з\\п
+            count (int): Количество вакансий
+    """
+    value = aggregate.get(key)
+    if value is None:
+        aggregate[key] = [salary, count]
+    else:
+        value[0] += salary
+        value[1] += count
+
+
+def merge_sums(target: Dict, source: Dict) -> None:
+    """Прибавляет словарь [сумма з\\п, количество] source к target по ключам"""
+    for key, (salary, count) in source.items():
+        add_to(target, key, salary, count)
+
+
+def quantiles(sketches: Dict, keys: List) -> Dict:
+    """Считает медиану, p90 и p99 по скетчам для ключей в заданном порядке.
+
+        Args:
+            sketches (Dict): Словарь KLLSketch по ключам
+            keys (List): Годы или города
+
+        Returns:
+            Dict: Кортеж округленных квантилей по ключам, для ключей без скетча - нули
+    """
+    result = {}
+    for key in keys:
+        values = sketches[key].quantiles() if key in sketches else []
+        result[key] = tuple(int(value) for value in values) or (0,) * len(QUANTILES)
+    return result
+
+
+def forget_city(statistics: BaseStatistics, city: str or None) -> None:
+    """Удаляет скетчи квантилей и различных значений города, вытесненного из таблицы SpaceSaving.
+
+        Args:
+            statistics (BaseStatistics): Агрегаты
+            city (str or None): Город или None, если ничего не вытеснено
+    """
+    if city is not None:
+        statistics.quantiles_by_city.pop(city, None)
+        statistics.distinct_by_city.pop(city, None)
+
+
+def add_distinct(statistics: BaseStatistics, year: int, area_name: str, name: str,
+                 employer_name: str or None) -> None:
+    """Добавляет компанию и название вакансии в скетчи HyperLogLog по году и по городу. Каждое значение
+    хэшируется один раз для всех скетчей.
+
+        Args:
+            statistics (BaseStatistics): Агрегаты
+            year (int): Год публикации
+            area_name (str): Город
+            name (str): Название вакансии
+            employer_name (str or None): Компания или None, если ее нет в csv
+    """
+    employer = HyperLogLog.hash(employer_name) if employer_name else None
+    title = HyperLogLog.hash(name)
+    for aggregate, key in ((statistics.distinct_by_year, year), (statistics.distinct_by_city, area_name)):
+        value = aggregate.get(key)
+        if value is None:
+            value = aggregate[key] = [HyperLogLog(statistics.precision), HyperLogLog(statistics.precision)]
+        if employer is not None:
+            value[0].add_hash(employer)
+        value[1].add_hash(title)
+
+
+def merge_distinct(target: Dict, source: Dict) -> None:
+    """Сливает словарь [компании, названия вакансий] source в target по ключам, не изменяя source"""
+    for key, (employers, titles) in source.items():
+        if key not in target:
+            target[key] = [HyperLogLog(employers.precision), HyperLogLog(titles.precision)]
+        target[key][0].merge(employers)
+        target[key][1].merge(titles)
+
+
+def distinct_counts(aggregate: Dict, keys: List) -> Dict:
+    """Оценивает количество различных компаний и названий вакансий для ключей в заданном порядке.
+
+        Args:
+            aggregate (Dict): Словарь [компании, названия вакансий] по ключам
+            keys (List): Годы или города
+
+        Returns:
+            Dict: (компании, названия вакансий) по ключам, для ключей без вакансий - нули
+    """
+    return {key: (aggregate[key][0].count(), aggregate[key][1].count()) if key in aggregate else (0, 0)
+            for key in keys}
+
+
+def collect(file_name: str, prof_name: str) -> Statistics:
+    """Map-шаг: считает частичные агрегаты по одному csv файлу. Вызывается в процессах-воркерах.
+
+        Args:
+            file_name (str): Путь к csv файлу
+            prof_name (str): Профессия
+
+        Returns:
+            Statistics: Агрегаты по файлу
+    """
+    statistics = Statistics(prof_name)
+    for vacancy in DataSet(_to_show='Статистика').iter_csv(file_name):
+        statistics.add(vacancy)
+    return statistics
+
+
+def collect_many(file_name: str, prof_names: List[str]) -> MultiStatistics:
+    """Map-шаг для нескольких профессий: считает частичные агрегаты по одному csv файлу за один проход.
+
+        Args:
+            file_name (str): Путь к csv файлу
+            prof_names (List[str]): Профессии
+
+        Returns:
+            MultiStatistics: Агрегаты по файлу
+    """
+    statistics = MultiStatistics(prof_names)
+    for vacancy in DataSet(_to_show='Статистика').iter_csv(file_name):
+        statistics.add(vacancy)
+    return statistics
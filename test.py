@@ -1,5 +1,38 @@
-from unittest import TestCase
+import asyncio
+import concurrent.futures as cf
+import contextlib
+import csv
+import importlib.util
+import io
+import json
+import os
+import queue
+import re
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from functools import reduce
+from unittest import TestCase, mock
+import api.hh as hh
+import charts
+import daemon as daemon_module
+import query_server
+import requests
+import scheduler
+from daemon import ReportDaemon
+from excel_writer import CELL_STYLE, HEADER_STYLE, PERCENT_STYLE, SEPARATOR, StreamingWorkbook
+from indexes import SalaryIndex, SkillIndex
 from main import Salary, Vacancy, DataSet
+from matcher import AhoCorasick
+from metrics import Metrics
+from pdf_writer import write_pdf
+from query_server import QueryIndex
+from render_cache import RenderCache
+from reportv2 import Report
+from scheduler import find_boundaries
+from sketches import HyperLogLog, KLLSketch, SpaceSaving
+from stats import MultiStatistics, Statistics
+from timeseries import TimeSeriesStore, rolling
 
 
 class SalaryTests(TestCase):
@@ -77,4 +110,838 @@ class ParseQueryTests(TestCase):
         self.assertEqual(DataSet()._DataSet__parse_query("Навыки: Первый, Второй, Третий"), ('Навыки', ['Первый', 'Второй', 'Третий'], ''))
 
     def test_salary(self):
-        self.assertEqual(DataSet()._DataSet__parse_query("Оклад: 100000"), ('Оклад', '100000', ''))
\ No newline at end of file
+        self.assertEqual(DataSet()._DataSet__parse_query("Оклад: 100000"), ('Оклад', '100000', ''))
+
+
+class StatisticsMergeTests(TestCase):
+    vacancies = [Vacancy([name], [city], [f'{year}-05-01T00:00:00+0000'], [str(s)], [str(s * 2)], ['RUR'])
+                 for name, city, year, s in [('Программист', 'Екб', 2020, 10), ('Препод', 'Москва', 2020, 20),
+                                             ('Программист', 'Москва', 2021, 30), ('Препод', 'Екб', 2021, 40),
+                                             ('Программист', 'Екб', 2020, 50), ('Препод', 'Москва', 2022, 60)]]
+
+    def collect(self, vacancies, **options):
+        statistics = Statistics('Программист', **options)
+        for vacancy in vacancies:
+            statistics.add(vacancy)
+        return statistics
+
+    def test_merge_equals_single_pass(self):
+        merged = reduce(Statistics.merge, [self.collect(self.vacancies[i::3]) for i in range(3)],
+                        Statistics('Программист'))
+        single = self.collect(self.vacancies)
+        self.assertEqual(merged.years_table(), single.years_table())
+        self.assertEqual(merged.cities(), single.cities())
+
+    def test_prof_years_filled_with_zeros(self):
+        self.assertEqual(self.collect(self.vacancies).prof_vacancies_by_year(), {2020: 2, 2021: 1, 2022: 0})
+
+    def test_quantiles_are_opt_in(self):
+        plain, full = self.collect(self.vacancies), self.collect(self.vacancies, quantiles=True)
+        self.assertEqual(plain.years_table(), full.years_table())
+        self.assertEqual((plain.quantiles_by_year, plain.quantiles_by_city, plain.prof_quantiles_by_year), ({}, {}, {}))
+        self.assertEqual(full.salary_quantiles_by_year(),
+                         {2020: (30, 75, 75), 2021: (45, 60, 60), 2022: (90, 90, 90)})
+        self.assertEqual(full.prof_salary_quantiles_by_year(),
+                         {2020: (15, 75, 75), 2021: (45, 45, 45), 2022: (0, 0, 0)})
+
+    def test_distinct_counts_are_opt_in(self):
+        plain, full = self.collect(self.vacancies), self.collect(self.vacancies, distinct=True)
+        self.assertEqual(plain.years_table(), full.years_table())
+        self.assertEqual((plain.distinct_by_year, plain.distinct_by_city), ({}, {}))
+        self.assertEqual(full.distinct_by_year_counts(), {2020: (0, 2), 2021: (0, 2), 2022: (0, 1)})
+
+
+class FindBoundariesTests(TestCase):
+    def test_multiline_field_is_not_split(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8', newline='') as file:
+            file.write('name,description\n"a","first\nsecond"\n"b","x"\n')
+        self.assertEqual(find_boundaries(file.name, [17, 20]), [36])
+        os.remove(file.name)
+
+
+class PlanTasksTests(TestCase):
+    def test_merged_tasks_equal_single_pass(self):
+        min_chunk, scheduler.MIN_CHUNK = scheduler.MIN_CHUNK, 512
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                files = [os.path.join(directory, f'{number}.csv') for number in range(2)]
+                for number, file_name in enumerate(files):
+                    with open(file_name, 'w', encoding='utf-8', newline='') as file:
+                        file.write('name,key_skills,salary_from,salary_to,salary_currency,area_name,employer_name,'
+                                   'published_at\n')
+                        for index in range(150 * (number + 1)):
+                            file.write(f'{"Программист" if index % 3 else "Повар"} {index},"Python\nSQL",'
+                                       f'{1000 * index},{1500 * index},RUR,Город{index % 7},Компания{index % 11},'
+                                       f'20{10 + index % 6}-0{1 + index % 9}-01T00:00:00+0300\n')
+                tasks = scheduler.plan_tasks(files, 2)
+                self.assertGreater(len(tasks), len(files))
+                parts = [scheduler.collect_task(task, 'Программист', distinct=True) for task in tasks]
+                merged = reduce(Statistics.merge, [statistics for statistics, timing in parts],
+                                Statistics('Программист', distinct=True))
+                single = Statistics('Программист', distinct=True)
+                for file_name in files:
+                    scheduler.collect_into(scheduler.Task(file_name, 0, os.path.getsize(file_name)), single)
+        finally:
+            scheduler.MIN_CHUNK = min_chunk
+        self.assertEqual(sum(timing.rows for statistics, timing in parts), 450)
+        self.assertEqual(merged.years_table(), single.years_table())
+        self.assertEqual(merged.cities(), single.cities())
+        self.assertEqual(merged.prof_vacancies_by_year(), single.prof_vacancies_by_year())
+        self.assertEqual(merged.distinct_by_year_counts(), single.distinct_by_year_counts())
+
+
+class MultiStatisticsTests(TestCase):
+    def test_matcher_finds_overlapping_patterns(self):
+        matcher = AhoCorasick(['программист', 'грамм', 'ист', 'аналитик'])
+        self.assertEqual(matcher.find('Ведущий программист 1С'), {0, 1, 2})
+        self.assertEqual(matcher.find('Тестировщик'), set())
+
+    def test_same_as_separate_statistics(self):
+        prof_names = ['Программист', 'Препод', 'грам']
+        multi = MultiStatistics(prof_names)
+        for vacancy in StatisticsMergeTests.vacancies:
+            multi.add(vacancy)
+        for prof_name in prof_names:
+            single = Statistics(prof_name)
+            for vacancy in StatisticsMergeTests.vacancies:
+                single.add(vacancy)
+            self.assertEqual(multi.for_profession(prof_name).years_table(), single.years_table())
+
+
+class KLLSketchTests(TestCase):
+    def test_small_stream_is_exact(self):
+        sketch = KLLSketch()
+        for value in range(1, 101):
+            sketch.add(value)
+        self.assertEqual(sketch.quantiles([0.5, 0.9, 0.99]), [50, 90, 99])
+        self.assertEqual(KLLSketch().quantiles(), [])
+
+    def test_merged_parts_keep_rank_error(self):
+        values = [(i * 7919) % 100000 for i in range(100000)]
+        parts = [KLLSketch() for _ in range(4)]
+        for index, value in enumerate(values):
+            parts[index % 4].add(value)
+        merged = reduce(KLLSketch.merge, parts, KLLSketch())
+        self.assertEqual(merged.count, len(values))
+        self.assertLess(sum(map(len, merged.levels)), 1000)
+        for fraction, quantile in zip([0.5, 0.9, 0.99], merged.quantiles([0.5, 0.9, 0.99])):
+            self.assertLess(abs(quantile / len(values) - fraction), 0.02)
+
+
+class HyperLogLogTests(TestCase):
+    def test_merged_estimate_within_error(self):
+        parts = [HyperLogLog(10) for _ in range(3)]
+        for index in range(30000):
+            parts[index % 3].add(f'Компания {index % 20000}')
+        merged = reduce(HyperLogLog.merge, parts, HyperLogLog(10))
+        self.assertLess(abs(merged.count() - 20000) / 20000, 4 * merged.error)
+        self.assertEqual(len(merged.registers), 1024)
+
+    def test_small_counts_stay_sparse(self):
+        sketch = HyperLogLog()
+        for name in ['Аналитик', 'Программист', 'Аналитик']:
+            sketch.add(name)
+        self.assertEqual(sketch.count(), 2)
+        self.assertIsInstance(sketch.registers, dict)
+        self.assertRaises(ValueError, sketch.merge, HyperLogLog(10))
+
+
+class SpaceSavingTests(TestCase):
+    def test_merged_counts_within_bounds(self):
+        stream = [f'Город{i % 7}' if i % 3 else f'Город{i}' for i in range(3000)]
+        parts = [SpaceSaving(20) for _ in range(3)]
+        for index, city in enumerate(stream):
+            parts[index % 3].add(city)
+        merged = reduce(SpaceSaving.merge, parts, SpaceSaving(20))
+        self.assertEqual(merged.total, len(stream))
+        self.assertEqual(len(merged.counters), 20)
+        for city, count, error in merged.top(20):
+            self.assertLessEqual(count - error, stream.count(city))
+            self.assertLessEqual(stream.count(city), count)
+        self.assertEqual({city for city, count, error in merged.top(7)}, {f'Город{i}' for i in range(7)})
+
+    def test_top_cities_match_exact(self):
+        exact, approximate = Statistics('Программист'), Statistics('Программист', top_cities=50)
+        for vacancy in StatisticsMergeTests.vacancies:
+            exact.add(vacancy)
+            approximate.add(vacancy)
+        self.assertEqual(approximate.cities(), exact.cities())
+        self.assertEqual(approximate.by_city, {})
+
+    def test_top_cities_keep_city_sketches(self):
+        exact = Statistics('Программист', quantiles=True, distinct=True)
+        parts = [Statistics('Программист', top_cities=3, quantiles=True, distinct=True) for _ in range(2)]
+        for index in range(600):
+            record = ('Программист', 2022, 'Москва' if index % 3 else f'Город{index}', 1000.0 * (index % 10 + 1),
+                      f'Компания{index % 4}')
+            exact.add_record(*record)
+            parts[index % 2].add_record(*record)
+        merged = reduce(Statistics.merge, parts, Statistics('Программист', top_cities=3, quantiles=True, distinct=True))
+        self.assertLessEqual(len(merged.quantiles_by_city), 3)
+        self.assertEqual(set(merged.distinct_by_city), set(merged.quantiles_by_city))
+        self.assertEqual(merged.quantiles_by_city['Москва'].count, 400)
+        for merged_value, exact_value in zip(merged.salary_quantiles_by_city(['Москва'])['Москва'],
+                                             exact.salary_quantiles_by_city(['Москва'])['Москва']):
+            self.assertLessEqual(abs(merged_value - exact_value), 1000)
+        self.assertEqual(merged.distinct_by_city_counts(['Москва']), {'Москва': (4, 1)})
+
+
+class TimeSeriesTests(TestCase):
+    by_month = {'2021-11': [100.0, 1], '2022-01': [300.0, 2], '2022-02': [50.0, 1]}
+
+    def test_rolling_fills_missing_months(self):
+        self.assertEqual(rolling(self.by_month, 3), [('2021-11', 100, 1), ('2021-12', 100, 1), ('2022-01', 133, 3),
+                                                     ('2022-02', 116, 3)])
+
+    def test_store_matches_rolling_and_is_idempotent(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = TimeSeriesStore(os.path.join(directory, 'timeseries.db'))
+            store.put('', '2022-02', 10.0, 5)
+            for month, (salary, count) in self.by_month.items():
+                store.put('', month, salary, count)
+            store.put('', '2022-02', 50.0, 1)
+            rows = store.series('', (3, 12))
+            store.close()
+        self.assertEqual([row[:1] + row[3:5] for row in rows], rolling(self.by_month, 3))
+        self.assertEqual([row[5:] for row in rows], [(100, 1), (100, 1), (133, 3), (112, 4)])
+
+
+class SkillIndexTests(TestCase):
+    def test_find_matches_filter(self):
+        vacancies = [Vacancy(['a'], ['Екб'], ['2022-12-01T00:00:00+0000'], ['10'], ['20'], ['RUR'],
+                             key_skills=skills) for skills in [['Git', 'SQL'], ['SQL'], ['Git', 'Docker', 'SQL'], []]]
+        vacancies = vacancies * 10 + [Vacancy(['b'], ['Екб'], ['2022-12-01T00:00:00+0000'], ['10'], ['20'], ['RUR'],
+                                              key_skills=['Git', 'Rust'])]
+        index = SkillIndex(vacancies)
+        self.assertNotIn('Rust', index.bitmaps)
+        for skills in [['Git'], ['SQL', 'Git'], ['Docker', 'SQL', 'Git'], ['Git', 'Нет'], ['Git', 'Git'],
+                       ['Rust', 'Git', 'SQL'], ['Git', 'Rust']]:
+            self.assertEqual(list(index.find(skills)),
+                             [number for number, vacancy in enumerate(vacancies) if all(x in vacancy.key_skills
+                                                                                        for x in skills)])
+
+
+class SalaryIndexTests(TestCase):
+    def test_covering_and_overlapping(self):
+        ranges = [('10', '20'), ('15.0', '30'), ('40', '50'), ('25', '5'), ('', '10')] * 5 + [('0', '100')]
+        vacancies = [Vacancy(['a'], ['Екб'], ['2022-12-01T00:00:00+0000'], [low], [high], ['RUR'])
+                     for low, high in ranges]
+        index = SalaryIndex(vacancies)
+        self.assertEqual(index.size, 16)
+        self.assertEqual(list(index.covering(20)), [0, 1, 5, 6, 10, 11, 15, 16, 20, 21, 25])
+        self.assertEqual(list(index.covering(35)), [25])
+        self.assertEqual(list(index.overlapping(31, 39)), [25])
+        self.assertEqual(list(index.overlapping(30, 40)), [1, 2, 6, 7, 11, 12, 16, 17, 21, 22, 25])
+
+
+class QueryIndexTests(TestCase):
+    @staticmethod
+    def load_index() -> QueryIndex:
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8', newline='') as file:
+            file.write('name,description,key_skills,experience_id,premium,employer_name,salary_from,salary_to,'
+                       'salary_gross,salary_currency,area_name,published_at\n'
+                       'a,d,"Git\nSQL",noExperience,False,e,10,20,True,RUR,Москва,2022-07-05T18:19:30+0300\n'
+                       'b,d,Git,noExperience,False,e,30,40,True,RUR,Пермь,2022-07-05T18:19:30+0300\n'
+                       'c,d,SQL,noExperience,False,e,50,60,False,RUR,Москва,2022-07-05T18:19:30+0300\n')
+        index = QueryIndex(file.name)
+        os.remove(file.name)
+        return index
+
+    def test_query_matches_cli_order(self):
+        index = self.load_index()
+        result = index.query({'filter': 'Навыки: Git', 'sort': 'Оклад', 'reverse': 'Да', 'fields': 'Название'})
+        self.assertEqual(result, {'header': ['№', 'Название'], 'rows': [['1', 'b'], ['2', 'a']], 'total': 2})
+        result = index.query({'filter': 'Название региона: Москва', 'rows': '2', 'fields': 'Название'})
+        self.assertEqual(result['rows'], [['2', 'c']])
+        self.assertEqual(index.query({'filter': 'Навыки'}), {'error': 'Формат ввода некорректен'})
+
+    def test_handle_runs_queries_and_rejects_large_bodies(self):
+        index = self.load_index()
+
+        async def exchange(request: bytes) -> (bytes, bytes):
+            server = await asyncio.start_server(lambda reader, writer: query_server.handle(index, reader, writer),
+                                                '127.0.0.1', 0)
+            async with server:
+                reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+                writer.write(request)
+                await writer.drain()
+                response = await reader.read()
+                writer.close()
+            return response.split(b'\r\n\r\n', 1)
+
+        body = json.dumps({'filter': 'Навыки: Git', 'fields': 'Название'}).encode('utf-8')
+        head, payload = asyncio.run(exchange(f'POST /query HTTP/1.1\r\nContent-Length: {len(body)}\r\n'
+                                             f'Connection: close\r\n\r\n'.encode('latin-1') + body))
+        self.assertTrue(head.startswith(b'HTTP/1.1 200 OK'))
+        self.assertEqual(json.loads(payload)['rows'], [['1', 'a'], ['2', 'b']])
+        head, payload = asyncio.run(exchange(f'POST /query HTTP/1.1\r\nContent-Length: {query_server.MAX_BODY + 1}'
+                                             f'\r\n\r\n'.encode('latin-1')))
+        self.assertTrue(head.startswith(b'HTTP/1.1 413 Payload Too Large'))
+        self.assertIn(b'Connection: close', head)
+        self.assertIn('error', json.loads(payload))
+
+
+class MetricsTests(TestCase):
+    def test_merge_adds_stages_and_counters(self):
+        first, second = Metrics(), Metrics()
+        first.add_time('parse', 1.5, 10)
+        first.count('rows', 10)
+        second.add_time('parse', 0.5, 5)
+        second.add_time('aggregate', 0.25, 5)
+        second.count('rows', 5)
+        data = first.merge(second).to_dict()
+        self.assertEqual(data['stages'], {'parse': {'seconds': 2.0, 'calls': 15},
+                                          'aggregate': {'seconds': 0.25, 'calls': 5}})
+        self.assertEqual(data['counters'], {'rows': 15})
+
+    def test_parse_counts_rows(self):
+        metrics = Metrics()
+        rows = [['Программист', 'Екб', '2022-12-01T00:00:00+0000', '10', '20', 'RUR'],
+                ['Препод', '', '2022-12-01T00:00:00+0000', '10', '20', 'RUR']]
+        header = ['name', 'area_name', 'published_at', 'salary_from', 'salary_to', 'salary_currency']
+        vacancies = list(DataSet(_to_show='Статистика').iter_rows(header, rows, metrics))
+        self.assertEqual(len(vacancies), 1)
+        self.assertEqual(metrics.counters, {'rows': 1, 'skipped_rows': 1})
+
+
+class RenderCacheTests(TestCase):
+    def test_key_depends_on_data_and_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            style = os.path.join(directory, 'style.css')
+            with open(style, 'w') as file:
+                file.write('a')
+            key = RenderCache.key('png', [[2020, 1], [2021, 2]], [style])
+            self.assertEqual(key, RenderCache.key('png', [[2020, 1], [2021, 2]], [style]))
+            self.assertNotEqual(key, RenderCache.key('png', [[2021, 2], [2020, 1]], [style]))
+            with open(style, 'w') as file:
+                file.write('b')
+            self.assertNotEqual(key, RenderCache.key('png', [[2020, 1], [2021, 2]], [style]))
+
+    def test_store_and_fetch(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = RenderCache(os.path.join(directory, 'cache'))
+            source, dest = os.path.join(directory, 'a.xlsx'), os.path.join(directory, 'b.xlsx')
+            with open(source, 'w') as file:
+                file.write('report')
+            self.assertFalse(cache.fetch('key', dest))
+            cache.store('key', source)
+            self.assertTrue(cache.is_cached('key', source))
+            self.assertTrue(cache.fetch('key', dest))
+            with open(dest) as file:
+                self.assertEqual(file.read(), 'report')
+
+    def test_editing_report_keeps_cache_entry(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = RenderCache(os.path.join(directory, 'cache'))
+            source, dest = os.path.join(directory, 'a.xlsx'), os.path.join(directory, 'b.xlsx')
+            with open(source, 'w') as file:
+                file.write('report')
+            cache.store('key', source)
+            cache.fetch('key', dest)
+            with open(dest, 'w') as file:
+                file.write('edited')
+            self.assertFalse(cache.is_cached('key', dest))
+            self.assertTrue(cache.fetch('key', dest))
+            with open(dest) as file:
+                self.assertEqual(file.read(), 'report')
+
+
+class ReportRenderTests(TestCase):
+    def test_rerun_with_new_data_overwrites_report(self):
+        from openpyxl import load_workbook
+
+        header = ('Год', 'Средняя зарплата')
+        with tempfile.TemporaryDirectory() as directory:
+            for cache_dir in (os.path.join(directory, 'cache'), None):
+                report = Report({}, {}, {}, {}, 'Программист', report_dir=directory, cache_dir=cache_dir)
+                for rows in ([(2021, 100)], [(2021, 200)], [(2021, 100)]):
+                    report.generate_excel(header, rows)
+                    sheet = load_workbook(os.path.join(directory, 'report.xlsx')).active
+                    self.assertEqual(sheet['B2'].value, rows[0][1])
+                os.remove(os.path.join(directory, 'report.xlsx'))
+            self.assertEqual(sorted(name for name in os.listdir(directory)), ['cache'])
+
+    def test_renderer_modules_are_part_of_cache_key(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.object(RenderCache, 'key', wraps=RenderCache.key) as key:
+            report = Report({}, {}, {}, {}, 'Программист', report_dir=directory, cache_dir=os.path.join(directory, 'c'))
+            report.generate_excel(('Год', 'Средняя зарплата'), [(2021, 100)])
+            report.generate_pdf(None, ('Год', 'Средняя зарплата'), [(2021, 100)])
+        files = {call.args[0]: {os.path.basename(path) for path in call.args[2]} for call in key.call_args_list}
+        self.assertLessEqual({'excel_writer.py', 'reportv2.py'}, files['xlsx'])
+        self.assertLessEqual({'pdf_writer.py', 'reportv2.py'}, files['pdf'])
+
+
+class GenerateAllTests(TestCase):
+    arguments = (('Год', 'Средняя зарплата'), [(2021, 100)], {2021: 100}, {2021: 50}, {2021: 2}, {2021: 1})
+
+    def test_pdf_is_submitted_after_image_resolves(self):
+        submitted = queue.Queue()
+
+        class Executor(cf.Executor):
+            def submit(self, fn, *args):
+                future = cf.Future()
+                submitted.put((args[1], future))
+                return future
+
+        report = Report({}, {}, {}, {}, 'Программист')
+        worker = threading.Thread(target=report.generate_all, args=self.arguments, kwargs={'executor': Executor()})
+        worker.start()
+        (excel, excel_future), (image, image_future) = submitted.get(timeout=5), submitted.get(timeout=5)
+        self.assertEqual((excel, image), ('generate_excel', 'generate_image'))
+        with self.assertRaises(queue.Empty):
+            submitted.get(timeout=0.2)
+        image_future.set_result(None)
+        pdf, pdf_future = submitted.get(timeout=5)
+        self.assertEqual(pdf, 'generate_pdf')
+        excel_future.set_result(None)
+        pdf_future.set_result(None)
+        worker.join(timeout=5)
+        self.assertFalse(worker.is_alive())
+
+    def test_multiprocessing_pool_results_and_errors(self):
+        class Pool:
+            @staticmethod
+            def apply_async(fn, args, callback, error_callback):
+                try:
+                    result = fn(*args)
+                except Exception as error:
+                    error_callback(error)
+                else:
+                    callback(result)
+
+        report = Report({}, {}, {}, {}, 'Программист')
+        with mock.patch('reportv2.render_artifact') as render:
+            report.generate_all(*self.arguments, executor=Pool())
+            self.assertEqual([call.args[1] for call in render.call_args_list],
+                             ['generate_excel', 'generate_image', 'generate_pdf'])
+            render.side_effect = [None, None, RuntimeError('pdf')]
+            with self.assertRaises(RuntimeError):
+                report.generate_all(*self.arguments, executor=Pool())
+
+
+class ReportDaemonTests(TestCase):
+    @staticmethod
+    def write_csv(file_name: str, rows: int, salary: int) -> None:
+        with open(file_name, 'w', encoding='utf-8') as file:
+            file.write('name,salary_from,salary_to,salary_currency,area_name,published_at\n')
+            for index in range(rows):
+                file.write(f'Программист {index},{salary + index},{salary + 2 * index},RUR,Город{index % 3},'
+                           f'20{10 + index % 5}-0{1 + index % 9}-01T00:00:00+0300\n')
+
+    def test_cache_per_file(self):
+        min_chunk, scheduler.MIN_CHUNK = scheduler.MIN_CHUNK, 512
+        daemon = ReportDaemon(workers=2)
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                first, second = os.path.join(directory, 'a.csv'), os.path.join(directory, 'b.csv')
+                self.write_csv(first, 100, 1000)
+                self.write_csv(second, 50, 5000)
+                job = {'csvs_dir': directory, 'prof_name': 'Программист'}
+                cold = daemon.run_job(job)
+                self.assertEqual(daemon.parsed_files, 2)
+                self.assertEqual(daemon.run_job(job)['rows'], cold['rows'])
+                self.assertEqual(daemon.parsed_files, 2)
+
+                self.write_csv(second, 60, 7000)
+                stat = os.stat(second)
+                os.utime(second, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+                self.write_csv(os.path.join(directory, 'c.csv'), 30, 3000)
+                warm = daemon.run_job(job)
+                self.assertEqual(daemon.parsed_files, 4)
+                fresh = ReportDaemon(workers=1)
+                try:
+                    self.assertEqual(warm['rows'], fresh.run_job(job)['rows'])
+                    self.assertEqual(warm['vacancies_by_city'], fresh.run_job(job)['vacancies_by_city'])
+                finally:
+                    fresh.close()
+                self.assertNotEqual(warm['rows'], cold['rows'])
+        finally:
+            daemon.close()
+            scheduler.MIN_CHUNK = min_chunk
+
+    def test_aggregation_in_pool_equals_single_pass(self):
+        min_slice, daemon_module.MIN_SLICE = daemon_module.MIN_SLICE, 7
+        daemon = ReportDaemon(workers=3)
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                files = [os.path.join(directory, f'{name}.csv') for name in 'ab']
+                self.write_csv(files[0], 40, 1000)
+                self.write_csv(files[1], 25, 5000)
+                self.assertEqual([len(part) for part in daemon_module.slice_records([[1] * 40, [2] * 25], 7)],
+                                 [7] * 9 + [2])
+                single, multi = Statistics('Программист 1'), MultiStatistics(['Программист 1', 'Программист 2'])
+                for file_name in files:
+                    for record in scheduler.parse_task(scheduler.Task(file_name, 0, os.path.getsize(file_name))):
+                        single.add_record(*record)
+                        multi.add_record(*record)
+                for run in range(2):
+                    result = daemon.run_job({'csvs_dir': directory, 'prof_name': 'Программист 1'})
+                    self.assertEqual((tuple(result['header']), result['rows']), single.years_table())
+                    self.assertEqual((result['salary_by_city'], result['vacancies_by_city']), single.cities())
+                    result = daemon.run_job({'csvs_dir': directory, 'prof_names': multi.prof_names})
+                    for prof_name in multi.prof_names:
+                        self.assertEqual(result['professions'][prof_name]['rows'],
+                                         multi.for_profession(prof_name).years_table()[1])
+                self.assertEqual(daemon.parsed_files, 2)
+        finally:
+            daemon.close()
+            daemon_module.MIN_SLICE = min_slice
+
+    def test_cache_is_bounded(self):
+        daemon = ReportDaemon(workers=1, cache_records=150)
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                for name in ('a', 'b'):
+                    os.mkdir(os.path.join(directory, name))
+                    self.write_csv(os.path.join(directory, name, 'vacancies.csv'), 100, 1000)
+                for name in ('a', 'b', 'a'):
+                    daemon.run_job({'csvs_dir': os.path.join(directory, name), 'prof_name': 'Программист'})
+                self.assertEqual(daemon.parsed_files, 3)
+        finally:
+            daemon.close()
+
+
+def load_script(file_name: str):
+    """Загружает скрипт, имя которого нельзя импортировать, например 3.3.3_hh.py"""
+    spec = importlib.util.spec_from_file_location(file_name.replace('.', '_')[:-3], file_name)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class ClientTests(TestCase):
+    @staticmethod
+    def response(status: int, body: dict = None, headers: dict = None) -> mock.Mock:
+        return mock.Mock(status_code=status, ok=status < 400, headers=headers or {},
+                         json=mock.Mock(return_value=body))
+
+    def client(self, directory: str, responses: list) -> (hh.Client, mock.Mock):
+        session = mock.Mock()
+        session.get.side_effect = responses
+        with mock.patch('api.hh.requests.Session', return_value=session):
+            return hh.Client(rate=1000, capacity=10, retries=2, backoff=1, cache_dir=directory), session
+
+    def test_throttling_is_retried_with_backoff_then_reported(self):
+        with tempfile.TemporaryDirectory() as directory, mock.patch('api.hh.time.sleep') as sleep:
+            client, session = self.client(directory, [self.response(429, headers={'Retry-After': '7'}),
+                                                      self.response(503), self.response(503)])
+            self.assertIsNone(client.get('vacancies', {'page': 0}))
+            self.assertEqual(session.get.call_count, 3)
+            self.assertEqual(sleep.call_count, 2)
+            self.assertGreaterEqual(sleep.call_args_list[0].args[0], 7)
+            self.assertLessEqual(sleep.call_args_list[1].args[0], 2)
+
+            client, session = self.client(directory, [requests.ConnectionError()] * 2 + [self.response(200, {})])
+            self.assertEqual(client.get('vacancies', {'page': 0}), {})
+            client, session = self.client(directory, [requests.Timeout()] * 3)
+            self.assertIsNone(client.get('vacancies', {'page': 1}))
+
+    def test_not_modified_returns_cached_body(self):
+        with tempfile.TemporaryDirectory() as directory:
+            headers = {'ETag': '"v1"', 'Last-Modified': 'Thu, 01 Dec 2022 00:00:00 GMT'}
+            client, session = self.client(directory, [self.response(200, {'found': 1}, headers),
+                                                      self.response(304)])
+            self.assertEqual(client.get('vacancies', {'page': 0}), {'found': 1})
+            self.assertEqual(client.get('vacancies', {'page': 0}), {'found': 1})
+            sent = session.get.call_args_list[1].kwargs['headers']
+            self.assertEqual((sent['If-None-Match'], sent['If-Modified-Since']), ('"v1"', headers['Last-Modified']))
+            self.assertNotIn('If-None-Match', session.get.call_args_list[0].kwargs['headers'])
+
+
+class FakeSearchMixin:
+    """Загружает 3.3.3_hh.py и подменяет get_page поиском по списку дат публикации published"""
+    day = datetime(2022, 12, 1)
+
+    def setUp(self):
+        self.hh = load_script('3.3.3_hh.py')
+        self.hh.WINDOW_RETRY_DELAY = 0
+        # 3000 вакансий в первый час дня, потом по одной в минуту
+        self.published = [self.day + timedelta(seconds=1.2 * i) for i in range(3000)]
+        self.published += [self.day + timedelta(hours=1, minutes=i) for i in range(23 * 60)]
+        self.failures = 0
+        self.failed_pages = set()
+        self.hh.get_page = self.get_page
+
+    def get_page(self, date_from: str, date_to: str, page: int):
+        if self.failures > 0:
+            self.failures -= 1
+            return None
+        if page in self.failed_pages:
+            self.failed_pages.discard(page)
+            return None
+        date_from, date_to = self.hh.parse_date(date_from), self.hh.parse_date(date_to)
+        found = [str(index) for index, published in enumerate(self.published) if date_from <= published < date_to]
+        items = found[:self.hh.MAX_FOUND][page * self.hh.PER_PAGE:(page + 1) * self.hh.PER_PAGE]
+        return {'found': len(found), 'pages': -(-min(len(found), self.hh.MAX_FOUND) // self.hh.PER_PAGE),
+                'items': [{'id': index, 'name': 'Программист', 'salary': None, 'area': None,
+                           'published_at': '2022-12-01T00:00:00+0300'} for index in items]}
+
+
+class CrawlWindowsTests(FakeSearchMixin, TestCase):
+    def crawl(self, directory: str = None) -> list:
+        written = []
+
+        class Sink:
+            @staticmethod
+            def write(vacancies):
+                written.extend(vacancy['id'] for vacancy in vacancies)
+
+        if directory is None:
+            with tempfile.TemporaryDirectory() as directory:
+                return self.crawl(directory)
+        checkpoint = self.hh.Checkpoint(os.path.join(directory, 'hh.checkpoint.json'))
+        try:
+            self.hh.crawl_day(self.day.date(), Sink(), checkpoint)
+        finally:
+            self.written = written
+        return written
+
+    def test_windows_cover_day_completely(self):
+        windows = list(self.hh.split_windows(self.day, self.day + timedelta(days=1)))
+        self.assertEqual(windows[0][0], self.day)
+        self.assertEqual(windows[-1][1], self.day + timedelta(days=1))
+        for (start, end, first_page, width), following in zip(windows, windows[1:] + [None]):
+            self.assertLessEqual(first_page['found'], self.hh.MAX_FOUND)
+            if following is not None:
+                self.assertEqual(end, following[0])
+        self.assertEqual(sorted(self.crawl(), key=int), [str(index) for index in range(len(self.published))])
+
+    def test_failed_first_page_is_retried(self):
+        self.failures = self.hh.WINDOW_RETRIES - 1
+        self.assertEqual(len(set(self.crawl())), len(self.published))
+        self.failures = self.hh.WINDOW_RETRIES
+        with self.assertRaises(RuntimeError):
+            self.crawl()
+
+    def test_truncation_is_reported(self):
+        self.published = [self.day] * (self.hh.MAX_FOUND + 5)
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            self.assertEqual(len(self.crawl()), self.hh.MAX_FOUND)
+        self.assertIn('5 будут пропущены', stderr.getvalue())
+
+    def test_failed_page_is_refetched_after_restart(self):
+        self.failed_pages = {3}
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(RuntimeError):
+                self.crawl(directory)
+            first_run = self.written
+            with open(os.path.join(directory, 'hh.checkpoint.json'), encoding='utf-8') as file:
+                state = json.load(file)['2022-12-01']
+            self.assertEqual(sorted(state['pages']), [page for page in range(len(state['pages']) + 1) if page != 3])
+            second_run = self.crawl(directory)
+        self.assertEqual(len(first_run) + len(second_run) - len(set(first_run) & set(second_run)),
+                         len(self.published))
+        self.assertEqual(sorted(set(first_run) | set(second_run), key=int),
+                         [str(index) for index in range(len(self.published))])
+
+
+class DedupSinkTests(FakeSearchMixin, TestCase):
+    def vacancies(self, ids: range) -> list:
+        return [{'id': str(index), 'name': 'Программист', 'salary_from': None, 'salary_to': None,
+                 'salary_currency': None, 'area_name': None, 'published_at': '2022-12-01T00:00:00+0300'}
+                for index in ids]
+
+    @staticmethod
+    def written_ids(csv_path: str) -> list:
+        with open(csv_path, encoding='utf-8', newline='') as file:
+            return [row['id'] for row in csv.DictReader(file)]
+
+    def test_overlapping_windows_and_restart_write_each_id_once(self):
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path, ids_path = os.path.join(directory, 'hh.csv'), os.path.join(directory, 'hh.csv.ids.db')
+            sink = self.hh.DedupSink(self.hh.CsvSink(csv_path, False), ids_path)
+            sink.write(self.vacancies(range(0, 100)))
+            sink.write(self.vacancies(range(50, 150)))
+            sink.close()
+            sink = self.hh.DedupSink(self.hh.CsvSink(csv_path, True), ids_path)
+            sink.write(self.vacancies(range(100, 200)))
+            sink.close()
+            self.assertEqual(self.written_ids(csv_path), [str(index) for index in range(200)])
+
+    def test_crawl_range_covers_every_day_once(self):
+        days = 3
+        self.published = [self.day + timedelta(minutes=7 * i) for i in range(days * 24 * 60 // 7)]
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path, ids_path = os.path.join(directory, 'hh.csv'), os.path.join(directory, 'hh.csv.ids.db')
+            for run in range(2):
+                # Второй запуск с новым checkpoint выгружает все дни заново, но DedupSink не пишет их повторно
+                checkpoint = self.hh.Checkpoint(os.path.join(directory, f'{run}.checkpoint.json'))
+                sink = self.hh.DedupSink(self.hh.CsvSink(csv_path, run > 0), ids_path)
+                try:
+                    self.hh.crawl_range(self.day.date(), self.day.date() + timedelta(days=days - 1), sink, checkpoint)
+                finally:
+                    sink.close()
+                self.assertEqual(sorted(self.written_ids(csv_path), key=int),
+                                 [str(index) for index in range(len(self.published))])
+                self.assertTrue(all(checkpoint.day(f'2022-12-0{day + 1}').get('done') for day in range(days)))
+
+
+class EnrichTests(TestCase):
+    vacancy = {'name': 'Программист', 'id': '1', 'description': '<p>Python</p>',
+               'key_skills': [{'name': 'Git'}, {'name': 'SQL'}], 'experience': {'id': 'between1And3'},
+               'premium': False, 'employer': {'name': 'Компания'}, 'area': {'name': 'Москва'},
+               'salary': {'from': 100, 'to': None, 'gross': True, 'currency': 'RUR'},
+               'published_at': '2022-12-01T10:00:00+0300'}
+
+    def test_failed_vacancies_are_skipped_and_reported(self):
+        hh_script = load_script('3.3.3_hh.py')
+        responses = {'vacancies/1': self.vacancy, 'vacancies/2': None, 'vacancies/3': requests.ConnectionError()}
+
+        def get(path, revalidate=True):
+            if isinstance(responses[path], Exception):
+                raise responses[path]
+            return responses[path]
+
+        hh_script.detail_client = mock.Mock(get=mock.Mock(side_effect=get))
+        with tempfile.TemporaryDirectory() as directory:
+            input_path, output_path = os.path.join(directory, 'hh.csv'), os.path.join(directory, 'full.csv')
+            with open(input_path, 'w', encoding='utf-8') as file:
+                file.write('name,id,published_at\nа,3,x\nб,1,x\nв,2,x\n')
+            failed = hh_script.enrich(input_path, output_path, workers=2)
+            with open(output_path, encoding='utf-8', newline='') as file:
+                rows = list(csv.DictReader(file))
+        self.assertEqual(failed, ['3', '2'])
+        self.assertEqual(len(rows), 1)
+        self.assertEqual((rows[0]['id'], rows[0]['key_skills'], rows[0]['experience_id'], rows[0]['salary_gross']),
+                         ('1', 'Git\nSQL', 'between1And3', 'True'))
+
+
+class ProfessionChartsTests(TestCase):
+    records = [('Программист', 2021, 100.0), ('Аналитик', 2021, 50.0), ('Повар', 2022, 30.0)]
+
+    def statistics(self, prof_names: list) -> MultiStatistics:
+        statistics = MultiStatistics(prof_names)
+        for name, year, salary in self.records:
+            statistics.add_record(name, year, 'Москва', salary)
+        return statistics
+
+    def test_render_png_per_profession(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = charts.render_profession_charts(self.statistics(['Программист', 'Аналитик']), directory)
+            self.assertEqual(sorted(paths), ['Аналитик', 'Программист'])
+            for path in paths.values():
+                with open(path, 'rb') as file:
+                    self.assertEqual(file.read(8), b'\x89PNG\r\n\x1a\n')
+
+    def test_overall_series_does_not_depend_on_professions(self):
+        calls = []
+        draw_charts, charts.draw_charts = charts.draw_charts, lambda data, series, out_dir: calls.append(data) or {}
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                for prof_names in (['Программист', 'Аналитик'], ['Аналитик', 'Программист'], ['Нет такой']):
+                    charts.render_profession_charts(self.statistics(prof_names), directory)
+        finally:
+            charts.draw_charts = draw_charts
+        self.assertEqual(calls, [charts.YearSeries([2021, 2022], [75, 30], [2, 1])] * 3)
+
+
+class StreamingWorkbookTests(TestCase):
+    def test_sheets_reopen_with_values_styles_and_widths(self):
+        from openpyxl import load_workbook
+
+        workbook = StreamingWorkbook()
+        workbook.add_sheet('Годы', ('Год', 'Средняя з/п'))
+        workbook.extend([(2021, 100000), (2022, 95)])
+        workbook.add_sheet('Города', ('Город', 'Доля', SEPARATOR, 'Город'), percent_columns=[2])
+        workbook.append(('Санкт-Петербург', 0.25, SEPARATOR, 'Москва'))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'report.xlsx')
+            workbook.save(path)
+            book = load_workbook(path)
+        years, cities = book['Годы'], book['Города']
+        self.assertEqual(list(years.values), [('Год', 'Средняя з/п'), (2021, 100000), (2022, 95)])
+        self.assertEqual([years.column_dimensions[column].width for column in 'AB'], [6, 13])
+        self.assertEqual(list(cities.values), [('Город', 'Доля', SEPARATOR, 'Город'),
+                                               ('Санкт-Петербург', 0.25, SEPARATOR, 'Москва')])
+        self.assertEqual([cities.column_dimensions[column].width for column in 'ABD'], [17, 6, 8])
+        self.assertEqual([years['A1'].style, years['A2'].style, cities['B2'].style, cities['C1'].style],
+                         [HEADER_STYLE, CELL_STYLE, PERCENT_STYLE, HEADER_STYLE])
+        self.assertTrue(years['A1'].font.bold)
+        self.assertEqual(cities['B2'].number_format, '0.00%')
+        self.assertEqual(cities['C2'].style, 'Normal')
+
+
+class WritePdfTests(TestCase):
+    def pages(self, path: str) -> int:
+        with open(path, 'rb') as file:
+            data = file.read()
+        self.assertTrue(data.startswith(b'%PDF-') and data.rstrip().endswith(b'%%EOF'))
+        return len(re.findall(rb'/Type\s*/Page\b', data))
+
+    def test_image_and_long_table_span_pages(self):
+        from matplotlib.figure import Figure
+
+        with tempfile.TemporaryDirectory() as directory:
+            image_path, save_path = os.path.join(directory, 'graph.png'), os.path.join(directory, 'report.pdf')
+            fig = Figure(figsize=(4, 3))
+            fig.add_subplot().bar(['2021', '2022'], [100, 95])
+            fig.savefig(image_path)
+            write_pdf(save_path, 'Отчет', image_path, [('Города', ('Город', 'Доля'), [('Москва', '50%')] * 80)])
+            self.assertGreater(self.pages(save_path), 1)
+
+    def test_small_table_fits_one_page(self):
+        with tempfile.TemporaryDirectory() as directory:
+            save_path = os.path.join(directory, 'report.pdf')
+            write_pdf(save_path, 'Отчет', None, [('Годы', ('Год', 'Средняя з/п'), [(2021, 100000), (2022, 95)])])
+            self.assertEqual(self.pages(save_path), 1)
+
+
+class ChunkedAggregationTests(TestCase):
+    names = ['Программист Python', 'Аналитик данных', 'Повар', 'python-программист', None]
+    areas = ['Москва', 'Санкт-Петербург', 'Екатеринбург', 'Московский']
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.directory.name, 'vacancies.csv')
+        with open(self.file_name, 'w', encoding='utf-8') as file:
+            file.write('name,key_skills,salary_from,salary_to,salary_currency,area_name,published_at\n')
+            for index in range(40):
+                low = '' if index % 6 == 0 else 10000 + index * 731
+                high = '' if index % 7 == 0 else 30000 + index * 977
+                file.write(f'{self.names[index % 5] or ""},,{low},{high},RUR,{self.areas[index % 4]},'
+                           f'{2019 + index % 4}-0{1 + index % 9}-01T10:00:00+0300\n')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_script(self, script: str, *answers: str):
+        """Запускает скрипт в пустой папке с report и template, отвечая на вопросы answers"""
+        path = os.path.abspath(script)
+        with tempfile.TemporaryDirectory() as directory:
+            os.mkdir(os.path.join(directory, 'report'))
+            os.symlink(os.path.abspath('template'), os.path.join(directory, 'template'))
+            cwd = os.getcwd()
+            os.chdir(directory)
+            try:
+                # В файле только рубли, поэтому курсы не нужны, а запросы к ЦБ не выполняются
+                with mock.patch('builtins.input', side_effect=[self.file_name, *answers]), \
+                        mock.patch('api.valutes.get_valutes', return_value={}):
+                    return load_script(path)
+            finally:
+                os.chdir(cwd)
+
+    def test_year_aggregate_does_not_depend_on_chunks(self):
+        from pandas.testing import assert_frame_equal
+
+        whole = self.run_script('3.4.2_pd_stat.py', 'python', 'нет wkhtmltopdf', '')
+        chunked = self.run_script('3.4.2_pd_stat.py', 'python', 'нет wkhtmltopdf', '7')
+        self.assertEqual(whole.final_df_data.index.tolist(), ['2019', '2020', '2021', '2022'])
+        self.assertGreater(whole.prof_data['count'].sum(), 0)
+        assert_frame_equal(chunked.final_df_data, whole.final_df_data)
+        assert_frame_equal(chunked.prof_data, whole.prof_data)
+
+    def test_region_profession_matrix_does_not_depend_on_chunks(self):
+        from pandas.testing import assert_frame_equal
+
+        whole = self.run_script('3.4.3_pd_city_stat.py', 'рограммист, Аналитик', 'Моск, Петербург',
+                                'нет wkhtmltopdf', '')
+        chunked = self.run_script('3.4.3_pd_city_stat.py', 'рограммист, Аналитик', 'Моск, Петербург',
+                                  'нет wkhtmltopdf', '7')
+        self.assertEqual(whole.pair_index, {('Моск', 'рограммист'), ('Моск', 'Аналитик'),
+                                            ('Петербург', 'рограммист'), ('Петербург', 'Аналитик')})
+        assert_frame_equal(chunked.total_pairs, whole.total_pairs)
+        assert_frame_equal(chunked.df_area, whole.df_area)
+        self.assertEqual([chunked.year_table(*pair) for pair in sorted(whole.pair_index)],
+                         [whole.year_table(*pair) for pair in sorted(whole.pair_index)])
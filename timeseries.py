@@ -0,0 +1,172 @@
+import sqlite3
+from typing import Dict, List, Tuple
+
+# Ряд по всем вакансиям, остальные ряды называются по профессии
+ALL = ''
+# Окна скользящих средних в месяцах
+WINDOWS = (3, 12)
+
+
+def month_index(month: str) -> int:
+    """Номер месяца с начала эры, чтобы соседние месяцы отличались на единицу.
+
+        Args:
+            month (str): Месяц в формате YYYY-MM
+
+        Returns:
+            int: Номер месяца
+    """
+    year, month = month.split('-')
+    return int(year) * 12 + int(month) - 1
+
+
+def index_month(index: int) -> str:
+    """Месяц в формате YYYY-MM по номеру из month_index"""
+    return f'{index // 12:04}-{index % 12 + 1:02}'
+
+
+def rolling(by_month: Dict[str, List], window: int) -> List[Tuple[str, int, int]]:
+    """Считает скользящие по window месяцам среднюю з\\п и количество вакансий по месячным агрегатам без хранилища.
+    Пропущенные месяцы считаются месяцами без вакансий. Префиксные суммы строятся за один проход, а каждое окно -
+    разность двух префиксов.
+
+        Args:
+            by_month (Dict[str, List]): [сумма з\\п, количество] по месяцам YYYY-MM, например Statistics.by_month
+            window (int): Окно в месяцах
+
+        Returns:
+            List[Tuple[str, int, int]]: (месяц, средняя з\\п за окно, количество вакансий за окно) по всем месяцам от
+                первого до последнего
+    """
+    if len(by_month) == 0:
+        return []
+    indexes = {month_index(month): value for month, value in by_month.items()}
+    first, last = min(indexes), max(indexes)
+    prefix = [(0.0, 0)]
+    result = []
+    for index in range(first, last + 1):
+        salary, count = indexes.get(index, (0.0, 0))
+        prefix.append((prefix[-1][0] + salary, prefix[-1][1] + count))
+        start = prefix[max(0, len(prefix) - 1 - window)]
+        salary, count = prefix[-1][0] - start[0], prefix[-1][1] - start[1]
+        result.append((index_month(index), int(salary // count) if count else 0, count))
+    return result
+
+
+class TimeSeriesStore:
+    """Месячные ряды з\\п и количества вакансий в sqlite. Вместе с месячными суммами хранятся префиксные суммы с
+    начала ряда, поэтому сумма за любое окно - разность двух строк, а скользящие средние за 3 и 12 месяцев не
+    требуют ни пересчета ряда, ни повторного чтения вакансий. Ряд непрерывный: пропущенные месяцы хранятся нулевыми
+    строками, поэтому начало окна находится по номеру месяца. Запись нового или последнего месяца - O(1) на ряд,
+    исправление более старого месяца сдвигает префиксы следующих месяцев одним UPDATE.
+
+        Attributes:
+            path (str): Путь к базе
+    """
+
+    def __init__(self, path: str = 'timeseries.db'):
+        """Открывает хранилище и создает таблицу MONTHLY, если ее нет.
+
+            Args:
+                path (str): Путь к базе
+        """
+        self.path = path
+        self.__con = sqlite3.connect(path)
+        self.__con.execute('CREATE TABLE IF NOT EXISTS MONTHLY (series TEXT, month INTEGER, salary REAL, '
+                           'count INTEGER, cum_salary REAL, cum_count INTEGER, PRIMARY KEY (series, month))')
+
+    def put(self, series: str, month: str, salary: float, count: int) -> None:
+        """Записывает сумму з\\п и количество вакансий ряда за месяц, заменяя прежние значения месяца. Повторная
+        запись тех же данных ничего не меняет, поэтому статистику можно сохранять после каждого запуска.
+
+            Args:
+                series (str): Ряд: ALL или профессия
+                month (str): Месяц в формате YYYY-MM
+                salary (float): Сумма з\\п за месяц
+                count (int): Количество вакансий за месяц
+        """
+        with self.__con:
+            self.__put(series, month_index(month), salary, count)
+
+    def put_statistics(self, statistics) -> None:
+        """Сохраняет месячные агрегаты Statistics или MultiStatistics: ряд ALL и ряд каждой профессии.
+
+            Args:
+                statistics (Statistics or MultiStatistics): Агрегаты с by_month и prof_by_month
+        """
+        if hasattr(statistics, 'prof_names'):
+            series = {prof_name: statistics.prof_by_month[prof_name] for prof_name in statistics.prof_names}
+        else:
+            series = {statistics.prof_name: statistics.prof_by_month}
+        series[ALL] = statistics.by_month
+        with self.__con:
+            for name, by_month in series.items():
+                for month, (salary, count) in sorted(by_month.items()):
+                    self.__put(name, month_index(month), salary, count)
+
+    def series(self, series: str, windows: Tuple[int, ...] = WINDOWS) -> List[Tuple]:
+        """Читает ряд со скользящими средними одним запросом: окно - разность префиксов текущего месяца и месяца
+        перед началом окна.
+
+            Args:
+                series (str): Ряд: ALL или профессия
+                windows (Tuple[int, ...]): Окна в месяцах
+
+            Returns:
+                List[Tuple]: (месяц, средняя з\\п, количество, затем средняя з\\п и количество за каждое окно)
+        """
+        columns = ', '.join(f'm.cum_salary - COALESCE(w{window}.cum_salary, 0), '
+                            f'm.cum_count - COALESCE(w{window}.cum_count, 0)' for window in windows)
+        joins = ' '.join(f'LEFT JOIN MONTHLY w{window} ON w{window}.series = m.series '
+                         f'AND w{window}.month = m.month - {int(window)}' for window in windows)
+        rows = self.__con.execute(f'SELECT m.month, m.salary, m.count, {columns} FROM MONTHLY m {joins} '
+                                  f'WHERE m.series = ? ORDER BY m.month', (series,))
+        result = []
+        for month, *sums in rows:
+            row = [index_month(month)]
+            for salary, count in zip(sums[::2], sums[1::2]):
+                row += [int(salary // count) if count else 0, count]
+            result.append(tuple(row))
+        return result
+
+    def close(self) -> None:
+        self.__con.close()
+
+    def __put(self, series: str, month: int, salary: float, count: int) -> None:
+        """Записывает месяц в открытой транзакции"""
+        con = self.__con
+        last = con.execute('SELECT month, cum_salary, cum_count FROM MONTHLY WHERE series = ? '
+                           'ORDER BY month DESC LIMIT 1', (series,)).fetchone()
+        if last is None or month > last[0]:
+            # Новый месяц: пропущенные месяцы между ним и последним заполняются нулями с тем же префиксом
+            cum_salary, cum_count = (last[1], last[2]) if last is not None else (0.0, 0)
+            start = last[0] + 1 if last is not None else month
+            con.executemany('INSERT INTO MONTHLY VALUES (?, ?, 0, 0, ?, ?)',
+                            [(series, gap, cum_salary, cum_count) for gap in range(start, month)])
+            con.execute('INSERT INTO MONTHLY VALUES (?, ?, ?, ?, ?, ?)',
+                        (series, month, salary, count, cum_salary + salary, cum_count + count))
+            return
+        row = con.execute('SELECT salary, count FROM MONTHLY WHERE series = ? AND month = ?',
+                          (series, month)).fetchone()
+        if row is None:
+            # Месяц раньше начала ряда: ряд продлевается назад нулевыми месяцами
+            first = con.execute('SELECT MIN(month) FROM MONTHLY WHERE series = ?', (series,)).fetchone()[0]
+            con.executemany('INSERT INTO MONTHLY VALUES (?, ?, 0, 0, 0, 0)',
+                            [(series, gap) for gap in range(month, first)])
+            row = (0.0, 0)
+        salary_delta, count_delta = salary - row[0], count - row[1]
+        if salary_delta == 0 and count_delta == 0:
+            return
+        con.execute('UPDATE MONTHLY SET salary = ?, count = ? WHERE series = ? AND month = ?',
+                    (salary, count, series, month))
+        con.execute('UPDATE MONTHLY SET cum_salary = cum_salary + ?, cum_count = cum_count + ? '
+                    'WHERE series = ? AND month >= ?', (salary_delta, count_delta, series, month))
+
+
+if __name__ == '__main__':
+    store = TimeSeriesStore(input('Путь до базы рядов или пустую строку для timeseries.db: ') or 'timeseries.db')
+    name = input('Профессия или пустую строку для всех вакансий: ')
+    print('Месяц, средняя з\\п, количество, средняя з\\п и количество за 3 месяца, за 12 месяцев')
+    for line in store.series(name):
+        print(*line, sep='\t')
+    store.close()